@@ -9,6 +9,7 @@ from app.services.ebay_auth_service import (
     get_authorization_url,
     get_token_status,
 )
+from app.etsy.client import get_etsy_client
 from app.services.etsy_auth_service import (
     exchange_code_for_tokens as exchange_etsy_code_for_tokens,
     get_authorization_url as get_etsy_authorization_url,
@@ -132,6 +133,7 @@ async def etsy_callback(
 
     try:
         token_data = await exchange_etsy_code_for_tokens(code)
+        get_etsy_client().invalidate_token()
         return JSONResponse({
             "ok": True,
             "message": "Etsy authorized successfully. Tokens saved to database.",
@@ -157,7 +159,9 @@ async def etsy_login(state: str | None = None):
 @router.get("/etsy/status")
 async def etsy_token_status():
     """Check the current Etsy token health (valid / expired / missing)."""
-    return await get_etsy_token_status()
+    status = await get_etsy_token_status()
+    status["api_client"] = get_etsy_client().status()
+    return status
 
 
 @router.post("/etsy/refresh")
@@ -165,6 +169,7 @@ async def etsy_force_refresh():
     """Force an immediate Etsy token refresh using the stored refresh token."""
     try:
         new_token = await refresh_etsy_access_token()
+        get_etsy_client().invalidate_token()
         status = await get_etsy_token_status()
         return {
             "ok": True,
@@ -2,21 +2,52 @@ import re
 import json
 import copy
 import asyncio
-import mimetypes
 import math
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Any
-from urllib.parse import urlparse
 
-import httpx
 from openai import OpenAI
-from openpyxl import load_workbook
-from fastapi import APIRouter, Query, HTTPException, Body
+from fastapi import APIRouter, Query, HTTPException, Body, Request
 
 from app.database.mongo import db
 from app.config import settings
-from app.services.etsy_auth_service import get_valid_token as get_valid_etsy_token
+from app.etsy.client import EtsyAPIError, get_etsy_client
+from app.services.background_job_runner import ETSY_IMAGE_PREFETCH_QUEUE, wake_background_jobs
+from app.services.drift_counters import get_kpi_counters
+from app.services.etsy_bulk_publish import (
+    ITEMS_COLLECTION as BULK_PUBLISH_ITEMS_COLLECTION,
+    STAGES as BULK_PUBLISH_STAGES,
+    TERMINAL_STATES as BULK_PUBLISH_TERMINAL_STATES,
+    create_bulk_publish_run,
+    get_bulk_publish_run,
+    queue_ready_items_for_create,
+    register_stage_handlers,
+    start_bulk_publish_job,
+)
+from app.services.etsy_image_cache import etsy_image_from_doc
+from app.services.etsy_image_transfer import (
+    UploadHook,
+    reconcile_listing_image_order,
+    upload_listing_images,
+)
+from app.services.etsy_excel_match_rows import (
+    current_workbook,
+    excel_match_rows,
+    excel_match_summary,
+    remove_excel_match_listings,
+)
+from app.services.report_items_view import VIEW_COLLECTION as REPORT_ITEMS_VIEW_COLLECTION
+from app.services.dashboard_pagination import (
+    LAST_NORMALIZED_SORT,
+    REPORT_ITEMS_SORT,
+    InvalidCursor,
+    encode_cursor,
+    split_page,
+    with_cursor,
+)
+from app.services.search_index import refresh_search_terms, search_filter
+from app.services.ttl_cache import get_ttl_cache
 from app.shopify.client import ShopifyClient
 router = APIRouter()
 
@@ -27,7 +58,6 @@ EXCEL_REVIEW_PATTERNS = [
     "active_etsy_no_ebay_match_with_mongo_candidates_*.xlsx",
     "active_etsy_no_ebay_match_*.xlsx",
 ]
-ETSY_BASE_URL = "https://openapi.etsy.com/v3/application"
 ETSY_REQUIRED_CREATE_FIELDS = [
     ("title", "Title"),
     ("description", "Description"),
@@ -47,8 +77,20 @@ ETSY_SEO_OPENAI_MODEL = getattr(settings, "OPENAI_MODEL_ETSY_SEO", ETSY_TAXONOMY
 ETSY_TAXONOMY_PREFILTER_LIMIT = 40
 ETSY_TAXONOMY_RESULT_LIMIT = 8
 ETSY_TAXONOMY_CACHE_TTL_SECONDS = 60 * 60 * 12
-_ETSY_BUYER_TAXONOMY_CACHE: dict[str, Any] = {"fetched_at": None, "nodes": None}
-_ETSY_READINESS_CACHE: dict[str, Any] = {"by_shop": {}}
+# Etsy reference data changes rarely: serve it up to a week past the TTL while refreshing.
+ETSY_TAXONOMY_CACHE_STALE_SECONDS = 60 * 60 * 24 * 7
+_ETSY_BUYER_TAXONOMY_CACHE = get_ttl_cache(
+    "etsy_buyer_taxonomy",
+    ttl_seconds=ETSY_TAXONOMY_CACHE_TTL_SECONDS,
+    stale_seconds=ETSY_TAXONOMY_CACHE_STALE_SECONDS,
+    persist=True,
+)
+_ETSY_READINESS_CACHE = get_ttl_cache(
+    "etsy_readiness_states",
+    ttl_seconds=ETSY_TAXONOMY_CACHE_TTL_SECONDS,
+    stale_seconds=ETSY_TAXONOMY_CACHE_STALE_SECONDS,
+    persist=True,
+)
 ETSY_TAG_MAX_COUNT = 13
 ETSY_TAG_MAX_LENGTH = 20
 ETSY_TITLE_MAX_LENGTH = 140
@@ -84,6 +126,22 @@ ETSY_BULK_MIN_TAXONOMY_CONFIDENCE = 0.5
 ETSY_BULK_MAX_ITEMS_PER_RUN = 500
 ETSY_BULK_VALIDATE_CONCURRENCY = 8
 ETSY_BULK_VALIDATE_BATCH_DELAY_SECONDS = 0.0
+ETSY_BULK_DOC_PROJECTION = {
+    "_id": 1,
+    "sku": 1,
+    "title": 1,
+    "description": 1,
+    "price": 1,
+    "quantity": 1,
+    "tags": 1,
+    "images": 1,
+    "attributes": 1,
+    "category": 1,
+    "package": 1,
+    "shipping": 1,
+    "channels.etsy": 1,
+    "last_normalized_at": 1,
+}
 BULK_REPORT_COLLECTION = "etsy_bulk_reports"
 _ETSY_BULK_REPORT: dict[str, Any] = {
     "session_id": None,
@@ -95,15 +153,12 @@ _ETSY_BULK_REPORT: dict[str, Any] = {
 
 # Rate limiting configuration
 # OpenAI: ~3 requests/min for gpt-4, ~60 requests/min for gpt-3.5
-# Etsy: 10 requests/second per API key (1000 per 100 seconds)
+# Etsy calls are paced by the shared client in app/etsy/client.py.
 OPENAI_MAX_CONCURRENT_REQUESTS = 3  # Faster throughput while still bounded
 OPENAI_REQUEST_DELAY_SECONDS = 0.1  # Minimal pacing between OpenAI calls
-ETSY_MAX_CONCURRENT_REQUESTS = 5    # 5 concurrent requests (well below 10/sec limit)
-ETSY_REQUEST_DELAY_SECONDS = 0.1    # 100ms delay between requests
 
 # Semaphores for rate limiting (initialized once)
 _openai_semaphore: asyncio.Semaphore | None = None
-_etsy_semaphore: asyncio.Semaphore | None = None
 
 
 def _get_openai_semaphore() -> asyncio.Semaphore:
@@ -114,14 +169,6 @@ def _get_openai_semaphore() -> asyncio.Semaphore:
     return _openai_semaphore
 
 
-def _get_etsy_semaphore() -> asyncio.Semaphore:
-    """Get or create the Etsy rate limit semaphore."""
-    global _etsy_semaphore
-    if _etsy_semaphore is None:
-        _etsy_semaphore = asyncio.Semaphore(ETSY_MAX_CONCURRENT_REQUESTS)
-    return _etsy_semaphore
-
-
 def _ensure_utc(dt: datetime | None) -> datetime | None:
     if dt is None:
         return None
@@ -130,11 +177,6 @@ def _ensure_utc(dt: datetime | None) -> datetime | None:
     return dt
 
 
-def _rx(text: str) -> dict:
-    # Escape to avoid accidental regex patterns coming from user input
-    return {"$regex": re.escape(text), "$options": "i"}
-
-
 def _load_match_report() -> dict:
     if not MATCH_REPORT_PATH.exists():
         raise HTTPException(status_code=404, detail="Match report not found. Export analysis first.")
@@ -242,64 +284,15 @@ def _find_latest_excel_review_path() -> Path:
     return max(candidates, key=lambda p: p.stat().st_mtime)
 
 
-def _normalize_header(value: object) -> str:
-    return str(value or "").strip().lower()
-
-
-def _load_excel_rows(workbook_path: Path) -> tuple[list[dict], dict[str, int]]:
-    wb = load_workbook(workbook_path, read_only=True, data_only=True)
-    ws = wb.active
-    rows_iter = ws.iter_rows(values_only=True)
-    headers = next(rows_iter, None)
-    if not headers:
-        return [], {}
-
-    header_map = {_normalize_header(h): i for i, h in enumerate(headers)}
-    out_rows: list[dict] = []
-    for values in rows_iter:
-        row: dict = {}
-        for key, idx in header_map.items():
-            row[key] = values[idx] if idx < len(values) else None
-        out_rows.append(row)
-    return out_rows, header_map
-
-
-def _extract_etsy_image_from_doc(etsy_doc: dict | None) -> str | None:
-    if not etsy_doc:
-        return None
-
-    raw = (etsy_doc.get("raw") or {}) if isinstance(etsy_doc, dict) else {}
-    images = raw.get("images")
-    if isinstance(images, list) and images:
-        image = images[0] if isinstance(images[0], dict) else None
-        if image:
-            for key in ("url_fullxfull", "url_570xN", "url_170x135", "url_75x75"):
-                val = image.get(key)
-                if val:
-                    return str(val)
-    return None
-
-
-async def _resolve_etsy_auth_headers_for_review() -> dict[str, str]:
+async def _ensure_etsy_auth_for_review() -> None:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
+        raise HTTPException(status_code=400, detail="Missing Etsy API key")
     try:
-        token = await get_valid_etsy_token()
+        await etsy.ensure_auth()
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
-        api_key = f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
-    else:
-        api_key = settings.ETSY_CLIENT_ID
-    if not api_key:
-        raise HTTPException(status_code=400, detail="Missing Etsy API key")
-
-    return {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": str(api_key),
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
 
 def _money_to_float(value: object) -> float:
     if isinstance(value, (int, float)):
@@ -369,77 +362,38 @@ async def _update_etsy_listing_sku_for_review(
     listing_id: int,
     new_sku: str,
     target_quantity: int,
-    headers: dict[str, str],
 ) -> None:
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        get_response = await client.get(
-            f"{ETSY_BASE_URL}/listings/{listing_id}/inventory",
-            headers=headers,
-            params={"show_deleted": "true"},
-        )
-        if get_response.status_code >= 400:
-            raise HTTPException(
-                status_code=400,
-                detail=f"etsy_inventory_get_failed status={get_response.status_code}",
-            )
-
-        inventory_payload = get_response.json() if get_response.content else {}
-        update_payload = _build_etsy_inventory_update_payload(inventory_payload, new_sku, target_quantity)
-
-        put_response = await client.put(
-            f"{ETSY_BASE_URL}/listings/{listing_id}/inventory",
-            headers=headers,
-            content=json.dumps(update_payload),
-        )
-        if put_response.status_code >= 400:
-            raise HTTPException(
-                status_code=400,
-                detail=f"etsy_inventory_put_failed status={put_response.status_code}",
-            )
+    etsy = get_etsy_client()
+    try:
+        inventory_payload = await etsy.get_listing_inventory(listing_id)
+    except EtsyAPIError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"etsy_inventory_get_failed status={exc.status_code}",
+        ) from exc
 
+    update_payload = _build_etsy_inventory_update_payload(inventory_payload or {}, new_sku, target_quantity)
 
-async def _fetch_etsy_main_image_from_api(
-    client: httpx.AsyncClient,
-    headers: dict[str, str],
-    listing_id: int,
-) -> str | None:
-    response = await client.get(
-        f"{ETSY_BASE_URL}/listings/{listing_id}/images",
-        headers=headers,
+    try:
+        await etsy.update_listing_inventory(listing_id, update_payload)
+    except EtsyAPIError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"etsy_inventory_put_failed status={exc.status_code}",
+        ) from exc
+
+    # The quantity push caches this listing's inventory; drop it so the next
+    # push re-reads what was just written instead of replaying stale offerings.
+    await db.product_normalized.update_many(
+        {"channels.etsy.inventory_template_listing_id": {"$in": [listing_id, str(listing_id)]}},
+        {
+            "$unset": {
+                "channels.etsy.inventory_template": "",
+                "channels.etsy.inventory_template_listing_id": "",
+                "channels.etsy.inventory_template_updated_at": "",
+            }
+        },
     )
-    if response.status_code >= 400:
-        return None
-    payload = response.json() if response.content else {}
-    results = payload.get("results") or []
-    if not results:
-        return None
-
-    first = results[0] if isinstance(results[0], dict) else None
-    if not first:
-        return None
-    for key in ("url_fullxfull", "url_570xN", "url_170x135", "url_75x75"):
-        value = first.get(key)
-        if value:
-            return str(value)
-    return None
-
-
-def _guess_image_filename(image_url: str, index: int) -> str:
-    parsed = urlparse(image_url)
-    name = Path(parsed.path or "").name
-    if name:
-        return name
-    return f"image_{index}.jpg"
-
-
-def _normalize_image_content_type(content_type: str | None, filename: str) -> str:
-    txt = (content_type or "").split(";")[0].strip().lower()
-    if txt.startswith("image/"):
-        return txt
-    guessed, _ = mimetypes.guess_type(filename)
-    if guessed and guessed.startswith("image/"):
-        return guessed
-    return "image/jpeg"
 
 
 async def _upload_etsy_listing_images(
@@ -447,9 +401,21 @@ async def _upload_etsy_listing_images(
     shop_id: str | int,
     listing_id: int,
     image_urls: list[str],
-    headers: dict[str, str],
+    uploaded: dict[int, int] | None = None,
+    on_uploaded: UploadHook | None = None,
 ) -> dict[str, Any]:
-    if not image_urls:
+    """Upload ``image_urls`` as ranks 1..n, then put the listing's images in that order.
+
+    ``uploaded`` maps ranks already on the listing to their listing_image_id;
+    those are not uploaded again. ``on_uploaded`` sees each image Etsy accepts.
+    """
+    image_ids_by_rank = dict(uploaded or {})
+    pending = [
+        (rank, url)
+        for rank, url in enumerate(image_urls or [], start=1)
+        if rank not in image_ids_by_rank
+    ]
+    if not pending:
         return {
             "attempted": False,
             "ok": True,
@@ -458,93 +424,36 @@ async def _upload_etsy_listing_images(
             "results": [],
         }
 
-    upload_url = f"{ETSY_BASE_URL}/shops/{shop_id}/listings/{listing_id}/images"
-    results: list[dict[str, Any]] = []
-    uploaded = 0
-    failed = 0
-
-    # Keep auth headers but let httpx set multipart Content-Type with boundary.
-    upload_headers = {k: v for k, v in headers.items() if k.lower() != "content-type"}
-
-    async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-        for idx, image_url in enumerate(image_urls, start=1):
-            entry: dict[str, Any] = {
-                "rank": idx,
-                "image_url": image_url,
-                "uploaded": False,
-            }
-            try:
-                image_response = await client.get(image_url)
-                if image_response.status_code >= 300:
-                    failed += 1
-                    entry["error"] = "image_download_failed"
-                    entry["download_status"] = image_response.status_code
-                    results.append(entry)
-                    continue
-
-                filename = _guess_image_filename(image_url, idx)
-                content_type = _normalize_image_content_type(image_response.headers.get("content-type"), filename)
-                files = {"image": (filename, image_response.content, content_type)}
-                data = {"rank": str(idx)}
-
-                upload_response = await client.post(upload_url, headers=upload_headers, files=files, data=data)
-                entry["upload_status"] = upload_response.status_code
-                if upload_response.status_code < 300:
-                    entry["uploaded"] = True
-                    uploaded += 1
-                    try:
-                        entry["etsy_response"] = upload_response.json()
-                    except Exception:
-                        entry["etsy_response"] = upload_response.text
-                else:
-                    failed += 1
-                    entry["error"] = "etsy_image_upload_failed"
-                    try:
-                        entry["etsy_response"] = upload_response.json()
-                    except Exception:
-                        entry["etsy_response"] = upload_response.text
-            except Exception as exc:
-                failed += 1
-                entry["error"] = "image_upload_exception"
-                entry["message"] = str(exc)
-
-            results.append(entry)
+    results = await upload_listing_images(
+        shop_id=shop_id,
+        listing_id=listing_id,
+        images=pending,
+        on_uploaded=on_uploaded,
+    )
+    uploaded_count = 0
+    for entry in results:
+        if entry.get("uploaded"):
+            uploaded_count += 1
+            if entry.get("listing_image_id") is not None:
+                image_ids_by_rank[entry["rank"]] = entry["listing_image_id"]
+    failed = len(results) - uploaded_count
+    # Parallel uploads finish out of order; restore the intended ranks.
+    await reconcile_listing_image_order(shop_id, listing_id, image_ids_by_rank)
 
     return {
         "attempted": True,
         "ok": failed == 0,
-        "uploaded": uploaded,
+        "uploaded": uploaded_count,
         "failed": failed,
         "results": results,
     }
 
 
-def _remove_listing_from_excel(workbook_path: Path, listing_id: int) -> bool:
-    wb = load_workbook(workbook_path)
-    ws = wb.active
-    headers = [str(c.value or "").strip().lower() for c in ws[1]]
-    if "listing_id" not in headers:
-        raise HTTPException(status_code=400, detail="Workbook missing listing_id column")
-
-    listing_col = headers.index("listing_id") + 1
-    target_row = None
-    for row_num in range(2, ws.max_row + 1):
-        value = ws.cell(row=row_num, column=listing_col).value
-        try:
-            if int(value) == int(listing_id):
-                target_row = row_num
-                break
-        except Exception:
-            continue
-
-    if target_row is None:
-        wb.close()
-        return False
-
-    ws.delete_rows(target_row, 1)
-    wb.save(workbook_path)
-    wb.close()
-    return True
+async def _remove_listings_from_excel(workbook_path: Path, listing_ids: list[int]) -> set[int]:
+    try:
+        return await remove_excel_match_listings(workbook_path, listing_ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 def _to_float(value: object) -> float | None:
@@ -902,12 +811,6 @@ def _extract_etsy_shipping_measurements(package: dict | None) -> dict[str, Any]:
     }
 
 
-def _resolve_etsy_api_key() -> str | None:
-    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
-        return f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
-    return settings.ETSY_CLIENT_ID
-
-
 def _tokenize_taxonomy_text(value: object) -> list[str]:
     text = (_clean_text(value) or "").lower()
     if not text:
@@ -1179,49 +1082,30 @@ def _build_etsy_taxonomy_query(detail: dict) -> dict[str, Any]:
     }
 
 
-async def _fetch_buyer_taxonomy_nodes() -> list[dict[str, Any]]:
-    cached_nodes = _ETSY_BUYER_TAXONOMY_CACHE.get("nodes")
-    fetched_at = _ETSY_BUYER_TAXONOMY_CACHE.get("fetched_at")
-    now = _now_utc()
-    if cached_nodes and isinstance(fetched_at, datetime):
-        age = (now - fetched_at).total_seconds()
-        if age < ETSY_TAXONOMY_CACHE_TTL_SECONDS:
-            return cached_nodes
-
-    api_key = _resolve_etsy_api_key()
-    if not api_key:
+async def _load_buyer_taxonomy_nodes() -> list[dict[str, Any]]:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
         raise HTTPException(status_code=400, detail="Missing Etsy API key")
 
-    headers = {
-        "x-api-key": str(api_key),
-        "Accept": "application/json",
-    }
-    url = f"{ETSY_BASE_URL}/buyer-taxonomy/nodes"
-
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        response = await client.get(url, headers=headers)
-
-    if response.status_code >= 300:
-        try:
-            detail = response.json()
-        except Exception:
-            detail = response.text
+    try:
+        nodes = await etsy.get_buyer_taxonomy_nodes()
+    except EtsyAPIError as exc:
         raise HTTPException(
             status_code=502,
             detail={
                 "error": "etsy_taxonomy_fetch_failed",
-                "etsy_status_code": response.status_code,
-                "etsy_response": detail,
+                "etsy_status_code": exc.status_code,
+                "etsy_response": exc.detail,
             },
-        )
+        ) from exc
 
-    payload = response.json() if response.text else {}
-    nodes = payload.get("results") or []
-    _ETSY_BUYER_TAXONOMY_CACHE["nodes"] = nodes
-    _ETSY_BUYER_TAXONOMY_CACHE["fetched_at"] = now
     return nodes
 
 
+async def _fetch_buyer_taxonomy_nodes() -> list[dict[str, Any]]:
+    return await _ETSY_BUYER_TAXONOMY_CACHE.get("nodes", _load_buyer_taxonomy_nodes)
+
+
 def _flatten_buyer_taxonomy_nodes(nodes: list[dict[str, Any]], ancestors: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
     ancestors = ancestors or []
     flat: list[dict[str, Any]] = []
@@ -1237,16 +1121,21 @@ def _flatten_buyer_taxonomy_nodes(nodes: list[dict[str, Any]], ancestors: list[d
         children = node.get("children") or []
         leaf = not bool(children)
         full_path = " > ".join(full_path_names)
+        level = _to_int(node.get("level")) or max(0, len(lineage) - 1)
         flat.append(
             {
                 "taxonomy_id": taxonomy_id,
                 "name": name,
                 "full_path": full_path,
                 "full_path_taxonomy_ids": full_path_ids,
-                "level": _to_int(node.get("level")) or max(0, len(lineage) - 1),
+                "level": level,
                 "leaf": leaf,
                 "name_tokens": _tokenize_taxonomy_text(name),
                 "path_tokens": _tokenize_taxonomy_text(full_path),
+                "name_lower": name.lower(),
+                "full_path_lower": full_path.lower(),
+                # Query-independent part of the score: prefer leaves, avoid top-level nodes.
+                "base_score": (1.0 if leaf else 0.0) - (2.0 if level <= 1 else 0.0),
             }
         )
         if children:
@@ -1254,24 +1143,43 @@ def _flatten_buyer_taxonomy_nodes(nodes: list[dict[str, Any]], ancestors: list[d
     return flat
 
 
-def _score_etsy_taxonomy_candidate(query: dict[str, Any], candidate: dict[str, Any]) -> float:
-    tokens = set(query.get("query_tokens") or [])
-    if not tokens:
-        return 0.0
+def _build_etsy_taxonomy_index(raw_nodes: list[dict[str, Any]]) -> dict[str, Any]:
+    """Flattened taxonomy plus token -> node position postings for names and full paths."""
+    flat_nodes = _flatten_buyer_taxonomy_nodes(raw_nodes)
+    name_postings: dict[str, list[int]] = {}
+    path_postings: dict[str, list[int]] = {}
+    for position, node in enumerate(flat_nodes):
+        for token in set(node["name_tokens"]):
+            name_postings.setdefault(token, []).append(position)
+        for token in set(node["path_tokens"]):
+            path_postings.setdefault(token, []).append(position)
+    return {
+        "source": raw_nodes,
+        "nodes": flat_nodes,
+        "name_postings": name_postings,
+        "path_postings": path_postings,
+    }
+
+
+_etsy_taxonomy_index: dict[str, Any] | None = None
 
-    name_tokens = set(candidate.get("name_tokens") or [])
-    path_tokens = set(candidate.get("path_tokens") or [])
-    name_overlap = tokens & name_tokens
-    path_overlap = tokens & path_tokens
 
-    score = 0.0
-    score += len(name_overlap) * 4.0
-    score += len(path_overlap) * 1.5
+async def _get_etsy_taxonomy_index() -> dict[str, Any]:
+    """Index of the cached taxonomy, rebuilt only when the cache hands back a new node list."""
+    global _etsy_taxonomy_index
+    raw_nodes = await _fetch_buyer_taxonomy_nodes()
+    if _etsy_taxonomy_index is None or _etsy_taxonomy_index["source"] is not raw_nodes:
+        _etsy_taxonomy_index = _build_etsy_taxonomy_index(raw_nodes)
+    return _etsy_taxonomy_index
+
+
+def _score_etsy_taxonomy_candidate(query: dict[str, Any], candidate: dict[str, Any], *, name_overlap: int, path_overlap: int) -> float:
+    score = name_overlap * 4.0 + path_overlap * 1.5
 
     title = (query.get("title") or "").lower()
     category = (query.get("category") or "").lower()
-    name = (candidate.get("name") or "").lower()
-    full_path = (candidate.get("full_path") or "").lower()
+    name = candidate["name_lower"]
+    full_path = candidate["full_path_lower"]
 
     if name and name in title:
         score += 6.0
@@ -1280,20 +1188,31 @@ def _score_etsy_taxonomy_candidate(query: dict[str, Any], candidate: dict[str, A
     if full_path and category and category in full_path:
         score += 2.0
 
-    if candidate.get("leaf"):
-        score += 1.0
-
-    level = candidate.get("level") or 0
-    if level <= 1:
-        score -= 2.0
-
+    score += candidate["base_score"]
     return round(score, 3)
 
 
-def _prefilter_etsy_taxonomy_candidates(query: dict[str, Any], flat_nodes: list[dict[str, Any]], *, limit: int = ETSY_TAXONOMY_PREFILTER_LIMIT) -> list[dict[str, Any]]:
+def _prefilter_etsy_taxonomy_candidates(query: dict[str, Any], index: dict[str, Any], *, limit: int = ETSY_TAXONOMY_PREFILTER_LIMIT) -> list[dict[str, Any]]:
+    tokens = set(query.get("query_tokens") or [])
+    name_hits: dict[int, int] = {}
+    path_hits: dict[int, int] = {}
+    for token in tokens:
+        for position in index["name_postings"].get(token, ()):
+            name_hits[position] = name_hits.get(position, 0) + 1
+        for position in index["path_postings"].get(token, ()):
+            path_hits[position] = path_hits.get(position, 0) + 1
+
+    flat_nodes = index["nodes"]
     scored: list[dict[str, Any]] = []
-    for node in flat_nodes:
-        score = _score_etsy_taxonomy_candidate(query, node)
+    # A node's name tokens are part of its path tokens, so path_hits covers every match.
+    for position, path_overlap in path_hits.items():
+        node = flat_nodes[position]
+        score = _score_etsy_taxonomy_candidate(
+            query,
+            node,
+            name_overlap=name_hits.get(position, 0),
+            path_overlap=path_overlap,
+        )
         if score <= 0:
             continue
         scored.append({
@@ -1383,9 +1302,8 @@ def _rank_etsy_taxonomy_candidates_with_openai(query: dict[str, Any], candidates
 
 async def _suggest_etsy_taxonomy(detail: dict, *, limit: int = ETSY_TAXONOMY_RESULT_LIMIT) -> dict[str, Any]:
     query = _build_etsy_taxonomy_query(detail)
-    raw_nodes = await _fetch_buyer_taxonomy_nodes()
-    flat_nodes = _flatten_buyer_taxonomy_nodes(raw_nodes)
-    prefiltered = _prefilter_etsy_taxonomy_candidates(query, flat_nodes)
+    index = await _get_etsy_taxonomy_index()
+    prefiltered = _prefilter_etsy_taxonomy_candidates(query, index)
 
     # Rate limit OpenAI requests
     semaphore = _get_openai_semaphore()
@@ -1437,50 +1355,31 @@ async def _resolve_etsy_shop_id() -> str | None:
     return None
 
 
-async def _fetch_etsy_readiness_states(shop_id: str) -> list[dict[str, Any]]:
-    cached_by_shop = _ETSY_READINESS_CACHE.setdefault("by_shop", {})
-    cached = cached_by_shop.get(str(shop_id))
-    now = _now_utc()
-    if isinstance(cached, dict) and isinstance(cached.get("fetched_at"), datetime):
-        age = (now - cached["fetched_at"]).total_seconds()
-        if age < ETSY_TAXONOMY_CACHE_TTL_SECONDS:
-            return cached.get("results") or []
-
-    token = await get_valid_etsy_token()
-    api_key = _resolve_etsy_api_key()
-    if not api_key:
+async def _load_etsy_readiness_states(shop_id: str) -> list[dict[str, Any]]:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
         raise HTTPException(status_code=400, detail="Missing Etsy API key")
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": str(api_key),
-        "Accept": "application/json",
-    }
-    url = f"{ETSY_BASE_URL}/shops/{shop_id}/readiness-state-definitions"
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url, headers=headers)
-
-    if response.status_code >= 300:
-        try:
-            detail = response.json()
-        except Exception:
-            detail = response.text
+    try:
+        results = await etsy.get_readiness_state_definitions(shop_id)
+    except EtsyAPIError as exc:
         raise HTTPException(
             status_code=502,
             detail={
                 "error": "etsy_readiness_state_fetch_failed",
-                "etsy_status_code": response.status_code,
-                "etsy_response": detail,
+                "etsy_status_code": exc.status_code,
+                "etsy_response": exc.detail,
             },
-        )
+        ) from exc
 
-    payload = response.json() if response.text else {}
-    results = payload.get("results") or []
-    cached_by_shop[str(shop_id)] = {"fetched_at": now, "results": results}
     return results
 
 
+async def _fetch_etsy_readiness_states(shop_id: str) -> list[dict[str, Any]]:
+    results = await _ETSY_READINESS_CACHE.get(shop_id, lambda: _load_etsy_readiness_states(shop_id))
+    return results or []
+
+
 async def _resolve_etsy_readiness_state_id(*, shop_id: str, payload: dict[str, Any]) -> int | None:
     configured = _to_int(payload.get("readiness_state_id")) or settings.ETSY_READINESS_STATE_ID
     if configured:
@@ -1838,6 +1737,75 @@ async def _generate_etsy_optimizations_for_bulk(detail: dict) -> dict[str, Any]:
     return optimizations
 
 
+def _bulk_skip(sku: Any, reason: str, detail: str, optimizations: dict[str, Any] | None = None) -> dict[str, Any]:
+    return {
+        "sku": sku,
+        "status": "skipped",
+        "reason": reason,
+        "detail": detail,
+        "optimizations": optimizations,
+    }
+
+
+def _bulk_precheck(doc: dict) -> dict[str, Any] | None:
+    """Skip result for items that can never be published, or None."""
+    sku = doc.get("_id") or doc.get("sku")
+    existing_listing_id = ((doc.get("channels") or {}).get("etsy") or {}).get("listing_id")
+    if existing_listing_id:
+        return _bulk_skip(sku, "already_linked_to_etsy", f"Existing listing_id: {existing_listing_id}")
+
+    qty = _to_int(doc.get("quantity"))
+    if qty is None or qty <= 0:
+        return _bulk_skip(sku, "insufficient_quantity", f"Quantity: {qty}")
+    return None
+
+
+def _bulk_shipping_check(doc: dict, detail: dict, optimizations: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    optimized = detail.get("etsy_optimized") or {}
+    listing_type = _coerce_etsy_enum(optimized.get("type"), ETSY_ALLOWED_LISTING_TYPES) or settings.ETSY_DEFAULT_LISTING_TYPE
+    if listing_type == "physical" and not _has_required_shipping_measurements(doc.get("package")):
+        return _bulk_skip(
+            doc.get("_id") or doc.get("sku"),
+            "missing_shipping_measurements",
+            "Physical listing requires weight and all three dimensions (length, width, height)",
+            optimizations,
+        )
+    return None
+
+
+def _bulk_optimized_checks(
+    doc: dict,
+    detail: dict,
+    optimizations: dict[str, Any],
+    *,
+    min_taxonomy_confidence: float,
+    check_shipping: bool = True,
+) -> dict[str, Any] | None:
+    """Checks that need the generated optimizations (required fields, taxonomy confidence)."""
+    sku = doc.get("_id") or doc.get("sku")
+    test_payload = _build_etsy_create_listing_payload(detail)
+    missing_fields = _get_missing_etsy_required_fields(test_payload)
+    if missing_fields:
+        return _bulk_skip(sku, "missing_required_fields", f"Missing: {', '.join(missing_fields)}", optimizations)
+
+    if check_shipping:
+        shipping_skip = _bulk_shipping_check(doc, detail, optimizations)
+        if shipping_skip:
+            return shipping_skip
+
+    taxonomy_id = optimizations.get("taxonomy_id")
+    taxonomy_confidence = optimizations.get("taxonomy_confidence") or 0.0
+    if not taxonomy_id or taxonomy_confidence < min_taxonomy_confidence:
+        reason = "low_confidence_taxonomy" if not taxonomy_id else "low_confidence_taxonomy_threshold"
+        return _bulk_skip(
+            sku,
+            reason,
+            f"AI taxonomy confidence: {taxonomy_confidence} (threshold: {min_taxonomy_confidence})",
+            optimizations,
+        )
+    return None
+
+
 async def _validate_bulk_item(
     doc: dict,
     *,
@@ -1845,85 +1813,30 @@ async def _validate_bulk_item(
 ) -> dict[str, Any]:
     """Validate a single item for bulk publishing. Generates optimizations first, then validates."""
     sku = doc.get("_id") or doc.get("sku")
-    
+
     # Early exit checks (don't need optimization for these)
-    existing_listing_id = ((doc.get("channels") or {}).get("etsy") or {}).get("listing_id")
-    if existing_listing_id:
-        return {
-            "sku": sku,
-            "status": "skipped",
-            "reason": "already_linked_to_etsy",
-            "detail": f"Existing listing_id: {existing_listing_id}",
-            "optimizations": None,
-        }
-    
-    qty = _to_int(doc.get("quantity"))
-    if qty is None or qty <= 0:
-        return {
-            "sku": sku,
-            "status": "skipped",
-            "reason": "insufficient_quantity",
-            "detail": f"Quantity: {qty}",
-            "optimizations": None,
-        }
-    
+    precheck_skip = _bulk_precheck(doc)
+    if precheck_skip:
+        return precheck_skip
+
     # Build comparison to get base view
     detail = _build_etsy_publish_comparison(doc)
-    
+
     # GENERATE OPTIMIZATIONS FIRST
     try:
         optimizations = await _generate_etsy_optimizations_for_bulk(detail)
     except Exception as opt_exc:
-        return {
-            "sku": sku,
-            "status": "skipped",
-            "reason": "optimization_generation_failed",
-            "detail": f"Failed to generate optimizations: {str(opt_exc)}",
-            "optimizations": None,
-        }
-    
+        return _bulk_skip(
+            sku,
+            "optimization_generation_failed",
+            f"Failed to generate optimizations: {str(opt_exc)}",
+        )
+
     # Now validate using optimized data
-    optimized = detail.get("etsy_optimized") or {}
-    
-    # Check required fields (using optimized payload)
-    test_payload = _build_etsy_create_listing_payload(detail)
-    missing_fields = _get_missing_etsy_required_fields(test_payload)
-    if missing_fields:
-        return {
-            "sku": sku,
-            "status": "skipped",
-            "reason": "missing_required_fields",
-            "detail": f"Missing: {', '.join(missing_fields)}",
-            "optimizations": optimizations,
-        }
-    
-    # For physical listings, check shipping measurements
-    listing_type = _coerce_etsy_enum(optimized.get("type"), ETSY_ALLOWED_LISTING_TYPES) or settings.ETSY_DEFAULT_LISTING_TYPE
-    if listing_type == "physical":
-        package = doc.get("package")
-        if not _has_required_shipping_measurements(package):
-            return {
-                "sku": sku,
-                "status": "skipped",
-                "reason": "missing_shipping_measurements",
-                "detail": "Physical listing requires weight and all three dimensions (length, width, height)",
-                "optimizations": optimizations,
-            }
-    
-    # Check taxonomy confidence (generated in optimizations)
-    taxonomy_id = optimizations.get("taxonomy_id")
-    taxonomy_confidence = optimizations.get("taxonomy_confidence") or 0.0
-    
-    if not taxonomy_id or taxonomy_confidence < min_taxonomy_confidence:
-        reason = "low_confidence_taxonomy" if not taxonomy_id else "low_confidence_taxonomy_threshold"
-        return {
-            "sku": sku,
-            "status": "skipped",
-            "reason": reason,
-            "detail": f"AI taxonomy confidence: {taxonomy_confidence} (threshold: {min_taxonomy_confidence})",
-            "optimizations": optimizations,
-        }
-    
+    skip = _bulk_optimized_checks(doc, detail, optimizations, min_taxonomy_confidence=min_taxonomy_confidence)
+    if skip:
+        return skip
+
     # All checks passed - item is ready
     return {
         "sku": sku,
@@ -2092,6 +2005,8 @@ async def _apply_match_row(match_row: dict, *, matched_by: str) -> tuple[bool, s
     )
     if result.matched_count == 0:
         return False, "normalized_sku_not_found"
+    # The Etsy title is searchable from the channel compare view.
+    await refresh_search_terms([sku])
 
     await db[REVIEW_COLLECTION].update_one(
         {"etsy_listing_id": listing_id, "normalized_sku": sku},
@@ -2110,6 +2025,13 @@ async def _apply_match_row(match_row: dict, *, matched_by: str) -> tuple[bool, s
     return True, "applied"
 
 
+def _page_query(query: dict, cursor: str | None, sort: list[tuple[str, int]]) -> dict:
+    try:
+        return with_cursor(query, cursor, sort)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.get("/items")
 async def report_items(
     q: str | None = Query(default=None, description="Search across SKU / title / item id"),
@@ -2126,158 +2048,88 @@ async def report_items(
     max_height: float | None = Query(default=None, description="Max package height"),
     available_only: bool = Query(default=False, description="Only items with quantity > 0"),
     soldout_only: bool = Query(default=False, description="Only items with quantity <= 0"),
-    skip: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
     limit: int = Query(default=50, ge=1, le=200),
 ):
     posted_after = _ensure_utc(posted_after)
     posted_before = _ensure_utc(posted_before)
 
+    # Filters run against report_items_view, which holds one flat, indexed row
+    # per product_raw doc; raw/normalized docs are only loaded for the page.
     and_conditions: list[dict] = []
 
-    # Posting date filter (stored on product_raw)
-    if posted_after or posted_before:
-        date_q: dict[str, object] = {}
-        if posted_after:
-            date_q["$gte"] = posted_after
-        if posted_before:
-            date_q["$lte"] = posted_before
-        and_conditions.append({"ebay_posted_at": date_q})
-
-    # Search query
-    if q:
-        rx = _rx(q)
-        and_conditions.append(
-            {
-                "$or": [
-                    {"_id": rx},
-                    {"raw.ItemID": rx},
-                    {"raw.SKU": rx},
-                    {"raw.Title": rx},
-                    {"normalized.title": rx},
-                    {"normalized.category": rx},
-                ]
-            }
-        )
-
-    # Size filter (best-effort)
-    if size:
-        rx = _rx(size)
-        and_conditions.append(
-            {
-                "$or": [
-                    {"raw.ItemSpecifics.Size": rx},
-                    {"normalized.attributes.Size": rx},
-                    {"normalized.metafields.art.size": rx},
-                ]
-            }
-        )
-
-    # Weight filter (normalized.package.weight.major.value)
-    if min_weight is not None or max_weight is not None:
-        wq: dict[str, object] = {}
-        if min_weight is not None:
-            wq["$gte"] = float(min_weight)
-        if max_weight is not None:
-            wq["$lte"] = float(max_weight)
-        and_conditions.append({"normalized.package.weight.major.value": wq})
-
-    # Dimensions filters
-    def _dim_cond(field: str, min_v: float | None, max_v: float | None) -> None:
+    def _range_cond(field: str, min_v: object, max_v: object) -> None:
         if min_v is None and max_v is None:
             return
-        dq: dict[str, object] = {}
+        rq: dict[str, object] = {}
         if min_v is not None:
-            dq["$gte"] = float(min_v)
+            rq["$gte"] = min_v
         if max_v is not None:
-            dq["$lte"] = float(max_v)
-        and_conditions.append({field: dq})
+            rq["$lte"] = max_v
+        and_conditions.append({field: rq})
+
+    _range_cond("ebay_posted_at", posted_after, posted_before)
+    _range_cond("weight", min_weight, max_weight)
+    _range_cond("length", min_length, max_length)
+    _range_cond("width", min_width, max_width)
+    _range_cond("height", min_height, max_height)
 
-    _dim_cond("normalized.package.dimensions.length.value", min_length, max_length)
-    _dim_cond("normalized.package.dimensions.width.value", min_width, max_width)
-    _dim_cond("normalized.package.dimensions.height.value", min_height, max_height)
+    # Search across SKU / item id / raw + normalized title / category
+    if q:
+        and_conditions.append(search_filter(q))
+
+    # Size filter (best-effort)
+    if size:
+        and_conditions.append({"size_text": {"$regex": re.escape(size.lower())}})
 
-    # Availability filter (prefer normalized.quantity, fall back to raw.QuantityAvailable)
+    # Availability filter (normalized.quantity, falling back to raw.QuantityAvailable).
     # If both checkboxes are set (or neither), treat as no filter.
     if available_only and not soldout_only:
-        and_conditions.append(
-            {
-                "$expr": {
-                    "$gt": [
-                        {"$ifNull": ["$normalized.quantity", "$raw.QuantityAvailable"]},
-                        0,
-                    ]
-                }
-            }
-        )
+        and_conditions.append({"quantity": {"$gt": 0}})
     elif soldout_only and not available_only:
-        and_conditions.append(
-            {
-                "$expr": {
-                    "$lte": [
-                        {"$ifNull": ["$normalized.quantity", "$raw.QuantityAvailable"]},
-                        0,
-                    ]
-                }
-            }
-        )
-
-    match_stage: dict | None = None
-    if and_conditions:
-        match_stage = {"$match": {"$and": and_conditions}}
-
-    lookup = {
-        "$lookup": {
-            "from": "product_normalized",
-            "localField": "_id",
-            "foreignField": "_id",
-            "as": "normalized",
-        }
-    }
-    unwind = {"$unwind": {"path": "$normalized", "preserveNullAndEmptyArrays": True}}
+        and_conditions.append({"quantity": {"$lte": 0}})
 
-    base_pipeline: list[dict] = [lookup, unwind]
-    if match_stage:
-        base_pipeline.append(match_stage)
+    query: dict = {"$and": and_conditions} if and_conditions else {}
+    view = db[REPORT_ITEMS_VIEW_COLLECTION]
 
-    # Count pipeline (same filters)
-    count_pipeline = base_pipeline + [{"$count": "total"}]
-    count_docs = await db.product_raw.aggregate(count_pipeline).to_list(length=1)
-    total = int(count_docs[0]["total"]) if count_docs else 0
-
-    # Result pipeline
-    result_pipeline = (
-        base_pipeline
-        + [
-            {"$sort": {"ebay_posted_at": -1, "_id": 1}},
-            {"$skip": int(skip)},
-            {"$limit": int(limit)},
-            {
-                "$project": {
-                    "_id": 0,
-                    "sku": "$_id",
-                    "ebay_posted_at": 1,
-                    "image_url": {
-                        "$ifNull": [
-                            {"$arrayElemAt": ["$normalized.images", 0]},
-                            {"$arrayElemAt": ["$raw.Images", 0]},
-                        ]
-                    },
-                    "image_urls": {"$ifNull": ["$normalized.images", "$raw.Images"]},
-                    "raw": "$raw",
-                    "normalized": "$normalized",
-                }
-            },
-        ]
+    total = await view.count_documents(query)
+    rows = await (
+        view.find(_page_query(query, cursor, REPORT_ITEMS_SORT), {"_id": 1, "ebay_posted_at": 1, "image_url": 1})
+        .sort(REPORT_ITEMS_SORT)
+        .limit(int(limit) + 1)
+        .to_list(length=limit + 1)
     )
+    rows, next_cursor = split_page(rows, REPORT_ITEMS_SORT, limit)
 
-    items = await db.product_raw.aggregate(result_pipeline).to_list(length=limit)
+    skus = [row["_id"] for row in rows]
+    raw_by_sku = {doc["_id"]: doc async for doc in db.product_raw.find({"_id": {"$in": skus}}, {"raw": 1})}
+    norm_by_sku = {doc["_id"]: doc async for doc in db.product_normalized.find({"_id": {"$in": skus}})}
+
+    items = []
+    for row in rows:
+        sku = row["_id"]
+        raw = (raw_by_sku.get(sku) or {}).get("raw")
+        normalized = norm_by_sku.get(sku)
+        image_urls = (normalized or {}).get("images")
+        if image_urls is None:
+            image_urls = (raw or {}).get("Images")
+        item = {
+            "sku": sku,
+            "ebay_posted_at": row.get("ebay_posted_at"),
+            "image_url": row.get("image_url"),
+            "image_urls": image_urls,
+            "raw": raw,
+        }
+        if normalized is not None:
+            item["normalized"] = normalized
+        items.append(item)
 
     return {
         "items": items,
         "total": total,
-        "skip": skip,
         "limit": limit,
-        "has_more": (skip + len(items)) < total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     }
 
 
@@ -2516,14 +2368,11 @@ async def etsy_match_deny(payload: dict):
 @router.get("/etsy-match-excel/summary")
 async def etsy_match_excel_summary():
     workbook_path = _find_latest_excel_review_path()
-    rows, _ = _load_excel_rows(workbook_path)
-    with_shopify = sum(1 for row in rows if row.get("matched_shopify_link"))
-    with_sku = sum(1 for row in rows if row.get("matched_mongo_sku"))
+    workbook = await current_workbook(workbook_path)
+    summary = await excel_match_summary(workbook)
     return {
         "workbook": str(workbook_path),
-        "count": len(rows),
-        "with_shopify_link": with_shopify,
-        "with_matched_sku": with_sku,
+        **summary,
         "generated_at": _now_utc(),
     }
 
@@ -2533,8 +2382,9 @@ async def etsy_match_excel_review(
     limit: int = Query(default=500, ge=1, le=2000),
 ):
     workbook_path = _find_latest_excel_review_path()
-    rows, _ = _load_excel_rows(workbook_path)
-    selected = rows[:limit]
+    workbook = await current_workbook(workbook_path)
+    stored_rows = await excel_match_rows(workbook, limit=limit)
+    selected = [doc.get("row") or {} for doc in stored_rows]
 
     listing_ids: list[int] = []
     skus: list[str] = []
@@ -2575,33 +2425,21 @@ async def etsy_match_excel_review(
         async for doc in cursor:
             norm_docs_by_sku[str(doc.get("_id"))] = doc
 
+    # Images come from the investigation snapshot or the background prefetcher;
+    # rows it has not reached yet render without one instead of waiting on Etsy.
     etsy_images_by_listing: dict[int, str | None] = {}
-    listings_missing_image: list[int] = []
-
-    for listing_id in listing_ids:
-        etsy_doc = etsy_docs_by_listing.get(listing_id)
-        image = _extract_etsy_image_from_doc(etsy_doc)
-        etsy_images_by_listing[listing_id] = image
-        if not image:
-            listings_missing_image.append(listing_id)
-
-    if listings_missing_image:
-        headers = None
+    images_pending = 0
+    for doc in stored_rows:
         try:
-            headers = await _resolve_etsy_auth_headers_for_review()
-        except HTTPException:
-            headers = None
-
-        if headers:
-            semaphore = asyncio.Semaphore(6)
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                async def _fetch_one(lid: int) -> None:
-                    async with semaphore:
-                        image_url = await _fetch_etsy_main_image_from_api(client, headers, lid)
-                        if image_url:
-                            etsy_images_by_listing[lid] = image_url
-
-                await asyncio.gather(*(_fetch_one(lid) for lid in listings_missing_image))
+            listing_id = int((doc.get("row") or {}).get("listing_id"))
+        except Exception:
+            continue
+        image = etsy_image_from_doc(etsy_docs_by_listing.get(listing_id)) or doc.get("etsy_image")
+        etsy_images_by_listing[listing_id] = image
+        if not image and doc.get("image_checked_at") is None:
+            images_pending += 1
+    if images_pending:
+        wake_background_jobs(ETSY_IMAGE_PREFETCH_QUEUE)
 
     out: list[dict] = []
     for row in selected:
@@ -2650,6 +2488,7 @@ async def etsy_match_excel_review(
     return {
         "workbook": str(workbook_path),
         "count": len(out),
+        "images_pending": images_pending,
         "items": out,
     }
 
@@ -2662,8 +2501,9 @@ async def etsy_match_excel_approve(payload: dict):
 async def _approve_excel_match(
     payload: dict,
     *,
-    headers: dict[str, str] | None = None,
+    auth_checked: bool = False,
     workbook_path: Path | None = None,
+    remove_from_excel: bool = True,
 ) -> dict:
     listing_id = payload.get("listing_id")
     sku = str(payload.get("matched_mongo_sku") or "").strip()
@@ -2679,13 +2519,13 @@ async def _approve_excel_match(
     if not norm_doc:
         raise HTTPException(status_code=404, detail="matched_mongo_sku_not_found")
 
-    etsy_headers = headers or await _resolve_etsy_auth_headers_for_review()
+    if not auth_checked:
+        await _ensure_etsy_auth_for_review()
     target_quantity = int(norm_doc.get("quantity") or 0)
     await _update_etsy_listing_sku_for_review(
         listing_id=listing_id_int,
         new_sku=sku,
         target_quantity=target_quantity,
-        headers=etsy_headers,
     )
 
     ok, reason = await _apply_match_row(
@@ -2701,7 +2541,9 @@ async def _approve_excel_match(
         raise HTTPException(status_code=400, detail=reason)
 
     workbook = workbook_path or _find_latest_excel_review_path()
-    removed = _remove_listing_from_excel(workbook, listing_id_int)
+    removed = False
+    if remove_from_excel:
+        removed = listing_id_int in await _remove_listings_from_excel(workbook, [listing_id_int])
 
     return {
         "ok": True,
@@ -2719,13 +2561,18 @@ async def etsy_match_excel_approve_batch(payload: dict):
         raise HTTPException(status_code=400, detail="approvals list is required")
 
     workbook_path = _find_latest_excel_review_path()
-    headers = await _resolve_etsy_auth_headers_for_review()
+    await _ensure_etsy_auth_for_review()
 
     successes: list[dict] = []
     failures: list[dict] = []
     for item in approvals:
         try:
-            result = await _approve_excel_match(item, headers=headers, workbook_path=workbook_path)
+            result = await _approve_excel_match(
+                item,
+                auth_checked=True,
+                workbook_path=workbook_path,
+                remove_from_excel=False,
+            )
             successes.append(
                 {
                     "listing_id": result.get("listing_id"),
@@ -2752,6 +2599,16 @@ async def etsy_match_excel_approve_batch(payload: dict):
                 }
             )
 
+    # One workbook rewrite for the whole batch instead of one per approval.
+    if successes:
+        try:
+            removed = await _remove_listings_from_excel(workbook_path, [item["listing_id"] for item in successes])
+        except HTTPException:
+            # The approvals themselves are applied; leave the rows for the next review.
+            removed = set()
+        for item in successes:
+            item["removed_from_excel"] = item["listing_id"] in removed
+
     return {
         "ok": len(failures) == 0,
         "workbook": str(workbook_path),
@@ -2789,6 +2646,7 @@ async def etsy_match_excel_deny(payload: dict):
 @router.get("/etsy-publish/queue")
 async def etsy_publish_queue(
     q: str | None = Query(default=None, description="Search SKU/title/category"),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
     limit: int = Query(default=100, ge=1, le=500),
 ):
     query: dict = {
@@ -2800,17 +2658,7 @@ async def etsy_publish_queue(
         ]
     }
     if q:
-        rx = _rx(q)
-        query["$and"] = [
-            {
-                "$or": [
-                    {"_id": rx},
-                    {"sku": rx},
-                    {"title": rx},
-                    {"category": rx},
-                ]
-            }
-        ]
+        query["$and"] = [search_filter(q)]
 
     projection = {
         "_id": 1,
@@ -2830,7 +2678,13 @@ async def etsy_publish_queue(
     }
 
     total = await db.product_normalized.count_documents(query)
-    docs = await db.product_normalized.find(query, projection).sort("last_normalized_at", -1).to_list(length=limit)
+    docs = await (
+        db.product_normalized.find(_page_query(query, cursor, LAST_NORMALIZED_SORT), projection)
+        .sort(LAST_NORMALIZED_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    docs, next_cursor = split_page(docs, LAST_NORMALIZED_SORT, limit)
 
     items: list[dict] = []
     for doc in docs:
@@ -2853,6 +2707,7 @@ async def etsy_publish_queue(
         "count": len(items),
         "total": int(total),
         "items": items,
+        "next_cursor": next_cursor,
     }
 
 
@@ -3000,10 +2855,10 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
 
     request_payload = _build_etsy_create_listing_payload(detail, payload_override=payload_override)
 
-    token = await get_valid_etsy_token()
-    api_key = _resolve_etsy_api_key()
-    if not api_key:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
         raise HTTPException(status_code=400, detail="Missing Etsy API key")
+    await etsy.ensure_auth()
 
     shop_id = await _resolve_etsy_shop_id()
     if not shop_id:
@@ -3038,17 +2893,8 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
         )
         return failure_body
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": str(api_key),
-        "Accept": "application/json",
-    }
-
     form_data = _to_etsy_form_data(request_payload)
-    url = f"{ETSY_BASE_URL}/shops/{shop_id}/listings"
-
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        response = await client.post(url, headers=headers, data=form_data)
+    response = await etsy.create_draft_listing(shop_id, form_data)
 
     raw_text = response.text
     try:
@@ -3087,17 +2933,10 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
         }
 
         try:
-            inventory_headers = {
-                "Authorization": f"Bearer {token}",
-                "x-api-key": str(api_key),
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-            }
             await _update_etsy_listing_sku_for_review(
                 listing_id=listing_id,
                 new_sku=str(detail.get("sku") or sku),
                 target_quantity=max(1, _to_int(request_payload.get("quantity")) or 1),
-                headers=inventory_headers,
             )
             inventory_sync["ok"] = True
         except Exception as exc:
@@ -3113,7 +2952,6 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
             shop_id=shop_id,
             listing_id=listing_id,
             image_urls=image_urls,
-            headers=headers,
         )
 
         await db.product_normalized.update_one(
@@ -3143,6 +2981,7 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
                 }
             },
         )
+        await refresh_search_terms([detail.get("sku")])
 
         return {
             "ok": response.status_code < 300,
@@ -3173,20 +3012,18 @@ async def etsy_publish_create_draft(sku: str, body: dict | None = Body(default=N
 async def channel_compare_list(
     q: str | None = Query(default=None, description="Search SKU/title"),
     drift_only: bool = Query(default=False, description="Only rows with detected drift"),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
     limit: int = Query(default=100, ge=1, le=500),
 ):
     query: dict = {"channels.etsy.listing_id": {"$exists": True}}
     if q:
-        rx = _rx(q)
-        query["$or"] = [
-            {"_id": rx},
-            {"sku": rx},
-            {"title": rx},
-            {"channels.etsy.title": rx},
-        ]
+        query["$and"] = [search_filter(q)]
 
-    cursor = db.product_normalized.find(
-        query,
+    # drift_only drops rows after the read, so scan a bounded window per page;
+    # the cursor resumes after the last scanned doc either way.
+    scan_budget = limit * 3
+    docs = await db.product_normalized.find(
+        _page_query(query, cursor, LAST_NORMALIZED_SORT),
         {
             "_id": 1,
             "sku": 1,
@@ -3199,11 +3036,12 @@ async def channel_compare_list(
             "channels.shopify": 1,
             "last_normalized_at": 1,
         },
-    ).sort("last_normalized_at", -1)
+    ).sort(LAST_NORMALIZED_SORT).limit(scan_budget + 1).to_list(length=scan_budget + 1)
 
-    docs = await cursor.to_list(length=limit * 3)
     items: list[dict] = []
-    for doc in docs:
+    scanned = 0
+    for doc in docs[:scan_budget]:
+        scanned += 1
         channels = doc.get("channels") or {}
         etsy = channels.get("etsy") or {}
         shopify = channels.get("shopify") or {}
@@ -3237,55 +3075,31 @@ async def channel_compare_list(
         if len(items) >= limit:
             break
 
+    next_cursor = encode_cursor(docs[scanned - 1], LAST_NORMALIZED_SORT) if len(docs) > scanned else None
     return {
         "count": len(items),
         "items": items,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/channel-compare/kpis")
 async def channel_compare_kpis():
-    total_products = await db.product_normalized.count_documents({})
-
-    etsy_linked = await db.product_normalized.count_documents(
-        {"channels.etsy.listing_id": {"$exists": True, "$ne": None}}
-    )
-    shopify_linked = await db.product_normalized.count_documents(
-        {"$or": [
-            {"channels.shopify.shopify_id": {"$exists": True, "$ne": None}},
-            {"shopify_id": {"$exists": True, "$ne": None}},
-        ]}
-    )
-
-    inventory_pipeline = [
-        {
-            "$group": {
-                "_id": None,
-                "ebay_total_inventory": {
-                    "$sum": {"$ifNull": ["$quantity", 0]}
-                },
-                "etsy_total_inventory": {
-                    "$sum": {"$ifNull": ["$channels.etsy.quantity", 0]}
-                },
-                "shopify_total_inventory": {
-                    "$sum": {"$ifNull": ["$channels.shopify.quantity", 0]}
-                },
-            }
-        }
-    ]
-    agg = await db.product_normalized.aggregate(inventory_pipeline).to_list(length=1)
-    totals = agg[0] if agg else {}
+    counters = await get_kpi_counters()
+    total_products = counters["total_products"]
+    etsy_linked = counters["etsy_linked"]
+    shopify_linked = counters["shopify_linked"]
 
     return {
         "kpis": {
-            "ebay_total_inventory": int(totals.get("ebay_total_inventory", 0) or 0),
-            "etsy_total_inventory": int(totals.get("etsy_total_inventory", 0) or 0),
-            "shopify_total_inventory": int(totals.get("shopify_total_inventory", 0) or 0),
-            "total_products": int(total_products),
-            "etsy_linked_products": int(etsy_linked),
-            "shopify_linked_products": int(shopify_linked),
-            "etsy_missing_products": max(0, int(total_products) - int(etsy_linked)),
-            "shopify_missing_products": max(0, int(total_products) - int(shopify_linked)),
+            "ebay_total_inventory": counters["canonical_inventory"],
+            "etsy_total_inventory": counters["etsy_inventory"],
+            "shopify_total_inventory": counters["shopify_inventory"],
+            "total_products": total_products,
+            "etsy_linked_products": etsy_linked,
+            "shopify_linked_products": shopify_linked,
+            "etsy_missing_products": max(0, total_products - etsy_linked),
+            "shopify_missing_products": max(0, total_products - shopify_linked),
         }
     }
 
@@ -3374,6 +3188,29 @@ async def channel_compare_detail(sku: str):
     }
 
 
+def _bulk_selection_query(body: dict | None) -> dict[str, Any]:
+    """product_normalized filter for a bulk request: explicit ``skus`` or ``all`` unlinked items."""
+    request_skus = (body or {}).get("skus") if isinstance(body, dict) else None
+    request_all = (body or {}).get("all") if isinstance(body, dict) else None
+
+    if isinstance(request_skus, list) and request_skus:
+        return {
+            "quantity": {"$gte": 1},
+            "$or": [{"_id": {"$in": request_skus}}, {"sku": {"$in": request_skus}}],
+        }
+    if request_all:
+        # All unlinked items with qty >= 1
+        return {
+            "quantity": {"$gte": 1},
+            "$or": [
+                {"channels.etsy.listing_id": {"$exists": False}},
+                {"channels.etsy.listing_id": None},
+                {"channels.etsy.listing_id": ""},
+            ],
+        }
+    raise HTTPException(status_code=400, detail="Provide either 'skus' list or 'all': true in request body")
+
+
 @router.post("/etsy-publish/bulk/validate")
 async def etsy_publish_bulk_validate(
     body: dict | None = Body(default=None),
@@ -3391,47 +3228,8 @@ async def etsy_publish_bulk_validate(
     Returns validation results with per-item details including skip reasons.
     Uses async/await with rate limiting to respect OpenAI and Etsy API limits.
     """
-    request_skus = (body or {}).get("skus") if isinstance(body, dict) else None
-    request_all = (body or {}).get("all") if isinstance(body, dict) else None
-    
-    # Determine which SKUs to validate
-    if isinstance(request_skus, list) and request_skus:
-        # Validate specified SKUs
-        query = {
-            "quantity": {"$gte": 1},
-            "$or": [{"_id": {"$in": request_skus}}, {"sku": {"$in": request_skus}}],
-        }
-    elif request_all:
-        # Validate all unlinked items with qty >= 1
-        query = {
-            "quantity": {"$gte": 1},
-            "$or": [
-                {"channels.etsy.listing_id": {"$exists": False}},
-                {"channels.etsy.listing_id": None},
-                {"channels.etsy.listing_id": ""},
-            ],
-        }
-    else:
-        raise HTTPException(status_code=400, detail="Provide either 'skus' list or 'all': true in request body")
-    
-    projection = {
-        "_id": 1,
-        "sku": 1,
-        "title": 1,
-        "description": 1,
-        "price": 1,
-        "quantity": 1,
-        "tags": 1,
-        "images": 1,
-        "attributes": 1,
-        "category": 1,
-        "package": 1,
-        "shipping": 1,
-        "channels.etsy": 1,
-        "last_normalized_at": 1,
-    }
-    
-    docs = await db.product_normalized.find(query, projection).sort("last_normalized_at", -1).to_list(length=ETSY_BULK_MAX_ITEMS_PER_RUN)
+    query = _bulk_selection_query(body)
+    docs = await db.product_normalized.find(query, ETSY_BULK_DOC_PROJECTION).sort("last_normalized_at", -1).to_list(length=ETSY_BULK_MAX_ITEMS_PER_RUN)
     
     # Limit endpoint-level concurrency to keep the API responsive while validating.
     validation_results: list[dict[str, Any]] = []
@@ -3489,6 +3287,104 @@ async def etsy_publish_bulk_validate(
     return report
 
 
+async def _create_etsy_draft_from_optimizations(
+    *,
+    doc: dict,
+    sku: str,
+    optimizations: dict[str, Any],
+    shop_id: str,
+) -> dict[str, Any]:
+    """Create the Etsy draft for ``doc`` with optimizations from a validation run (no images)."""
+    etsy = get_etsy_client()
+
+    # Build detail and apply cached optimizations
+    detail = _build_etsy_publish_comparison(doc)
+    detail["etsy_optimized"]["title"] = optimizations.get("seo_title") or detail["etsy_optimized"].get("title")
+    detail["etsy_optimized"]["when_made"] = optimizations.get("when_made") or detail["etsy_optimized"].get("when_made")
+    detail["etsy_optimized"]["tags"] = optimizations.get("tags") or detail["etsy_optimized"].get("tags")
+    detail["etsy_optimized"]["taxonomy_id"] = optimizations.get("taxonomy_id") or detail["etsy_optimized"].get("taxonomy_id")
+
+    request_payload = _build_etsy_create_listing_payload(detail)
+    request_payload["readiness_state_id"] = await _resolve_etsy_readiness_state_id(
+        shop_id=str(shop_id),
+        payload=request_payload,
+    )
+
+    missing_fields = _get_missing_etsy_required_fields(request_payload)
+    if missing_fields:
+        return {
+            "sku": str(detail.get("sku") or sku),
+            "status": "failed",
+            "listing_id": None,
+            "error": "missing_required_fields",
+            "etsy_status_code": None,
+        }
+
+    form_data = _to_etsy_form_data(request_payload)
+    response = await etsy.create_draft_listing(shop_id, form_data)
+
+    raw_text = response.text
+    try:
+        etsy_response: Any = response.json() if raw_text else {}
+    except Exception:
+        etsy_response = raw_text
+
+    listing_id = None
+    if isinstance(etsy_response, dict):
+        listing_id = _to_int(etsy_response.get("listing_id"))
+
+    success = response.status_code < 300
+
+    await _record_etsy_draft_attempt(
+        sku=str(detail.get("sku") or sku),
+        shop_id=str(shop_id),
+        request_payload=request_payload,
+        request_form_data=form_data,
+        response_status_code=response.status_code,
+        response_payload=etsy_response,
+        ok=success,
+        linked_listing_id=listing_id,
+        error_code=None if success else "etsy_create_draft_failed",
+    )
+
+    error = None
+    if not success:
+        error = etsy_response.get("error", "unknown_error") if isinstance(etsy_response, dict) else str(etsy_response)
+    return {
+        "sku": str(detail.get("sku") or sku),
+        "status": "created" if success else "failed",
+        "listing_id": listing_id,
+        "error": error,
+        "etsy_status_code": response.status_code,
+    }
+
+
+async def _finish_bulk_created_listing(
+    *,
+    doc: dict,
+    sku: str,
+    shop_id: str,
+    listing_id: int,
+    uploaded: dict[int, int] | None = None,
+    on_uploaded: UploadHook | None = None,
+) -> dict[str, Any]:
+    """Upload the images not in ``uploaded`` (rank -> listing_image_id) and set the listing SKU and quantity."""
+    image_urls = doc.get("images") or []
+    images = await _upload_etsy_listing_images(
+        shop_id=shop_id,
+        listing_id=listing_id,
+        image_urls=image_urls,
+        uploaded=uploaded,
+        on_uploaded=on_uploaded,
+    )
+    await _update_etsy_listing_sku_for_review(
+        listing_id=listing_id,
+        new_sku=sku,
+        target_quantity=_to_int(doc.get("quantity")) or 0,
+    )
+    return images
+
+
 @router.post("/etsy-publish/bulk/create")
 async def etsy_publish_bulk_create(
     body: dict | None = Body(default=None),
@@ -3519,6 +3415,11 @@ async def etsy_publish_bulk_create(
     persisted_report = await _fetch_bulk_report(session_id=str(request_session_id) if request_session_id else None)
     active_session_id = (persisted_report or {}).get("session_id") or _ETSY_BULK_REPORT.get("session_id")
     validation_result = (persisted_report or {}).get("validation_result") or _ETSY_BULK_REPORT.get("validation_result") or {}
+    if validation_result.get("run_id"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Report belongs to bulk run {validation_result['run_id']}; use /etsy-publish/bulk/runs/{{run_id}}/create",
+        )
 
     # If no specific SKUs provided, use validated ready items from last validation
     if not isinstance(request_skus, list) or not request_skus:
@@ -3541,43 +3442,21 @@ async def etsy_publish_bulk_create(
     query = {
         "$or": [{"_id": {"$in": request_skus}}, {"sku": {"$in": request_skus}}],
     }
-    projection = {
-        "_id": 1,
-        "sku": 1,
-        "title": 1,
-        "description": 1,
-        "price": 1,
-        "quantity": 1,
-        "tags": 1,
-        "images": 1,
-        "attributes": 1,
-        "category": 1,
-        "package": 1,
-        "shipping": 1,
-        "channels.etsy": 1,
-        "last_normalized_at": 1,
-    }
     docs_dict = {}
-    async for doc in db.product_normalized.find(query, projection):
+    async for doc in db.product_normalized.find(query, ETSY_BULK_DOC_PROJECTION):
         sku = doc.get("_id") or doc.get("sku")
         docs_dict[str(sku)] = doc
     
-    # Create single HTTP client for reuse (more efficient than creating per request)
-    token = await get_valid_etsy_token()
-    api_key = _resolve_etsy_api_key()
-    if not api_key:
+    # Shared pooled client; it paces every call against Etsy's rate limits.
+    etsy = get_etsy_client()
+    if not etsy.api_key:
         raise HTTPException(status_code=400, detail="Missing Etsy API key")
+    await etsy.ensure_auth()
     
     shop_id = await _resolve_etsy_shop_id()
     if not shop_id:
         raise HTTPException(status_code=400, detail="Missing shop_id")
     
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": str(api_key),
-        "Accept": "application/json",
-    }
-    
     # Async function to create a single listing with Etsy rate limiting
     async def create_single_listing(sku: str, index: int) -> dict[str, Any]:
         doc = docs_dict.get(str(sku))
@@ -3602,92 +3481,17 @@ async def etsy_publish_bulk_create(
             }
         
         try:
-            # Build detail and apply cached optimizations
-            detail = _build_etsy_publish_comparison(doc)
-            
-            # Apply cached optimizations directly
-            detail["etsy_optimized"]["title"] = cached_opt.get("seo_title") or detail["etsy_optimized"].get("title")
-            detail["etsy_optimized"]["when_made"] = cached_opt.get("when_made") or detail["etsy_optimized"].get("when_made")
-            detail["etsy_optimized"]["tags"] = cached_opt.get("tags") or detail["etsy_optimized"].get("tags")
-            detail["etsy_optimized"]["taxonomy_id"] = cached_opt.get("taxonomy_id") or detail["etsy_optimized"].get("taxonomy_id")
-            
-            request_payload = _build_etsy_create_listing_payload(detail)
-            
-            request_payload["readiness_state_id"] = await _resolve_etsy_readiness_state_id(
-                shop_id=str(shop_id),
-                payload=request_payload,
-            )
-            
-            missing_fields = _get_missing_etsy_required_fields(request_payload)
-            if missing_fields:
-                return {
-                    "sku": str(detail.get("sku") or sku),
-                    "status": "failed",
-                    "listing_id": None,
-                    "error": "missing_required_fields",
-                    "etsy_status_code": None,
-                }
-            
-            form_data = _to_etsy_form_data(request_payload)
-            url = f"{ETSY_BASE_URL}/shops/{shop_id}/listings"
-            
-            # Rate limit Etsy API requests using semaphore
-            semaphore = _get_etsy_semaphore()
-            async with semaphore:
-                async with httpx.AsyncClient(timeout=45.0) as client:
-                    response = await client.post(url, headers=headers, data=form_data)
-                # Add delay after request to respect rate limit
-                await asyncio.sleep(ETSY_REQUEST_DELAY_SECONDS)
-            
-            raw_text = response.text
-            try:
-                etsy_response: Any = response.json() if raw_text else {}
-            except Exception:
-                etsy_response = raw_text
-            
-            listing_id = None
-            if isinstance(etsy_response, dict):
-                listing_id = _to_int(etsy_response.get("listing_id"))
-            
-            success = response.status_code < 300
-            
-            await _record_etsy_draft_attempt(
-                sku=str(detail.get("sku") or sku),
+            result = await _create_etsy_draft_from_optimizations(
+                doc=doc,
+                sku=str(sku),
+                optimizations=cached_opt,
                 shop_id=str(shop_id),
-                request_payload=request_payload,
-                request_form_data=form_data,
-                response_status_code=response.status_code,
-                response_payload=etsy_response,
-                ok=success,
-                linked_listing_id=listing_id,
-                error_code=None if success else "etsy_create_draft_failed",
             )
-            
-            if success and listing_id:
+            listing_id = result.get("listing_id")
+            if result["status"] == "created" and listing_id:
                 # Post-create: upload images and sync inventory
-                image_urls = doc.get("images") or []
-                if image_urls:
-                    await _upload_etsy_listing_images(
-                        shop_id=shop_id,
-                        listing_id=listing_id,
-                        image_urls=image_urls,
-                        headers=headers,
-                    )
-                
-                await _update_etsy_listing_sku_for_review(
-                    listing_id=listing_id,
-                    new_sku=str(detail.get("sku") or sku),
-                    target_quantity=_to_int(doc.get("quantity")) or 0,
-                    headers=headers,
-                )
-            
-            return {
-                "sku": str(detail.get("sku") or sku),
-                "status": "created" if success else "failed",
-                "listing_id": listing_id,
-                "error": None if success else etsy_response.get("error", "unknown_error"),
-                "etsy_status_code": response.status_code,
-            }
+                await _finish_bulk_created_listing(doc=doc, sku=result["sku"], shop_id=str(shop_id), listing_id=listing_id)
+            return result
         
         except Exception as exc:
             return {
@@ -3762,3 +3566,400 @@ async def etsy_publish_bulk_last_report(
             "creation_failed": creation_result.get("creation", {}).get("failed"),
         }
     }
+
+
+# Staged bulk publishing: the stage handlers below run inside
+# app.services.etsy_bulk_publish, which persists per-SKU state between stages.
+
+# Optimization fields kept in persisted run reports; full optimizations stay on the items.
+ETSY_BULK_REPORT_OPTIMIZATION_FIELDS = (
+    "seo_ai_used",
+    "tags_ai_used",
+    "taxonomy_ai_used",
+    "taxonomy_id",
+    "taxonomy_confidence",
+)
+
+
+async def _load_bulk_doc(sku: str) -> dict | None:
+    return await db.product_normalized.find_one(
+        {"$or": [{"_id": sku}, {"sku": sku}]},
+        ETSY_BULK_DOC_PROJECTION,
+    )
+
+
+def _bulk_stage_skip(skip: dict[str, Any]) -> dict[str, Any]:
+    update = {"stage": "skipped", "reason": skip.get("reason"), "detail": skip.get("detail")}
+    if skip.get("optimizations") is not None:
+        update["optimizations"] = skip["optimizations"]
+    return update
+
+
+async def _bulk_stage_validate(item: dict[str, Any], run: dict[str, Any]) -> dict[str, Any]:
+    doc = await _load_bulk_doc(item["sku"])
+    if not doc:
+        return {"stage": "skipped", "reason": "document_not_found", "detail": None}
+
+    skip = _bulk_precheck(doc)
+    if not skip:
+        # Shipping does not depend on the AI output, so check it before paying for optimization.
+        skip = _bulk_shipping_check(doc, _build_etsy_publish_comparison(doc))
+    if skip:
+        return _bulk_stage_skip(skip)
+    return {"stage": "optimize"}
+
+
+async def _bulk_stage_optimize(item: dict[str, Any], run: dict[str, Any]) -> dict[str, Any]:
+    doc = await _load_bulk_doc(item["sku"])
+    if not doc:
+        return {"stage": "skipped", "reason": "document_not_found", "detail": None}
+
+    detail = _build_etsy_publish_comparison(doc)
+    optimizations = await _generate_etsy_optimizations_for_bulk(detail)
+    skip = _bulk_optimized_checks(
+        doc,
+        detail,
+        optimizations,
+        min_taxonomy_confidence=float(
+            (run.get("options") or {}).get("min_taxonomy_confidence", ETSY_BULK_MIN_TAXONOMY_CONFIDENCE)
+        ),
+        check_shipping=False,
+    )
+    if skip:
+        return _bulk_stage_skip(skip)
+    return {"stage": "create", "optimizations": optimizations}
+
+
+async def _bulk_run_shop_id(run: dict[str, Any]) -> str:
+    shop_id = (run.get("options") or {}).get("shop_id") or await _resolve_etsy_shop_id()
+    if not shop_id:
+        raise ValueError("Missing shop_id")
+    return str(shop_id)
+
+
+def _bulk_run_created_listing_id(item: dict[str, Any], doc: dict) -> int | None:
+    """The product's linked listing_id if this run's create stage made it, else None.
+
+    The id is recorded on the item right after creation; a crash before that
+    is recognised by a successful draft attempt made after the stage started.
+    """
+    etsy_channel = (doc.get("channels") or {}).get("etsy") or {}
+    listing_id = _to_int(etsy_channel.get("listing_id"))
+    if not listing_id:
+        return None
+    if _to_int(item.get("listing_id")) == listing_id:
+        return listing_id
+
+    started_at = _ensure_utc(item.get("create_started_at"))
+    drafted_at = _ensure_utc(etsy_channel.get("last_create_draft_at"))
+    response = etsy_channel.get("last_create_draft_response")
+    if (
+        started_at is not None
+        and drafted_at is not None
+        and drafted_at >= started_at
+        and etsy_channel.get("last_create_draft_ok")
+        and isinstance(response, dict)
+        and _to_int(response.get("listing_id")) == listing_id
+    ):
+        return listing_id
+    return None
+
+
+async def _bulk_stage_create(item: dict[str, Any], run: dict[str, Any]) -> dict[str, Any]:
+    doc = await _load_bulk_doc(item["sku"])
+    if not doc:
+        return {"stage": "failed", "failed_stage": "create", "error": "document_not_found"}
+
+    created_listing_id = _bulk_run_created_listing_id(item, doc)
+    if created_listing_id:
+        # The draft was created before an interruption; only the images remain.
+        return {"stage": "images", "listing_id": created_listing_id}
+    existing_listing_id = ((doc.get("channels") or {}).get("etsy") or {}).get("listing_id")
+    if existing_listing_id:
+        # Linked since validation (e.g. an approved Excel match): leave that listing alone.
+        return _bulk_stage_skip(
+            {"reason": "already_linked_to_etsy", "detail": f"Existing listing_id: {existing_listing_id}"}
+        )
+
+    await get_etsy_client().ensure_auth()
+    # Kept from the first attempt so a draft made before a crash still counts as this run's.
+    await db[BULK_PUBLISH_ITEMS_COLLECTION].update_one(
+        {"_id": item["_id"], "create_started_at": None},
+        {"$set": {"create_started_at": _now_utc()}},
+    )
+    result = await _create_etsy_draft_from_optimizations(
+        doc=doc,
+        sku=str(item["sku"]),
+        optimizations=item.get("optimizations") or {},
+        shop_id=await _bulk_run_shop_id(run),
+    )
+    if result["status"] != "created" or not result.get("listing_id"):
+        return {
+            "stage": "failed",
+            "failed_stage": "create",
+            "error": result.get("error") or "etsy_create_draft_failed",
+            "etsy_status_code": result.get("etsy_status_code"),
+        }
+    await db[BULK_PUBLISH_ITEMS_COLLECTION].update_one(
+        {"_id": item["_id"]},
+        {"$set": {"listing_id": result["listing_id"]}},
+    )
+    return {"stage": "images", "listing_id": result["listing_id"], "etsy_status_code": result.get("etsy_status_code")}
+
+
+async def _bulk_stage_images(item: dict[str, Any], run: dict[str, Any]) -> dict[str, Any]:
+    doc = await _load_bulk_doc(item["sku"])
+    if not doc:
+        return {"stage": "failed", "failed_stage": "images", "error": "document_not_found"}
+
+    listing_id = int(item["listing_id"])
+    # Ranks a previous attempt recorded, kept only if the image is still on the listing.
+    on_listing = {
+        image.get("listing_image_id")
+        for image in await get_etsy_client().get_listing_images(listing_id)
+    }
+    uploaded = {
+        int(rank): int(listing_image_id)
+        for rank, listing_image_id in (item.get("uploaded_images") or {}).items()
+        if listing_image_id in on_listing
+    }
+
+    async def _record(entry: dict[str, Any]) -> None:
+        if entry.get("listing_image_id") is None:
+            return
+        await db[BULK_PUBLISH_ITEMS_COLLECTION].update_one(
+            {"_id": item["_id"]},
+            {"$set": {f"uploaded_images.{entry['rank']}": entry["listing_image_id"]}},
+        )
+
+    images = await _finish_bulk_created_listing(
+        doc=doc,
+        sku=str(item["sku"]),
+        shop_id=await _bulk_run_shop_id(run),
+        listing_id=listing_id,
+        uploaded=uploaded,
+        on_uploaded=_record,
+    )
+    return {
+        "stage": "created",
+        "images": {"uploaded": images.get("uploaded", 0) + len(uploaded), "failed": images.get("failed", 0)},
+    }
+
+
+def _bulk_item_validation_result(item: dict[str, Any]) -> dict[str, Any]:
+    skipped = item.get("stage") == "skipped" or (
+        item.get("stage") == "failed" and item.get("failed_stage") in ("validate", "optimize")
+    )
+    optimizations = item.get("optimizations")
+    if isinstance(optimizations, dict):
+        optimizations = {key: optimizations.get(key) for key in ETSY_BULK_REPORT_OPTIMIZATION_FIELDS}
+    return {
+        "sku": item.get("sku"),
+        "status": "skipped" if skipped else "ready",
+        "reason": item.get("reason") if skipped else None,
+        "detail": (item.get("detail") or item.get("error")) if skipped else None,
+        "optimizations": optimizations,
+    }
+
+
+async def _persist_bulk_publish_run_report(run: dict[str, Any]) -> None:
+    """Mirror a finished run into the bulk report collection so last-report covers it."""
+    run_id = str(run["_id"])
+    validation_results: list[dict[str, Any]] = []
+    creation_results: list[dict[str, Any]] = []
+    async for item in db[BULK_PUBLISH_ITEMS_COLLECTION].find({"run_id": run_id}).sort("position", 1):
+        validation_results.append(_bulk_item_validation_result(item))
+        if item.get("stage") == "created" or (
+            item.get("stage") == "failed" and item.get("failed_stage") in ("create", "images")
+        ):
+            creation_results.append(
+                {
+                    "sku": item.get("sku"),
+                    "status": "created" if item.get("stage") == "created" else "failed",
+                    "listing_id": item.get("listing_id"),
+                    "error": item.get("error"),
+                    "etsy_status_code": item.get("etsy_status_code"),
+                }
+            )
+
+    report = await _generate_bulk_report(validation_results)
+    report["run_id"] = run_id
+    await _persist_bulk_validation_report(
+        session_id=run_id,
+        validated_at=run.get("created_at") or _now_utc(),
+        validation_result=report,
+    )
+    if creation_results:
+        creation_report = await _generate_bulk_report([], creation_results)
+        creation_report["run_id"] = run_id
+        await _persist_bulk_creation_report(
+            session_id=run_id,
+            created_at=run.get("finished_at") or _now_utc(),
+            creation_result=creation_report,
+        )
+
+
+register_stage_handlers(
+    {
+        "validate": _bulk_stage_validate,
+        "optimize": _bulk_stage_optimize,
+        "create": _bulk_stage_create,
+        "images": _bulk_stage_images,
+    },
+    on_complete=_persist_bulk_publish_run_report,
+)
+
+
+def _bulk_run_limits(body: dict) -> dict[str, dict[str, float]]:
+    limits = body.get("limits") or {}
+    if not isinstance(limits, dict):
+        raise HTTPException(status_code=400, detail="'limits' must map stage -> {concurrency, per_minute}")
+    out: dict[str, dict[str, float]] = {}
+    for stage, values in limits.items():
+        if stage not in BULK_PUBLISH_STAGES or not isinstance(values, dict):
+            raise HTTPException(status_code=400, detail=f"Invalid limits for stage {stage!r}")
+        out[stage] = {
+            key: float(values[key])
+            for key in ("concurrency", "per_minute")
+            if values.get(key) is not None
+        }
+    return out
+
+
+def _bulk_run_response(request: Request, run_id: str, job: dict[str, Any], **extra: Any) -> dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "job_id": job["id"],
+        "job_status_url": str(request.url_for("sync_job_status", job_id=job["id"])),
+        "run_url": str(request.url_for("etsy_publish_bulk_run", run_id=run_id)),
+        "status": job["status"],
+        **extra,
+    }
+
+
+@router.post("/etsy-publish/bulk/runs")
+async def etsy_publish_bulk_start_run(
+    request: Request,
+    body: dict | None = Body(default=None),
+):
+    """
+    Start a background bulk publish run (validate -> optimize -> create -> images).
+
+    Request body:
+    {
+        "skus": ["sku1", ...],  // or "all": true for every unlinked item with qty >= 1
+        "create": false,  // true also creates drafts and uploads images; requires "confirmed": true
+        "min_taxonomy_confidence": 0.5,
+        "limits": {"optimize": {"concurrency": 3, "per_minute": 60}}  // optional per-stage overrides
+    }
+
+    There is no item cap. Progress is reported on the job status URL and per-SKU state is
+    kept in etsy_bulk_publish_items, so an interrupted run resumes where it stopped.
+    """
+    body = body if isinstance(body, dict) else {}
+    create = bool(body.get("create"))
+    if create and not body.get("confirmed"):
+        raise HTTPException(status_code=400, detail="Must set 'confirmed': true to create listings")
+    try:
+        min_taxonomy_confidence = float(body.get("min_taxonomy_confidence", ETSY_BULK_MIN_TAXONOMY_CONFIDENCE))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'min_taxonomy_confidence' must be a number")
+    if not 0.0 <= min_taxonomy_confidence <= 1.0:
+        raise HTTPException(status_code=400, detail="'min_taxonomy_confidence' must be between 0 and 1")
+    limits = _bulk_run_limits(body)
+
+    query = _bulk_selection_query(body)
+    skus = [
+        str(doc.get("_id") or doc.get("sku"))
+        async for doc in db.product_normalized.find(query, {"_id": 1, "sku": 1}).sort("last_normalized_at", -1)
+    ]
+    if not skus:
+        raise HTTPException(status_code=400, detail="No items match the request")
+
+    run = await create_bulk_publish_run(
+        skus,
+        create=create,
+        options={"min_taxonomy_confidence": min_taxonomy_confidence, "limits": limits},
+    )
+    job = await start_bulk_publish_job(run["_id"], limits=limits)
+    return _bulk_run_response(request, run["_id"], job, total=run["total"], create=create)
+
+
+@router.post("/etsy-publish/bulk/runs/{run_id}/create")
+async def etsy_publish_bulk_run_create(
+    request: Request,
+    run_id: str,
+    body: dict | None = Body(default=None),
+):
+    """Create drafts for a validation run's ready items (or only ``skus``); requires ``confirmed``."""
+    body = body if isinstance(body, dict) else {}
+    if not body.get("confirmed"):
+        raise HTTPException(status_code=400, detail="Must set 'confirmed': true to proceed")
+    run = await get_bulk_publish_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Bulk publish run not found")
+    if run.get("active_here"):
+        raise HTTPException(status_code=409, detail="Run is still being processed; create once it has finished")
+
+    skus = body.get("skus")
+    queued = await queue_ready_items_for_create(run_id, skus if isinstance(skus, list) and skus else None)
+    if not queued:
+        raise HTTPException(status_code=400, detail="No ready items to create in this run")
+
+    limits = (run.get("options") or {}).get("limits")
+    job = await start_bulk_publish_job(run_id, limits=limits)
+    return _bulk_run_response(request, run_id, job, queued=queued)
+
+
+@router.post("/etsy-publish/bulk/runs/{run_id}/resume")
+async def etsy_publish_bulk_run_resume(request: Request, run_id: str):
+    """Pick an interrupted run back up; leased items are retried once their lease expires."""
+    run = await get_bulk_publish_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Bulk publish run not found")
+    if run.get("active_here"):
+        raise HTTPException(status_code=409, detail="Run is already being processed")
+
+    limits = (run.get("options") or {}).get("limits")
+    job = await start_bulk_publish_job(run_id, limits=limits)
+    return _bulk_run_response(request, run_id, job)
+
+
+@router.get("/etsy-publish/bulk/runs/{run_id}", name="etsy_publish_bulk_run")
+async def etsy_publish_bulk_run(run_id: str):
+    """Run status with per-stage item counts."""
+    run = await get_bulk_publish_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Bulk publish run not found")
+    run["run_id"] = run.pop("_id")
+    return run
+
+
+@router.get("/etsy-publish/bulk/runs/{run_id}/items")
+async def etsy_publish_bulk_run_items(
+    run_id: str,
+    stage: str | None = Query(default=None, description="Only items in this stage or terminal state"),
+    include_optimizations: bool = Query(default=False),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=100, ge=1, le=500),
+):
+    """Per-SKU state of a run, in submission order."""
+    if stage is not None and stage not in BULK_PUBLISH_STAGES + BULK_PUBLISH_TERMINAL_STATES:
+        raise HTTPException(status_code=400, detail=f"Unknown stage {stage!r}")
+
+    sort = [("position", 1), ("_id", 1)]
+    query: dict[str, Any] = {"run_id": run_id}
+    if stage is not None:
+        query["stage"] = stage
+    projection = None if include_optimizations else {"optimizations": 0}
+    docs = await (
+        db[BULK_PUBLISH_ITEMS_COLLECTION]
+        .find(_page_query(query, cursor, sort), projection)
+        .sort(sort)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    docs, next_cursor = split_page(docs, sort, limit)
+    for doc in docs:
+        doc.pop("_id", None)
+    return {"run_id": run_id, "items": docs, "next_cursor": next_cursor}
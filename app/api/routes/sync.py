@@ -5,20 +5,32 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Request
 from app.services.sync_manager import full_sync
 from app.services.product_service import sync_ebay_raw_to_mongo
 from app.services.normalizer_service import normalize_from_raw
+from app.services.selective_renormalize import renormalize_for_rule_changes
+from app.services.raw_change_normalizer import get_raw_change_normalizer_status
 from app.services.shopify_sync import sync_to_shopify, sync_new_products_to_shopify, full_shopify_sync
 from app.shopify.purge_all_shopify_products import purge_all_shopify_products
 from app.shopify.client import ShopifyClient
 from app.config import settings
 from scripts.update_shopify_inventory_only import update_shopify_inventory_only
 from app.security.passkey import require_authorized
+from app.services.background_job_runner import get_background_job_runner_status
+from app.services.conflict_policy_cache import get_conflict_policy_cache
+from app.services.dashboard_pagination import InvalidCursor
+from app.services.drift_counters import recompute_kpi_counters
+from app.services.etsy_image_transfer import get_image_transfer_status
 from app.services.job_tracker import get_job, start_job
+from app.services.product_change_tailer import get_product_change_tailer_status
+from app.services.ttl_cache import get_ttl_cache_status
+from app.services.webhook_inbox import get_webhook_inbox_status
 from app.services.multichannel_sync_service import (
     enqueue_reconcile_jobs_for_sku,
     get_inventory_command_center,
     get_item_timeline,
+    get_channel_worker_metrics,
     get_sync_dashboard,
     get_conflict_policy,
     ingest_sale_event,
+    reconcile_catalog_drift,
     replay_unresolved_etsy_receipt_events,
     replay_failed_jobs,
     run_worker_batch,
@@ -140,10 +152,10 @@ async def sync_ebay_raw_prod(request: Request, background: bool = False):
     )
 
 @prod_router.post("/normalize-raw")
-async def normalize_raw_prod(request: Request, background: bool = False):
+async def normalize_raw_prod(request: Request, background: bool = False, force: bool = False):
     async def _run() -> dict:
         start = time.perf_counter()
-        result = await normalize_from_raw()
+        result = await normalize_from_raw(only_changed=not force)
         elapsed = time.perf_counter() - start
         return {
             "message": "Normalization completed (PROD)",
@@ -158,6 +170,36 @@ async def normalize_raw_prod(request: Request, background: bool = False):
         background=background,
     )
 
+@prod_router.post("/normalize-changed-rules")
+async def normalize_changed_rules_prod(
+    request: Request,
+    dry_run: bool = False,
+    force_full: bool = False,
+    background: bool = False,
+):
+    """Prod: renormalize only SKUs affected by mapping / meta-map / tag-key edits."""
+    async def _run() -> dict:
+        start = time.perf_counter()
+        result = await renormalize_for_rule_changes(dry_run=dry_run, force_full=force_full)
+        elapsed = time.perf_counter() - start
+        return {
+            "message": "Rule-change normalization completed (PROD)",
+            "result": result,
+            "elapsed_seconds": elapsed,
+        }
+
+    return await _maybe_background(
+        request=request,
+        name="PROD rule-change normalization",
+        fn=_run,
+        background=background,
+    )
+
+@prod_router.get("/normalize-stream/status")
+async def normalize_stream_status_prod():
+    """Prod: status of the product_raw change-stream normalizer in this process."""
+    return get_raw_change_normalizer_status()
+
 @prod_router.post("/sync-shopify")
 async def sync_shopify_prod(
     request: Request,
@@ -359,16 +401,19 @@ async def multichannel_command_center_prod(
     drift_only: bool = False,
     search: str | None = None,
     limit: int = 100,
-    skip: int = 0,
+    cursor: str | None = None,
 ):
-    """Inventory command-center rows (PROD)."""
-    return await get_inventory_command_center(
-        status=status,
-        drift_only=drift_only,
-        search=search,
-        limit=limit,
-        skip=skip,
-    )
+    """Inventory command-center rows (PROD). Pass ``next_cursor`` back as ``cursor`` for the next page."""
+    try:
+        return await get_inventory_command_center(
+            status=status,
+            drift_only=drift_only,
+            search=search,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @prod_router.get("/multichannel/timeline/{sku}")
@@ -396,6 +441,48 @@ async def multichannel_run_worker_prod(limit: int = 25):
     return await run_worker_batch(limit=limit)
 
 
+@prod_router.get("/multichannel/background-runner")
+async def multichannel_background_runner_prod():
+    """Status of the in-process background job runner (PROD)."""
+    return get_background_job_runner_status()
+
+
+@prod_router.get("/multichannel/webhook-inbox")
+async def multichannel_webhook_inbox_prod():
+    """Webhook inbox counts by status and oldest pending event (PROD)."""
+    return await get_webhook_inbox_status()
+
+
+@prod_router.get("/multichannel/product-change-tailer")
+async def multichannel_product_change_tailer_prod():
+    """Status of the tailer maintaining report_items_view and drift counters (PROD)."""
+    return get_product_change_tailer_status()
+
+
+@prod_router.get("/multichannel/policy-cache")
+async def multichannel_policy_cache_prod():
+    """Status of the in-process conflict policy cache (PROD)."""
+    return get_conflict_policy_cache().status()
+
+
+@prod_router.get("/multichannel/caches")
+async def multichannel_caches_prod():
+    """Hit/miss stats of the shared TTL caches (live KPIs, Etsy reference data) (PROD)."""
+    return get_ttl_cache_status()
+
+
+@prod_router.get("/multichannel/image-transfer")
+async def multichannel_image_transfer_prod():
+    """Etsy listing image cache and upload stats (PROD)."""
+    return get_image_transfer_status()
+
+
+@prod_router.get("/multichannel/worker-metrics")
+async def multichannel_worker_metrics_prod():
+    """Per-channel worker throughput and queue age (PROD)."""
+    return await get_channel_worker_metrics()
+
+
 @prod_router.post("/multichannel/replay-failed")
 async def multichannel_replay_failed_prod(payload: dict = Body(None)):
     """Replay failed multichannel jobs by filters (PROD)."""
@@ -418,6 +505,43 @@ async def multichannel_replay_unresolved_etsy_receipts_prod(payload: dict = Body
     )
 
 
+@prod_router.post("/multichannel/reconcile-catalog")
+async def multichannel_reconcile_catalog_prod(
+    request: Request,
+    payload: dict = Body(None),
+    dry_run: bool = False,
+    background: bool = True,
+):
+    """Queue drift-correcting jobs for every linked channel in the catalog (PROD)."""
+    body = payload or {}
+    channels = body.get("channels")
+
+    async def _run() -> dict:
+        return await reconcile_catalog_drift(
+            target_channels=channels if isinstance(channels, list) else None,
+            reason=str(body.get("reason") or "catalog_reconcile"),
+            dry_run=dry_run,
+        )
+
+    return await _maybe_background(
+        request=request,
+        name="PROD catalog reconcile",
+        fn=_run,
+        background=background,
+    )
+
+
+@prod_router.post("/multichannel/kpi-counters/recompute")
+async def multichannel_recompute_kpi_counters_prod(request: Request, background: bool = True):
+    """Recompute drift on every product and reset kpi_counters from it (PROD)."""
+    return await _maybe_background(
+        request=request,
+        name="PROD KPI counters recompute",
+        fn=recompute_kpi_counters,
+        background=background,
+    )
+
+
 @prod_router.post("/multichannel/reconcile/{sku}")
 async def multichannel_reconcile_sku_prod(sku: str, payload: dict = Body(None)):
     """Queue reconciliation jobs for one SKU (PROD)."""
@@ -1,5 +1,4 @@
 import hashlib
-import asyncio
 import json
 import logging
 import xml.etree.ElementTree as ET
@@ -8,9 +7,9 @@ from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 
 from app.database.mongo import db
-from app.shopify.client import ShopifyClient
-from app.services.ebay_webhook_service import handle_ebay_order_webhook, handle_ebay_item_listed
-from app.services.etsy_webhook_service import handle_etsy_event, verify_etsy_signature
+from app.services.background_job_runner import WEBHOOK_INBOX_QUEUE, wake_background_jobs
+from app.services.etsy_webhook_service import verify_etsy_signature
+from app.services.webhook_inbox import INBOX_COLLECTIONS, new_inbox_fields
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -133,31 +132,29 @@ async def ebay_order_webhook(request: Request, make_unavailable: bool = True):
   event_type = payload.get("_event_type", "order")
   print(f"Received eBay webhook | event_type={event_type}")
 
-  # Persist every incoming notification to MongoDB for auditing / replay
+  # The inbox document is the unit of work: the background runner claims it,
+  # runs the ItemListed/order handler and retries on failure.
   try:
-    await db.ebay_notification_events.insert_one({
+    insert_result = await db[INBOX_COLLECTIONS["ebay"]].insert_one({
       "event_type": event_type,
       "payload": payload,
+      "options": {"make_unavailable": make_unavailable},
       "raw_body": raw_body.decode("utf-8", errors="replace"),
       "content_type": content_type,
-      "status": "received",
-      "received_at": datetime.now(timezone.utc),
+      **new_inbox_fields(),
     })
-  except Exception as log_err:
-    print(f"Warning: failed to log eBay notification to Mongo: {log_err}")
-
-  shopify_client = ShopifyClient()
-
-  try:
-    if event_type == "ItemListed":
-      asyncio.create_task(handle_ebay_item_listed(payload))
-    else:
-      asyncio.create_task(handle_ebay_order_webhook(payload, shopify_client, make_unavailable=make_unavailable))
   except Exception as e:
-    print("Failed to schedule webhook processing:", e)
+    logger.exception("Failed to store eBay notification in the webhook inbox")
+    # Non-2xx makes eBay redeliver instead of the event being dropped.
     return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
-  return JSONResponse({"ok": True, "queued": True, "event_type": event_type})
+  wake_background_jobs(WEBHOOK_INBOX_QUEUE)
+  return JSONResponse({
+    "ok": True,
+    "queued": True,
+    "event_type": event_type,
+    "inbox_id": str(insert_result.inserted_id),
+  })
 
 
 @router.post("/etsy/events")
@@ -183,10 +180,8 @@ async def etsy_events_webhook(request: Request):
     "content_type": request.headers.get("content-type"),
     "headers": dict(request.headers),
     "raw_body": raw_body.decode("utf-8", errors="replace"),
-    "status": "received",
     "received_at": datetime.now(timezone.utc),
   }
-  insert_result = await db.etsy_notification_events.insert_one(event_doc)
 
   # Temporary diagnostic logging to confirm Etsy signature input fields.
   logger.warning(
@@ -210,54 +205,46 @@ async def etsy_events_webhook(request: Request):
       webhook_timestamp,
       webhook_signature,
     )
-    await db.etsy_notification_events.update_one(
-      {"_id": insert_result.inserted_id},
-      {
-        "$set": {
-          "status": "invalid_signature",
-          "reason": reason,
-          "processed_at": datetime.now(timezone.utc),
-        }
-      },
-    )
+    await db[INBOX_COLLECTIONS["etsy"]].insert_one({
+      **event_doc,
+      "status": "invalid_signature",
+      "reason": reason,
+      "processed_at": datetime.now(timezone.utc),
+    })
     return JSONResponse({"ok": False, "error": "invalid_signature", "reason": reason}, status_code=401)
 
   try:
-    payload = await request.json()
+    payload = json.loads(raw_body)
   except Exception:
-    await db.etsy_notification_events.update_one(
-      {"_id": insert_result.inserted_id},
-      {
-        "$set": {
-          "status": "invalid_json",
-          "processed_at": datetime.now(timezone.utc),
-        }
-      },
-    )
+    await db[INBOX_COLLECTIONS["etsy"]].insert_one({
+      **event_doc,
+      "status": "invalid_json",
+      "processed_at": datetime.now(timezone.utc),
+    })
     return JSONResponse({"ok": False, "error": "invalid_json"}, status_code=400)
 
-  result = await handle_etsy_event(
-    payload=payload,
-    raw_body=raw_body.decode("utf-8", errors="replace"),
-    webhook_id=webhook_id,
-    webhook_timestamp=webhook_timestamp,
-  )
-
-  await db.etsy_notification_events.update_one(
-    {"_id": insert_result.inserted_id},
+  # Verified events go to the inbox; handle_etsy_event runs in the background runner.
+  insert_result = await db[INBOX_COLLECTIONS["etsy"]].insert_one({
+    **event_doc,
+    "payload": payload,
+    "event_type": payload.get("event_type"),
+    "shop_id": payload.get("shop_id"),
+    "resource_url": payload.get("resource_url"),
+    **new_inbox_fields(event_doc["received_at"]),
+  })
+  wake_background_jobs(WEBHOOK_INBOX_QUEUE)
+
+  return JSONResponse(
     {
-      "$set": {
-        "status": "processed",
-        "event_type": payload.get("event_type"),
-        "shop_id": payload.get("shop_id"),
-        "resource_url": payload.get("resource_url"),
-        "processed_at": datetime.now(timezone.utc),
-      }
+      "ok": True,
+      "queued": True,
+      "event_type": payload.get("event_type"),
+      "shop_id": payload.get("shop_id"),
+      "inbox_id": str(insert_result.inserted_id),
     },
+    status_code=200,
   )
 
-  return JSONResponse(result, status_code=200)
-
 
 @router.get("/ebay/callback")
 async def ebay_auth_callback(request: Request):
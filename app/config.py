@@ -23,6 +23,13 @@ class Settings(BaseSettings):
 
     OPENAI_API_KEY: str | None = None
 
+    # Batched LLM collection-key classification (normalizer fallback when the
+    # mapping file has no match). Budgets are per minute across the process.
+    OPENAI_COLLECTION_KEY_BATCH_SIZE: int = 20
+    OPENAI_COLLECTION_KEY_CONCURRENCY: int = 4
+    OPENAI_COLLECTION_KEY_RPM: int = 60
+    OPENAI_COLLECTION_KEY_TPM: int = 200000
+
     # Etsy OAuth (optional until Etsy integration is enabled)
     ETSY_CLIENT_ID: str | None = None
     ETSY_CLIENT_SECRET: str | None = None
@@ -41,6 +48,56 @@ class Settings(BaseSettings):
     ETSY_RETURN_POLICY_ID: int | None = None
     ETSY_READINESS_STATE_ID: int | None = None
 
+    # Shared Etsy API client (app/etsy/client.py). Pacing is lowered further
+    # if Etsy reports a smaller x-limit-per-second for the key.
+    ETSY_API_RATE_PER_SECOND: int = 8
+    ETSY_API_MAX_CONNECTIONS: int = 20
+    ETSY_API_MAX_RETRIES: int = 3
+
+    # Listing image transfer (app/services/etsy_image_transfer.py): source images
+    # are cached on disk by content hash and shared across drafts.
+    ETSY_IMAGE_CACHE_DIR: str = "cache/etsy_images"
+    ETSY_IMAGE_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    ETSY_IMAGE_DOWNLOAD_CONCURRENCY: int = 8
+    ETSY_IMAGE_UPLOAD_CONCURRENCY: int = 3
+
+    # Multichannel job worker: per target channel concurrency and pushes per second.
+    MULTICHANNEL_EBAY_CONCURRENCY: int = 2
+    MULTICHANNEL_EBAY_RATE_PER_SECOND: int = 4
+    MULTICHANNEL_ETSY_CONCURRENCY: int = 3
+    MULTICHANNEL_ETSY_RATE_PER_SECOND: int = 4
+    MULTICHANNEL_SHOPIFY_CONCURRENCY: int = 2
+    MULTICHANNEL_SHOPIFY_RATE_PER_SECOND: int = 2
+
+    # Always-on runner for channel_sync_jobs and ebay_listing_sync_queue. Polls
+    # adaptively between the min/max interval; disable when running
+    # scripts/run_background_jobs.py as a separate worker.
+    BACKGROUND_JOB_RUNNER_ENABLED: bool = True
+    BACKGROUND_JOB_BATCH_SIZE: int = 50
+    BACKGROUND_JOB_POLL_MIN_SECONDS: float = 1.0
+    BACKGROUND_JOB_POLL_MAX_SECONDS: float = 30.0
+    # Webhook inbox (ebay/etsy_notification_events): notifications processed at once.
+    WEBHOOK_INBOX_CONCURRENCY: int = 4
+
+    # Process-local copy of inventory_conflict_policies, kept current by a
+    # change stream when available and reloaded every TTL seconds regardless.
+    CONFLICT_POLICY_CACHE_ENABLED: bool = True
+    CONFLICT_POLICY_CACHE_TTL_SECONDS: float = 300.0
+
+    # Change-stream driven normalization of product_raw writes (needs a replica set).
+    RAW_CHANGE_NORMALIZER_ENABLED: bool = False
+    RAW_CHANGE_NORMALIZER_DEBOUNCE_SECONDS: float = 2.0
+    RAW_CHANGE_NORMALIZER_MAX_WAIT_SECONDS: float = 30.0
+    RAW_CHANGE_NORMALIZER_MAX_BATCH: int = 200
+
+    # One change-stream tailer on product_raw/product_normalized keeps
+    # report_items_view and the drift/KPI counters current; without change
+    # streams both are rebuilt on this interval.
+    PRODUCT_CHANGE_TAILER_ENABLED: bool = True
+    PRODUCT_CHANGE_TAILER_REBUILD_SECONDS: float = 900.0
+    # Restart staged Etsy bulk publish runs left unfinished by a crash or redeploy.
+    ETSY_BULK_PUBLISH_RESUME_ON_STARTUP: bool = True
+
     # Minimal UI/API protection for non-public deployments.
     # When set, /admin, /reporting and related APIs require a passkey.
     ADMIN_PASSKEY: str | None = None
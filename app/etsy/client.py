@@ -0,0 +1,480 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO
+
+import httpx
+from aiolimiter import AsyncLimiter
+
+from app.config import settings
+from app.services.etsy_auth_service import get_valid_token_info
+
+logger = logging.getLogger(__name__)
+
+ETSY_BASE_URL = "https://openapi.etsy.com/v3/application"
+DEFAULT_TIMEOUT_SECONDS = 45.0
+# Stored tokens are refreshed in the background this long before expiry ...
+TOKEN_REFRESH_AHEAD_SECONDS = 600
+# ... and synchronously once they are this close to it.
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+# Tokens with unknown expiry (ETSY_TOKEN env fallback) are re-read this often.
+TOKEN_RECHECK_SECONDS = 300
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+PAGE_SIZE = 100
+
+
+class EtsyAPIError(Exception):
+    """Non-2xx response from a typed helper; keeps the status and decoded body."""
+
+    def __init__(self, status_code: int, detail: Any, *, method: str = "", path: str = "") -> None:
+        self.status_code = status_code
+        self.detail = detail
+        self.method = method
+        self.path = path
+        super().__init__(f"etsy_api_error status={status_code} {method} {path}".strip())
+
+
+def resolve_etsy_api_key() -> str | None:
+    """Etsy wants ``keystring:shared_secret`` when both are configured."""
+    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
+        return f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
+    return settings.ETSY_CLIENT_ID
+
+
+def response_body(response: httpx.Response) -> Any:
+    """Decoded JSON body, the raw text when it is not JSON, {} when empty."""
+    if not response.content:
+        return {}
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _header_int(headers: httpx.Headers, name: str) -> int | None:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class _EtsyRateLimiter:
+    """Per-second pacing plus the QPS/QPD state Etsy reports on each response.
+
+    Pacing starts at ETSY_API_RATE_PER_SECOND and is lowered to the key's
+    x-limit-per-second when that is smaller. An exhausted second
+    (x-remaining-this-second: 0) or a 429 pauses every caller, not just the
+    request that hit it.
+    """
+
+    def __init__(self, per_second: int) -> None:
+        self.per_second = max(1, int(per_second))
+        self._limiter = AsyncLimiter(self.per_second, 1)
+        self._paused_until = 0.0
+        self.limit_per_day: int | None = None
+        self.remaining_today: int | None = None
+        self.observed_at: datetime | None = None
+
+    async def acquire(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._limiter.acquire()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+    def observe(self, headers: httpx.Headers) -> None:
+        limit_per_second = _header_int(headers, "x-limit-per-second")
+        if limit_per_second and limit_per_second < self.per_second:
+            logger.info("Etsy API key allows %s req/s; lowering client pacing", limit_per_second)
+            self.per_second = limit_per_second
+            self._limiter = AsyncLimiter(limit_per_second, 1)
+
+        if _header_int(headers, "x-remaining-this-second") == 0:
+            self.pause(1.0)
+
+        limit_per_day = _header_int(headers, "x-limit-per-day")
+        remaining_today = _header_int(headers, "x-remaining-today")
+        if limit_per_day is not None:
+            self.limit_per_day = limit_per_day
+        if remaining_today is not None:
+            if remaining_today == 0 and self.remaining_today != 0:
+                logger.warning("Etsy daily request quota exhausted (limit=%s)", self.limit_per_day)
+            self.remaining_today = remaining_today
+            self.observed_at = datetime.now(timezone.utc)
+
+    @property
+    def daily_quota_exhausted(self) -> bool:
+        return self.remaining_today is not None and self.remaining_today <= 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "per_second": self.per_second,
+            "limit_per_day": self.limit_per_day,
+            "remaining_today": self.remaining_today,
+            "observed_at": self.observed_at,
+        }
+
+
+class _TokenCache:
+    """In-memory copy of the OAuth token so requests do not hit Mongo each time."""
+
+    def __init__(self, pinned_token: str | None = None) -> None:
+        # A pinned token (e.g. a script's --token) is used as-is and never refreshed.
+        self.pinned_token = pinned_token
+        self.token: str | None = pinned_token
+        self.expires_at: datetime | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+        self._refresh_not_before = 0.0
+
+    def _usable(self, now: datetime) -> bool:
+        if not self.token:
+            return False
+        if self.expires_at is None:
+            return time.monotonic() - self._loaded_at < TOKEN_RECHECK_SECONDS
+        return now < self.expires_at - timedelta(seconds=TOKEN_EXPIRY_MARGIN_SECONDS)
+
+    def _due_for_refresh(self, now: datetime) -> bool:
+        return self.expires_at is not None and now >= self.expires_at - timedelta(seconds=TOKEN_REFRESH_AHEAD_SECONDS)
+
+    def _store(self, token: str, expires_at: datetime | None) -> None:
+        self.token = token
+        self.expires_at = expires_at
+        self._loaded_at = time.monotonic()
+
+    async def get(self, *, force_refresh: bool = False) -> str:
+        if self.pinned_token:
+            return self.pinned_token
+        now = datetime.now(timezone.utc)
+        if not force_refresh and self._usable(now):
+            if self._due_for_refresh(now):
+                self._refresh_ahead()
+            return self.token  # type: ignore[return-value]
+
+        async with self._lock:
+            if not force_refresh and self._usable(datetime.now(timezone.utc)):
+                return self.token  # type: ignore[return-value]
+            token, expires_at = await get_valid_token_info(force_refresh=force_refresh)
+            self._store(token, expires_at)
+            return token
+
+    def _refresh_ahead(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.monotonic() < self._refresh_not_before:
+            return
+
+        async def _run() -> None:
+            try:
+                async with self._lock:
+                    token, expires_at = await get_valid_token_info(
+                        refresh_margin=timedelta(seconds=TOKEN_REFRESH_AHEAD_SECONDS)
+                    )
+                    self._store(token, expires_at)
+            except Exception as exc:
+                # The current token is still valid; try again a little later.
+                self._refresh_not_before = time.monotonic() + RETRY_MAX_SECONDS
+                logger.warning("Etsy token refresh-ahead failed: %s", exc)
+
+        self._refresh_task = asyncio.create_task(_run())
+
+    def invalidate(self) -> None:
+        self.token = None
+        self.expires_at = None
+
+
+class EtsyClient:
+    """Shared Etsy Open API v3 client.
+
+    One pooled httpx.AsyncClient, one cached OAuth token and one rate limiter
+    per process. ``request`` returns the raw httpx.Response after pacing,
+    401 token refresh and 429 retries; the helpers below decode the JSON and
+    raise EtsyAPIError on non-2xx responses.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_key: str | None = None,
+        access_token: str | None = None,
+        rate_per_second: int | None = None,
+        max_connections: int | None = None,
+        max_retries: int | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        self.api_key = api_key or resolve_etsy_api_key()
+        self.max_retries = max(0, int(settings.ETSY_API_MAX_RETRIES if max_retries is None else max_retries))
+        self.limiter = _EtsyRateLimiter(rate_per_second or settings.ETSY_API_RATE_PER_SECOND)
+        self.tokens = _TokenCache(access_token)
+        self._max_connections = max(1, int(max_connections or settings.ETSY_API_MAX_CONNECTIONS))
+        self._timeout = timeout
+        self._http: httpx.AsyncClient | None = None
+        self.stats = {"requests": 0, "retries_429": 0, "token_refreshes_401": 0, "errors": 0}
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=ETSY_BASE_URL,
+                timeout=self._timeout,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                ),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    def invalidate_token(self) -> None:
+        self.tokens.invalidate()
+
+    async def ensure_auth(self, *, auth: bool = True) -> None:
+        """Raise ValueError when the API key (or OAuth token) is unavailable."""
+        if not self.api_key:
+            raise ValueError("Missing Etsy API key")
+        if auth:
+            await self.tokens.get()
+
+    async def _headers(self, *, auth: bool, force_refresh: bool = False) -> dict[str, str]:
+        if not self.api_key:
+            raise ValueError("Missing Etsy API key")
+        headers = {"x-api-key": self.api_key, "Accept": "application/json"}
+        if auth:
+            token = await self.tokens.get(force_refresh=force_refresh)
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        try:
+            delay = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            delay = None
+        if delay is None:
+            delay = RETRY_BASE_SECONDS * (2 ** attempt)
+        return min(RETRY_MAX_SECONDS, max(0.0, delay))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json: Any = None,
+        data: dict[str, Any] | None = None,
+        files: dict[str, Any] | None = None,
+        content: str | bytes | None = None,
+        auth: bool = True,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        """Send one Etsy API call. ``path`` is relative to /v3/application."""
+        headers = await self._headers(auth=auth)
+        refreshed = False
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            self.stats["requests"] += 1
+            try:
+                response = await self.http.request(
+                    method,
+                    path,
+                    params=params,
+                    json=json,
+                    data=data,
+                    files=files,
+                    content=content,
+                    headers=headers,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # Nothing reached Etsy, so even a POST is safe to resend.
+                self.stats["errors"] += 1
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(RETRY_BASE_SECONDS * (2 ** attempt))
+                attempt += 1
+                continue
+
+            self.limiter.observe(response.headers)
+
+            if response.status_code == 401 and auth and not refreshed and not self.tokens.pinned_token:
+                refreshed = True
+                self.stats["token_refreshes_401"] += 1
+                self.tokens.invalidate()
+                try:
+                    headers = await self._headers(auth=True, force_refresh=True)
+                except ValueError as exc:
+                    logger.warning("Etsy token refresh after 401 failed: %s", exc)
+                    return response
+                continue
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                if self.limiter.daily_quota_exhausted and "retry-after" not in response.headers:
+                    return response
+                delay = self._retry_delay(response, attempt)
+                self.stats["retries_429"] += 1
+                self.limiter.pause(delay)
+                logger.info("Etsy 429 on %s %s; retrying in %.1fs", method, path, delay)
+                attempt += 1
+                continue
+
+            return response
+
+    async def _json(self, method: str, path: str, **kwargs: Any) -> Any:
+        response = await self.request(method, path, **kwargs)
+        body = response_body(response)
+        if response.status_code >= 300:
+            raise EtsyAPIError(response.status_code, body, method=method, path=path)
+        return body
+
+    async def _paginate(self, path: str, params: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = await self._json("GET", path, params={**(params or {}), "limit": PAGE_SIZE, "offset": offset})
+            results = (page or {}).get("results") or []
+            rows.extend(row for row in results if isinstance(row, dict))
+            if len(results) < PAGE_SIZE:
+                return rows
+            offset += PAGE_SIZE
+
+    # -- listings -----------------------------------------------------------
+
+    async def get_shop_listings(
+        self,
+        shop_id: str | int,
+        *,
+        state: str = "active",
+        limit: int = PAGE_SIZE,
+        offset: int = 0,
+        params: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        return await self._json(
+            "GET",
+            f"/shops/{shop_id}/listings",
+            params={**(params or {}), "state": state, "limit": limit, "offset": offset},
+        )
+
+    async def count_shop_listings(self, shop_id: str | int, *, state: str) -> int:
+        return len(await self._paginate(f"/shops/{shop_id}/listings", {"state": state}))
+
+    async def get_listings_batch(
+        self,
+        listing_ids: list[int | str],
+        *,
+        includes: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        params: dict[str, Any] = {"listing_ids": ",".join(str(lid) for lid in listing_ids)}
+        if includes:
+            params["includes"] = ",".join(includes)
+        body = await self._json("GET", "/listings/batch", params=params)
+        return [row for row in (body or {}).get("results") or [] if isinstance(row, dict)]
+
+    async def create_draft_listing(self, shop_id: str | int, form_data: dict[str, Any]) -> httpx.Response:
+        """POST a draft listing; returns the response so callers can record failures verbatim."""
+        return await self.request("POST", f"/shops/{shop_id}/listings", data=form_data)
+
+    # -- inventory ----------------------------------------------------------
+
+    async def get_listing_inventory(self, listing_id: int | str, *, show_deleted: bool = True) -> dict[str, Any]:
+        params = {"show_deleted": "true"} if show_deleted else None
+        return await self._json("GET", f"/listings/{listing_id}/inventory", params=params)
+
+    async def update_listing_inventory(self, listing_id: int | str, payload: dict[str, Any]) -> dict[str, Any]:
+        return await self._json("PUT", f"/listings/{listing_id}/inventory", json=payload)
+
+    # -- images -------------------------------------------------------------
+
+    async def get_listing_images(self, listing_id: int | str) -> list[dict[str, Any]]:
+        body = await self._json("GET", f"/listings/{listing_id}/images")
+        return [row for row in (body or {}).get("results") or [] if isinstance(row, dict)]
+
+    async def upload_listing_image(
+        self,
+        shop_id: str | int,
+        listing_id: int | str,
+        *,
+        filename: str,
+        content: bytes | BinaryIO,
+        content_type: str,
+        rank: int | None = None,
+    ) -> httpx.Response:
+        """``content`` may be an open binary file; httpx streams it and rewinds it on retries."""
+        data = {"rank": str(rank)} if rank is not None else None
+        return await self.request(
+            "POST",
+            f"/shops/{shop_id}/listings/{listing_id}/images",
+            files={"image": (filename, content, content_type)},
+            data=data,
+            timeout=60.0,
+        )
+
+    async def rerank_listing_image(
+        self,
+        shop_id: str | int,
+        listing_id: int | str,
+        *,
+        listing_image_id: int,
+        rank: int,
+    ) -> Any:
+        """Move an image already on the listing to ``rank``."""
+        return await self._json(
+            "POST",
+            f"/shops/{shop_id}/listings/{listing_id}/images",
+            data={"listing_image_id": str(listing_image_id), "rank": str(rank)},
+        )
+
+    # -- receipts -----------------------------------------------------------
+
+    async def get_receipt_transactions(self, shop_id: str | int, receipt_id: str | int) -> list[dict[str, Any]]:
+        return await self._paginate(f"/shops/{shop_id}/receipts/{receipt_id}/transactions")
+
+    # -- shop metadata ------------------------------------------------------
+
+    async def get_buyer_taxonomy_nodes(self) -> list[dict[str, Any]]:
+        body = await self._json("GET", "/buyer-taxonomy/nodes", auth=False)
+        return (body or {}).get("results") or []
+
+    async def get_readiness_state_definitions(self, shop_id: str | int) -> list[dict[str, Any]]:
+        body = await self._json("GET", f"/shops/{shop_id}/readiness-state-definitions")
+        return (body or {}).get("results") or []
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "api_key_configured": bool(self.api_key),
+            "token_cached": bool(self.tokens.token),
+            "token_expires_at": self.tokens.expires_at,
+            "rate_limit": self.limiter.snapshot(),
+            "stats": dict(self.stats),
+        }
+
+
+_client: EtsyClient | None = None
+
+
+def get_etsy_client() -> EtsyClient:
+    global _client
+    if _client is None:
+        _client = EtsyClient()
+    return _client
+
+
+async def close_etsy_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
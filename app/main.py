@@ -8,7 +8,15 @@ from app.api.router import api_router
 from app.services.scheduler import start_scheduler
 from app.security.passkey import is_authorized, passkey_enabled
 from app.database.mongo import close_mongo_client
+from app.etsy.client import close_etsy_client
 from app.services.etsy_auth_service import get_token_status as get_etsy_token_status
+from app.config import settings
+from app.services.raw_change_normalizer import start_raw_change_normalizer, stop_raw_change_normalizer
+from app.services.background_job_runner import start_background_job_runner, stop_background_job_runner
+from app.services.conflict_policy_cache import start_conflict_policy_cache, stop_conflict_policy_cache
+from app.services.product_change_tailer import start_product_change_tailer, stop_product_change_tailer
+from app.services.etsy_bulk_publish import resume_bulk_publish_runs
+from app.services.etsy_image_transfer import close_image_transfer_client
 
 # Create logs directory if it doesn't exist
 logs_dir = Path("logs")
@@ -99,6 +107,22 @@ async def check_etsy_token_health():
     except Exception as exc:
         _startup_logger.warning("Etsy token health check failed at startup: %s", exc)
 
+@app.on_event("startup")
+async def start_background_workers():
+    if settings.CONFLICT_POLICY_CACHE_ENABLED:
+        start_conflict_policy_cache()
+    if settings.RAW_CHANGE_NORMALIZER_ENABLED:
+        start_raw_change_normalizer()
+    if settings.BACKGROUND_JOB_RUNNER_ENABLED:
+        start_background_job_runner()
+    if settings.PRODUCT_CHANGE_TAILER_ENABLED:
+        start_product_change_tailer()
+    if settings.ETSY_BULK_PUBLISH_RESUME_ON_STARTUP:
+        try:
+            await resume_bulk_publish_runs()
+        except Exception as exc:
+            _startup_logger.warning("Etsy bulk publish resume failed at startup: %s", exc)
+
 app.include_router(api_router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -106,6 +130,12 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await stop_raw_change_normalizer()
+    await stop_background_job_runner()
+    await stop_conflict_policy_cache()
+    await stop_product_change_tailer()
+    await close_etsy_client()
+    await close_image_transfer_client()
     close_mongo_client()
 
 @app.get("/", response_class=FileResponse)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+from app.services.dashboard_pagination import ensure_dashboard_pagination_indexes
+from app.services.ebay_webhook_service import ensure_listing_sync_indexes, process_ebay_listing_sync_queue
+from app.services.etsy_image_cache import ensure_etsy_image_cache_indexes, prefetch_workbook_images
+from app.services.multichannel_sync_service import ensure_job_indexes, run_worker_batch
+from app.services.search_index import ensure_search_indexes
+from app.services.webhook_inbox import ensure_webhook_inbox_indexes, process_webhook_inbox
+
+logger = logging.getLogger(__name__)
+
+MULTICHANNEL_QUEUE = "multichannel"
+LISTING_SYNC_QUEUE = "ebay_listing_sync"
+WEBHOOK_INBOX_QUEUE = "webhook_inbox"
+ETSY_IMAGE_PREFETCH_QUEUE = "etsy_image_prefetch"
+
+
+class BackgroundJobRunner:
+    """Keep channel_sync_jobs, ebay_listing_sync_queue, the webhook inbox and Etsy image prefetch moving.
+
+    Each queue has its own supervised poll loop. A pass that found work is
+    followed immediately by another one; idle passes double the wait up to
+    the max interval. ``wake()`` cuts the current wait short so webhooks in
+    the same process still get near-real-time pushes.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int | None = None,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+    ) -> None:
+        self.batch_size = max(1, int(batch_size or settings.BACKGROUND_JOB_BATCH_SIZE))
+        self.min_interval = float(min_interval or settings.BACKGROUND_JOB_POLL_MIN_SECONDS)
+        self.max_interval = max(self.min_interval, float(max_interval or settings.BACKGROUND_JOB_POLL_MAX_SECONDS))
+
+        self._passes: dict[str, Callable[[], Awaitable[int]]] = {
+            MULTICHANNEL_QUEUE: self._multichannel_pass,
+            LISTING_SYNC_QUEUE: self._listing_sync_pass,
+            WEBHOOK_INBOX_QUEUE: self._webhook_inbox_pass,
+            ETSY_IMAGE_PREFETCH_QUEUE: self._etsy_image_prefetch_pass,
+        }
+        self._wake = {name: asyncio.Event() for name in self._passes}
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self.stats: dict[str, dict[str, Any]] = {
+            name: {"passes": 0, "picked": 0, "errors": 0, "interval": self.min_interval, "last_run_at": None, "last_error": None}
+            for name in self._passes
+        }
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._loop(name), name=f"background-jobs-{name}") for name in self._passes
+        ]
+        logger.info(
+            "Background job runner started (batch=%s, poll=%.1f-%.1fs)",
+            self.batch_size,
+            self.min_interval,
+            self.max_interval,
+        )
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for event in self._wake.values():
+            event.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Background job runner stopped | stats=%s", self.stats)
+
+    async def run_forever(self) -> None:
+        """Entry point for a dedicated worker process."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def wake(self, queue: str | None = None) -> None:
+        for name, event in self._wake.items():
+            if queue is None or queue == name:
+                event.set()
+
+    async def _multichannel_pass(self) -> int:
+        result = await run_worker_batch(limit=self.batch_size)
+        return int(result.get("picked") or 0)
+
+    async def _listing_sync_pass(self) -> int:
+        result = await process_ebay_listing_sync_queue(limit=self.batch_size)
+        return int(result.get("picked") or 0)
+
+    async def _webhook_inbox_pass(self) -> int:
+        result = await process_webhook_inbox(limit=self.batch_size)
+        return int(result.get("picked") or 0)
+
+    async def _etsy_image_prefetch_pass(self) -> int:
+        result = await prefetch_workbook_images(limit=self.batch_size)
+        return int(result.get("picked") or 0)
+
+    async def _ensure_indexes(self) -> None:
+        try:
+            await ensure_job_indexes()
+            await ensure_listing_sync_indexes()
+            await ensure_webhook_inbox_indexes()
+            await ensure_etsy_image_cache_indexes()
+            await ensure_search_indexes()
+            await ensure_dashboard_pagination_indexes()
+        except Exception as exc:
+            logger.warning("Background job index setup failed: %s", exc)
+
+    async def _loop(self, name: str) -> None:
+        if name == MULTICHANNEL_QUEUE:
+            await self._ensure_indexes()
+
+        stats = self.stats[name]
+        run_pass = self._passes[name]
+        wake = self._wake[name]
+        interval = self.min_interval
+
+        while not self._stopping.is_set():
+            wake.clear()
+            try:
+                picked = await run_pass()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Background %s pass failed", name)
+                stats["errors"] += 1
+                stats["last_error"] = str(exc)
+                picked = 0
+                interval = self.max_interval
+            else:
+                # Keep draining while there is work; back off while idle.
+                interval = self.min_interval if picked else min(self.max_interval, interval * 2)
+
+            stats["passes"] += 1
+            stats["picked"] += picked
+            stats["interval"] = interval
+            stats["last_run_at"] = datetime.now(timezone.utc)
+
+            if picked >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=interval)
+                interval = self.min_interval
+            except asyncio.TimeoutError:
+                pass
+
+
+_runner: BackgroundJobRunner | None = None
+
+
+def start_background_job_runner() -> BackgroundJobRunner:
+    global _runner
+    if _runner is None:
+        _runner = BackgroundJobRunner()
+    _runner.start()
+    return _runner
+
+
+async def stop_background_job_runner() -> None:
+    if _runner is not None:
+        await _runner.stop()
+
+
+def wake_background_jobs(queue: str | None = None) -> bool:
+    """Nudge the in-process runner; False when no runner is active here."""
+    if _runner is None or not _runner.running:
+        return False
+    _runner.wake(queue)
+    return True
+
+
+def get_background_job_runner_status() -> dict[str, Any]:
+    if _runner is None:
+        return {"running": False}
+    return {
+        "running": _runner.running,
+        "batch_size": _runner.batch_size,
+        "poll_seconds": {"min": _runner.min_interval, "max": _runner.max_interval},
+        "queues": {name: dict(stats) for name, stats in _runner.stats.items()},
+    }
@@ -24,4 +24,36 @@ def set_shopify_fields_set(update_data: dict[str, Any]) -> dict[str, Any]:
     for key, value in update_data.items():
         out[key] = value
         out[f"channels.shopify.{key}"] = value
-    return out
\ No newline at end of file
+    return out
+
+
+def channel_quantity(doc: dict[str, Any], channel: str) -> int | None:
+    """Last quantity recorded for ``channel`` on a normalized doc, or None if unknown."""
+    if channel == "shopify":
+        value = get_shopify_field(doc, "quantity")
+        if value is None:
+            value = get_shopify_field(doc, "inventory_quantity")
+    else:
+        value = get_channel(doc, channel).get("quantity")
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+def is_channel_linked(doc: dict[str, Any], channel: str) -> bool:
+    if channel == "shopify":
+        return bool(
+            get_shopify_field(doc, "shopify_id")
+            or get_shopify_field(doc, "inventory_item_id")
+            or get_shopify_field(doc, "shopify_variant_id")
+        )
+    if channel == "etsy":
+        etsy = get_channel(doc, "etsy")
+        return bool(etsy.get("listing_id"))
+    if channel == "ebay":
+        # We can still enqueue and let the worker resolve item id from product_raw.
+        return True
+    return False
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from aiolimiter import AsyncLimiter
+from openai import AsyncOpenAI
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio used to reserve TPM budget before a request is sent.
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_PER_ITEM = 40
+BATCH_LINGER_SECONDS = 0.25
+WRITE_BATCH_SIZE = 500
+
+OPENAI_ASYNC_CLIENT = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+
+SYSTEM_PROMPT = (
+    "You are a product classifier for an antiques Shopify store.\n"
+    "For EACH product in `products`, choose exactly ONE collection key tag.\n"
+    "Rules:\n"
+    "- Only choose from allowed_keys.\n"
+    "- Use null when nothing fits.\n"
+    "- Choose the most specific match.\n"
+    "- Do NOT invent new tags.\n"
+    "- Return one choice per product, echoing its sku.\n"
+)
+
+BATCH_RESPONSE_FORMAT = {
+    "format": {
+        "type": "json_schema",
+        "name": "collection_key_batch_choice",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "choices": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "sku": {"type": "string"},
+                            "collection_key": {"type": ["string", "null"]},
+                        },
+                        "required": ["sku", "collection_key"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["choices"],
+            "additionalProperties": False,
+        },
+    }
+}
+
+
+def _product_summary(item: dict[str, Any]) -> dict[str, Any]:
+    metafields = item.get("metafields") or {}
+    return {
+        "sku": str(item["sku"]),
+        "title": item.get("title") or "",
+        "category": item.get("category") or "",
+        "tags": list(item.get("tags") or [])[:120],
+        "metafields_summary": {
+            "system": metafields.get("system", {}),
+            "material": metafields.get("material", {}),
+            "antique": metafields.get("antique", {}),
+            "maker": metafields.get("maker", {}),
+            "theme": metafields.get("theme", {}),
+        },
+        "attributes_sample": dict(list((item.get("attributes") or {}).items())[:40]),
+    }
+
+
+class CollectionKeyClassifier:
+    """Async stage that classifies unresolved SKUs in packed LLM requests.
+
+    The normalizer submits SKUs whose collection key could not be resolved
+    from the mapping file. Worker tasks pack up to ``batch_size`` products
+    into one structured-output request, pace themselves against the
+    requests-per-minute and tokens-per-minute budgets, and the resolved keys
+    are written back to product_normalized with unordered bulk writes.
+    """
+
+    def __init__(
+        self,
+        *,
+        allowed_keys: list[str],
+        model: str,
+        hash_fields,
+        client: AsyncOpenAI | None = None,
+        batch_size: int | None = None,
+        concurrency: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> None:
+        self.allowed_keys = list(allowed_keys)
+        self._allowed_set = set(self.allowed_keys)
+        self.model = model
+        self.hash_fields = hash_fields
+        self.client = client or OPENAI_ASYNC_CLIENT
+        self.batch_size = max(1, int(batch_size or settings.OPENAI_COLLECTION_KEY_BATCH_SIZE))
+        self.concurrency = max(1, int(concurrency or settings.OPENAI_COLLECTION_KEY_CONCURRENCY))
+
+        rpm = max(1, int(requests_per_minute or settings.OPENAI_COLLECTION_KEY_RPM))
+        tpm = max(1, int(tokens_per_minute or settings.OPENAI_COLLECTION_KEY_TPM))
+        self._request_limiter = AsyncLimiter(rpm, 60)
+        self._token_limiter = AsyncLimiter(tpm, 60)
+        self._tpm = tpm
+
+        # allowed_keys is sent once per request, so its cost is shared by the batch.
+        self._base_prompt_tokens = (
+            len(SYSTEM_PROMPT) + len(json.dumps(self.allowed_keys, ensure_ascii=False))
+        ) // CHARS_PER_TOKEN
+
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._pending_writes: list[UpdateOne] = []
+        self._write_lock = asyncio.Lock()
+        self.stats = {
+            "submitted": 0,
+            "requests": 0,
+            "classified": 0,
+            "unresolved": 0,
+            "errors": 0,
+            "written": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None and bool(self.allowed_keys)
+
+    def start(self) -> None:
+        if self._workers or not self.enabled:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def submit(self, item: dict[str, Any]) -> None:
+        """Queue one unresolved SKU.
+
+        ``item`` carries the classification inputs (sku, title, category,
+        tags, attributes, metafields) plus what the write-back needs:
+        ``content_fields`` (without the collection key) and ``fingerprint``.
+        """
+        if not self.enabled:
+            return
+        self.stats["submitted"] += 1
+        self._queue.put_nowait(item)
+
+    async def close(self) -> dict[str, int]:
+        """Drain the queue, stop the workers and flush remaining writes."""
+        if self._workers:
+            for _ in self._workers:
+                self._queue.put_nowait(None)
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await self._flush_writes(force=True)
+        return dict(self.stats)
+
+    async def _next_batch(self) -> tuple[list[dict[str, Any]], bool]:
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        stop = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BATCH_LINGER_SECONDS
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            try:
+                item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    async def _worker(self) -> None:
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                try:
+                    choices = await self._classify_batch(batch)
+                except Exception as exc:  # pragma: no cover - defensive around external API
+                    logger.warning("Batched collection-key classification failed for %s SKU(s): %s", len(batch), exc)
+                    self.stats["errors"] += len(batch)
+                    choices = {}
+                    self._queue_retry(batch)
+
+                for item in batch:
+                    self._record_result(item, choices.get(str(item["sku"])))
+                await self._flush_writes()
+            if stop:
+                return
+
+    def _estimate_tokens(self, products: list[dict[str, Any]]) -> int:
+        payload_chars = len(json.dumps(products, ensure_ascii=False, default=str))
+        estimate = self._base_prompt_tokens + payload_chars // CHARS_PER_TOKEN + OUTPUT_TOKENS_PER_ITEM * len(products)
+        # AsyncLimiter rejects acquisitions larger than its capacity.
+        return max(1, min(estimate, self._tpm))
+
+    async def _classify_batch(self, batch: list[dict[str, Any]]) -> dict[str, str | None]:
+        products = [_product_summary(item) for item in batch]
+        user_payload = {"allowed_keys": self.allowed_keys, "products": products}
+
+        await self._token_limiter.acquire(self._estimate_tokens(products))
+        async with self._request_limiter:
+            self.stats["requests"] += 1
+            resp = await self.client.responses.create(
+                model=self.model,
+                input=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(user_payload, ensure_ascii=False, default=str)},
+                ],
+                text=BATCH_RESPONSE_FORMAT,
+            )
+
+        try:
+            data = json.loads(resp.output_text.strip())
+        except Exception:
+            return {}
+
+        batch_skus = {str(item["sku"]) for item in batch}
+        out: dict[str, str | None] = {}
+        for choice in data.get("choices") or []:
+            if not isinstance(choice, dict):
+                continue
+            sku = str(choice.get("sku") or "").strip()
+            if sku not in batch_skus:
+                continue
+            ck = choice.get("collection_key")
+            ck = str(ck).strip() if ck is not None else None
+            out[sku] = ck if ck in self._allowed_set else None
+        return out
+
+    def _record_result(self, item: dict[str, Any], collection_key: str | None) -> None:
+        if not collection_key:
+            self.stats["unresolved"] += 1
+            return
+
+        self.stats["classified"] += 1
+        tags = sorted(set(item.get("tags") or []) | {collection_key})
+        content_fields = dict(item["content_fields"])
+        content_fields["tags"] = tuple(tags)
+        new_hash, hash_sections = self.hash_fields(content_fields)
+
+        # Guard on the fingerprint so a result never lands on a document
+        # that was renormalized with different inputs in the meantime.
+        self._pending_writes.append(
+            UpdateOne(
+                {"_id": item["sku"], "collection_key_fingerprint": item["fingerprint"]},
+                {
+                    "$set": {
+                        "collection_key": collection_key,
+                        "tags": tags,
+                        "hash": new_hash,
+                        "content_hash": new_hash,
+                        "content_hash_sections": hash_sections,
+                    }
+                },
+            )
+        )
+
+    def _queue_retry(self, batch: list[dict[str, Any]]) -> None:
+        # Dropping raw_digest makes the next digest-filtered normalization pick
+        # these SKUs up again; a plain "no fitting key" answer is not retried.
+        for item in batch:
+            self._pending_writes.append(
+                UpdateOne(
+                    {"_id": item["sku"], "collection_key_fingerprint": item["fingerprint"]},
+                    {"$unset": {"raw_digest": ""}},
+                )
+            )
+
+    async def _flush_writes(self, *, force: bool = False) -> None:
+        async with self._write_lock:
+            if not self._pending_writes:
+                return
+            if not force and len(self._pending_writes) < WRITE_BATCH_SIZE:
+                return
+            ops, self._pending_writes = self._pending_writes, []
+            result = await db.product_normalized.bulk_write(ops, ordered=False)
+            self.stats["written"] += int(getattr(result, "modified_count", 0))
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+POLICIES_COLLECTION = "inventory_conflict_policies"
+POLICY_FIELDS = ("priority_channel", "strict_priority", "max_delta_guard", "note", "updated_at")
+# Per-SKU entries used while no full snapshot is loaded (scripts, startup race).
+SKU_ENTRY_TTL_SECONDS = 60
+SKU_ENTRY_MAX = 50000
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+# Change streams are unavailable on a standalone mongod.
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573}
+
+POLICY_CHANGE_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+]
+
+
+def _slim(doc: dict[str, Any]) -> dict[str, Any]:
+    return {"_id": doc.get("_id"), **{field: doc.get(field) for field in POLICY_FIELDS}}
+
+
+class ConflictPolicyCache:
+    """Process-local copy of inventory_conflict_policies.
+
+    Only a handful of SKUs carry a policy, so the whole collection is held
+    in memory and a SKU missing from the snapshot means "no policy" without
+    a Mongo read. A change stream applies edits within moments; the
+    snapshot is also reloaded every ``ttl_seconds`` and stops being trusted
+    after two missed reloads, which covers deployments without change
+    streams. Until a snapshot exists, lookups fall back to short-lived
+    per-SKU entries (negative results included).
+    """
+
+    def __init__(self, *, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = float(ttl_seconds or settings.CONFLICT_POLICY_CACHE_TTL_SECONDS)
+        self._snapshot: dict[str, dict[str, Any]] | None = None
+        self._snapshot_loaded_at = 0.0
+        self._entries: dict[str, tuple[float, dict[str, Any] | None]] = {}
+        # Writes seen while a reload is reading the collection; replayed on top of it.
+        self._puts_during_reload: dict[str, dict[str, Any] | None] | None = None
+        self._stream_live = False
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0, "stream_events": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def _snapshot_valid(self) -> bool:
+        if self._snapshot is None:
+            return False
+        return time.monotonic() - self._snapshot_loaded_at < 2 * self.ttl_seconds
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._reload_loop(), name="conflict-policy-reload"),
+            asyncio.create_task(self._watch_loop(), name="conflict-policy-watch"),
+        ]
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stream_live = False
+
+    async def reload(self) -> int:
+        snapshot: dict[str, dict[str, Any]] = {}
+        projection = {field: 1 for field in POLICY_FIELDS}
+        self._puts_during_reload = {}
+        try:
+            async for doc in db[POLICIES_COLLECTION].find({}, projection):
+                snapshot[str(doc["_id"])] = _slim(doc)
+            for key, doc in self._puts_during_reload.items():
+                if doc is None:
+                    snapshot.pop(key, None)
+                else:
+                    snapshot[key] = doc
+        finally:
+            self._puts_during_reload = None
+        self._snapshot = snapshot
+        self._snapshot_loaded_at = time.monotonic()
+        self._entries.clear()
+        self.stats["reloads"] += 1
+        return len(snapshot)
+
+    async def get_doc(self, sku: str) -> dict[str, Any] | None:
+        """Return the raw policy document for ``sku`` or None when it has none."""
+        key = str(sku)
+        if self._snapshot_valid():
+            self.stats["hits"] += 1
+            return self._snapshot.get(key)  # type: ignore[union-attr]
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self.stats["hits"] += 1
+            return entry[1]
+
+        self.stats["misses"] += 1
+        doc = await db[POLICIES_COLLECTION].find_one({"_id": key})
+        self._remember(key, _slim(doc) if doc else None)
+        return self._entries[key][1]
+
+    def _remember(self, key: str, doc: dict[str, Any] | None) -> None:
+        if len(self._entries) >= SKU_ENTRY_MAX:
+            self._entries.clear()
+        self._entries[key] = (time.monotonic() + SKU_ENTRY_TTL_SECONDS, doc)
+
+    def put(self, sku: str, doc: dict[str, Any] | None) -> None:
+        """Apply a known write (or delete when ``doc`` is None) immediately."""
+        key = str(sku)
+        if self._puts_during_reload is not None:
+            self._puts_during_reload[key] = _slim(doc) if doc else None
+        if self._snapshot is not None:
+            if doc is None:
+                self._snapshot.pop(key, None)
+            else:
+                self._snapshot[key] = _slim(doc)
+        self._remember(key, _slim(doc) if doc else None)
+
+    async def _reload_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                count = await self.reload()
+                logger.debug("Conflict policy cache loaded %s policies", count)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["errors"] += 1
+                logger.warning("Conflict policy cache reload failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.ttl_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _watch_loop(self) -> None:
+        attempt = 0
+        while not self._stopping.is_set():
+            try:
+                async with db[POLICIES_COLLECTION].watch(
+                    POLICY_CHANGE_PIPELINE,
+                    full_document="updateLookup",
+                ) as stream:
+                    if attempt:
+                        # Edits made while the stream was down are not replayed.
+                        await self.reload()
+                    self._stream_live = True
+                    attempt = 0
+                    async for change in stream:
+                        self.stats["stream_events"] += 1
+                        sku = (change.get("documentKey") or {}).get("_id")
+                        if sku is None:
+                            continue
+                        if change.get("operationType") == "delete":
+                            self.put(str(sku), None)
+                        else:
+                            self.put(str(sku), change.get("fullDocument"))
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                    logger.info("Change streams unavailable; conflict policies refresh every %.0fs", self.ttl_seconds)
+                    self._stream_live = False
+                    return
+                logger.warning("Conflict policy change stream failed: %s", exc)
+            except PyMongoError as exc:
+                logger.warning("Conflict policy change stream interrupted: %s", exc)
+
+            self._stream_live = False
+            delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+            attempt += 1
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "snapshot_valid": self._snapshot_valid(),
+            "policies": len(self._snapshot or {}),
+            "change_stream_live": self._stream_live,
+            "ttl_seconds": self.ttl_seconds,
+            "stats": dict(self.stats),
+        }
+
+
+_cache: ConflictPolicyCache | None = None
+
+
+def get_conflict_policy_cache() -> ConflictPolicyCache:
+    global _cache
+    if _cache is None:
+        _cache = ConflictPolicyCache()
+    return _cache
+
+
+def start_conflict_policy_cache() -> ConflictPolicyCache:
+    cache = get_conflict_policy_cache()
+    cache.start()
+    return cache
+
+
+async def stop_conflict_policy_cache() -> None:
+    if _cache is not None:
+        await _cache.stop()
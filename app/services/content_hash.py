@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+# Prefix lets callers tell canonical digests apart from the legacy MD5 hex
+# digests still stored on older documents.
+HASH_PREFIX = "b2:"
+DIGEST_SIZE = 16
+_FLUSH_BYTES = 64 * 1024
+
+
+class _HashWriter:
+    """Buffer small encoded chunks and feed them to the hash in large blocks."""
+
+    __slots__ = ("_hasher", "_buf")
+
+    def __init__(self) -> None:
+        self._hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        self._buf = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        self._buf += chunk
+        if len(self._buf) >= _FLUSH_BYTES:
+            self._hasher.update(self._buf)
+            self._buf.clear()
+
+    def hexdigest(self) -> str:
+        if self._buf:
+            self._hasher.update(self._buf)
+            self._buf.clear()
+        return HASH_PREFIX + self._hasher.hexdigest()
+
+
+def _encode_str(write, tag: bytes, text: str) -> None:
+    data = text.encode("utf-8")
+    write(b"%s%d:" % (tag, len(data)))
+    write(data)
+
+
+def _sort_key(key: Any) -> tuple[str, str]:
+    return (type(key).__name__, key if isinstance(key, str) else repr(key))
+
+
+def _encode(write, value: Any) -> None:
+    """Write a type-tagged, length-prefixed encoding of value.
+
+    Every container carries its element count and every string its byte
+    length, so no two distinct structures share an encoding. Lists and
+    tuples encode identically; dict keys are emitted in sorted order.
+    """
+    if value is None:
+        write(b"N")
+    elif value is True:
+        write(b"T")
+    elif value is False:
+        write(b"F")
+    elif isinstance(value, str):
+        _encode_str(write, b"s", value)
+    elif isinstance(value, int):
+        write(b"i%d;" % value)
+    elif isinstance(value, float):
+        if math.isnan(value):
+            write(b"fnan;")
+        else:
+            # repr round-trips exactly; fold -0.0 into 0.0.
+            write(b"f%s;" % repr(value + 0.0).encode("ascii"))
+    elif isinstance(value, Decimal):
+        # normalize() drops trailing zeros so 1.50 and 1.5 hash the same.
+        _encode_str(write, b"d", str(value.normalize()))
+    elif isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        _encode_str(write, b"t", value.astimezone(timezone.utc).isoformat())
+    elif isinstance(value, date):
+        _encode_str(write, b"D", value.isoformat())
+    elif isinstance(value, dict):
+        write(b"m%d:" % len(value))
+        for key in sorted(value, key=_sort_key):
+            _encode(write, key)
+            _encode(write, value[key])
+    elif isinstance(value, (list, tuple)):
+        write(b"l%d:" % len(value))
+        for item in value:
+            _encode(write, item)
+    elif isinstance(value, (set, frozenset)):
+        # Order-free: hash members individually and encode the sorted digests.
+        write(b"S%d:" % len(value))
+        for member_digest in sorted(canonical_digest(item) for item in value):
+            _encode_str(write, b"s", member_digest)
+    elif isinstance(value, (bytes, bytearray)):
+        write(b"b%d:" % len(value))
+        write(bytes(value))
+    else:
+        # ObjectId and friends: stable type name + string form.
+        _encode_str(write, b"o", f"{type(value).__name__}:{value}")
+
+
+def canonical_digest(value: Any) -> str:
+    """Stable digest of nested dicts/lists/tuples without building a JSON string."""
+    writer = _HashWriter()
+    _encode(writer.write, value)
+    return writer.hexdigest()
+
+
+def sectioned_digest(fields: dict[str, Any]) -> tuple[str, dict[str, str]]:
+    """Return (overall digest, {top-level key: section digest}).
+
+    The overall digest is derived from the section digests, so each section
+    is encoded exactly once and a change can be traced to the section that
+    caused it.
+    """
+    sections = {str(key): canonical_digest(value) for key, value in fields.items()}
+    return canonical_digest(sections), sections
+
+
+def is_canonical_digest(value: object) -> bool:
+    return isinstance(value, str) and value.startswith(HASH_PREFIX)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import base64
+import logging
+from typing import Any
+
+from bson import json_util
+
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+SortSpec = list[tuple[str, int]]
+
+# Sort orders of the dashboard list endpoints. Every order ends in _id so a
+# (sort key, _id) pair identifies one position in the list.
+REPORT_ITEMS_SORT: SortSpec = [("ebay_posted_at", -1), ("_id", 1)]
+LAST_NORMALIZED_SORT: SortSpec = [("last_normalized_at", -1), ("_id", 1)]
+COMMAND_CENTER_SORT: SortSpec = [("updated_at", -1), ("_id", 1)]
+
+
+class InvalidCursor(ValueError):
+    """Raised for a continuation token that cannot be decoded for this list."""
+
+
+def _get_path(doc: dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(doc: dict[str, Any], sort: SortSpec) -> str:
+    """Opaque token for the position just after ``doc`` in ``sort`` order."""
+    payload = json_util.dumps({"k": [f for f, _ in sort], "v": [_get_path(doc, f) for f, _ in sort]})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: SortSpec) -> list[Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(payload, dict) or payload.get("k") != [f for f, _ in sort]:
+        raise InvalidCursor("Cursor does not belong to this list")
+    values = payload.get("v")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def _after(field: str, direction: int, value: Any) -> dict[str, Any] | None:
+    """Condition for ``field`` strictly after ``value``; null/missing sorts lowest."""
+    if direction == 1:
+        return {field: {"$ne": None}} if value is None else {field: {"$gt": value}}
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(token: str | None, sort: SortSpec) -> dict[str, Any]:
+    """Filter selecting documents after the cursor position (empty for the first page)."""
+    if not token:
+        return {}
+    values = decode_cursor(token, sort)
+    branches: list[dict[str, Any]] = []
+    for i, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        equal = [{f: values[j]} for j, (f, _) in enumerate(sort[:i])]
+        branches.append({"$and": [*equal, after]} if equal else after)
+    if not branches:
+        # Nothing can follow the cursor; match no documents.
+        return {"_id": {"$in": []}}
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def with_cursor(query: dict[str, Any], token: str | None, sort: SortSpec) -> dict[str, Any]:
+    after = keyset_filter(token, sort)
+    if not after:
+        return query
+    if not query:
+        return after
+    return {"$and": [query, after]}
+
+
+def split_page(docs: list[dict[str, Any]], sort: SortSpec, limit: int) -> tuple[list[dict[str, Any]], str | None]:
+    """Trim a ``limit + 1`` fetch to ``limit`` docs and build the next token."""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, encode_cursor(page[-1], sort)
+
+
+async def ensure_dashboard_pagination_indexes() -> None:
+    await db.product_normalized.create_index(
+        [("last_normalized_at", -1), ("_id", 1)],
+        name="idx_product_normalized_last_normalized_id",
+        background=True,
+    )
+    await db.product_normalized.create_index(
+        [("updated_at", -1), ("_id", 1)],
+        name="idx_product_normalized_updated_id",
+        background=True,
+    )
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from pymongo.errors import DuplicateKeyError
+
+from app.database.mongo import db
+from app.services.channel_utils import channel_quantity, get_channel, is_channel_linked
+from app.services.product_change_tailer import ProductChangeConsumer
+
+logger = logging.getLogger(__name__)
+
+KPI_COLLECTION = "kpi_counters"
+KPI_DOC_ID = "product_normalized"
+DRIFT_CHANNELS = ("ebay", "etsy", "shopify")
+REFRESH_BATCH_SIZE = 500
+# Settled delta tokens kept on the counters doc to make re-settling a no-op.
+PENDING_TOKEN_HISTORY = 2000
+
+COUNTER_FIELDS = (
+    "total_products",
+    "drifted_products",
+    "canonical_inventory",
+    "etsy_inventory",
+    "shopify_inventory",
+    "etsy_linked",
+    "shopify_linked",
+    "shopify_mismatch_hint",
+    *(f"{channel}_{kind}" for channel in DRIFT_CHANNELS for kind in ("drifted", "unknown_qty")),
+)
+
+# Everything build_drift reads.
+DRIFT_PROJECTION = {
+    "_id": 1,
+    "quantity": 1,
+    "inventory_quantity": 1,
+    "shopify_id": 1,
+    "inventory_item_id": 1,
+    "shopify_variant_id": 1,
+    "location_id": 1,
+    "channels.ebay.quantity": 1,
+    "channels.etsy.quantity": 1,
+    "channels.etsy.listing_id": 1,
+    "channels.shopify.quantity": 1,
+    "channels.shopify.inventory_quantity": 1,
+    "channels.shopify.shopify_id": 1,
+    "channels.shopify.inventory_item_id": 1,
+    "channels.shopify.shopify_variant_id": 1,
+    "drift": 1,
+}
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+
+def _summable(value: Any) -> int:
+    """Contribution to a ``$sum``, which skips non-numeric values."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return int(value)
+
+
+def build_drift(doc: dict[str, Any]) -> dict[str, Any]:
+    """Per-channel drift of one normalized doc and its share of every KPI counter.
+
+    Drift follows the catalog reconcile: a linked channel whose recorded
+    quantity differs from the canonical one. The KPI shares reproduce the
+    counts the dashboards used to compute per request.
+    """
+    canonical = max(0, _int(doc.get("quantity")))
+    channels: dict[str, dict[str, Any]] = {}
+    counts = {field: 0 for field in COUNTER_FIELDS}
+
+    for channel in DRIFT_CHANNELS:
+        linked = is_channel_linked(doc, channel)
+        qty = channel_quantity(doc, channel) if linked else None
+        delta = None if qty is None else qty - canonical
+        drifted = bool(delta)
+        channels[channel] = {"linked": linked, "known": qty is not None, "drifted": drifted, "delta": delta}
+        counts[f"{channel}_drifted"] = int(drifted)
+        counts[f"{channel}_unknown_qty"] = int(linked and qty is None)
+
+    etsy = get_channel(doc, "etsy")
+    shopify = get_channel(doc, "shopify")
+    any_drift = any(entry["drifted"] for entry in channels.values())
+    counts.update(
+        {
+            "total_products": 1,
+            "drifted_products": int(any_drift),
+            "canonical_inventory": _summable(doc.get("quantity")),
+            "etsy_inventory": _summable(etsy.get("quantity")),
+            "shopify_inventory": _summable(shopify.get("quantity")),
+            "etsy_linked": int(etsy.get("listing_id") is not None),
+            "shopify_linked": int(shopify.get("shopify_id") is not None or doc.get("shopify_id") is not None),
+            "shopify_mismatch_hint": int(
+                doc.get("inventory_item_id") is not None
+                and doc.get("location_id") is not None
+                and doc.get("quantity") != shopify.get("quantity")
+            ),
+        }
+    )
+    return {"channels": channels, "any": any_drift, "counts": counts}
+
+
+def _same(old: dict[str, Any], new: dict[str, Any]) -> bool:
+    return all(old.get(key) == new[key] for key in ("channels", "any", "counts"))
+
+
+async def ensure_drift_indexes() -> None:
+    await db.product_normalized.create_index(
+        [("drift.any", 1)],
+        name="idx_product_normalized_drift_any",
+        background=True,
+    )
+    await db.product_normalized.create_index(
+        [("drift.pending.token", 1)],
+        name="idx_product_normalized_drift_pending",
+        sparse=True,
+        background=True,
+    )
+
+
+async def _settle(sku: Any, pending: dict[str, Any], now: datetime) -> None:
+    """Apply a doc's stamped counter delta once, then clear the stamp.
+
+    The ``$inc`` is guarded by the pending token in a capped ``applied``
+    list, so a settle retried after a crash between the two writes does not
+    count the delta twice.
+    """
+    token = pending.get("token")
+    inc = {f"counters.{field}": _int(value) for field, value in (pending.get("inc") or {}).items() if _int(value)}
+    if token and inc:
+        try:
+            await db[KPI_COLLECTION].update_one(
+                {"_id": KPI_DOC_ID, "applied": {"$ne": token}},
+                {
+                    "$inc": inc,
+                    "$set": {"updated_at": now},
+                    "$push": {"applied": {"$each": [token], "$slice": -PENDING_TOKEN_HISTORY}},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The token is already recorded: the delta was applied earlier.
+            pass
+    await db.product_normalized.update_one(
+        {"_id": sku, "drift.pending.token": token},
+        {"$unset": {"drift.pending": ""}},
+    )
+
+
+async def _apply(docs: list[dict[str, Any]]) -> int:
+    """Write changed drift subdocs and ``$inc`` the counters by what changed.
+
+    Each write is conditional on the previous ``drift.rev``, so a counter
+    delta is applied exactly once per drift transition even when two
+    processes refresh the same SKU. The delta is stamped on the doc in the
+    same write as ``drift`` and settled right after; a stamp left behind by
+    a crash is settled the next time the doc is refreshed, or by
+    :func:`settle_pending_drift` on startup.
+    """
+    now = _utc_now()
+    changed = 0
+    for doc in docs:
+        old = doc.get("drift") or {}
+        pending = old.get("pending")
+        if pending:
+            await _settle(doc["_id"], pending, now)
+        new = build_drift(doc)
+        if _same(old, new):
+            continue
+        rev = old.get("rev")
+        next_rev = int(rev or 0) + 1
+        old_counts = old.get("counts") or {}
+        delta = {
+            field: new["counts"][field] - _int(old_counts.get(field))
+            for field in COUNTER_FIELDS
+            if new["counts"][field] != _int(old_counts.get(field))
+        }
+        drift = {**new, "rev": next_rev, "updated_at": now}
+        if delta:
+            drift["pending"] = {"token": f"{doc['_id']}:{next_rev}", "inc": delta}
+        result = await db.product_normalized.update_one(
+            {"_id": doc["_id"], "drift.rev": rev},
+            {"$set": {"drift": drift}},
+        )
+        if not result.modified_count:
+            continue
+        changed += 1
+        if delta:
+            await _settle(doc["_id"], drift["pending"], now)
+    return changed
+
+
+async def settle_pending_drift() -> int:
+    """Apply counter deltas that a crashed refresh stamped but never applied."""
+    settled = 0
+    now = _utc_now()
+    async for doc in db.product_normalized.find({"drift.pending": {"$exists": True}}, {"drift.pending": 1}):
+        pending = (doc.get("drift") or {}).get("pending")
+        if pending:
+            await _settle(doc["_id"], pending, now)
+            settled += 1
+    if settled:
+        logger.warning("kpi_counters: settled %s pending drift deltas", settled)
+    return settled
+
+
+async def refresh_drift(skus: Iterable[str]) -> int:
+    sku_list = list(dict.fromkeys(str(sku) for sku in skus))
+    changed = 0
+    for start in range(0, len(sku_list), REFRESH_BATCH_SIZE):
+        chunk = sku_list[start:start + REFRESH_BATCH_SIZE]
+        docs = await db.product_normalized.find({"_id": {"$in": chunk}}, DRIFT_PROJECTION).to_list(None)
+        changed += await _apply(docs)
+    return changed
+
+
+async def recompute_kpi_counters() -> dict[str, Any]:
+    """Audit pass: refresh drift on every doc, then reset counters from the stored shares.
+
+    The reset also removes the share of documents deleted since the last
+    pass, which the change-driven path cannot see. Counter increments made
+    while the final aggregation runs can be overwritten; the next change to
+    those SKUs does not correct them, so run this during quiet periods.
+    """
+    await ensure_drift_indexes()
+    changed = 0
+    batch: list[dict[str, Any]] = []
+    async for doc in db.product_normalized.find({}, DRIFT_PROJECTION).batch_size(REFRESH_BATCH_SIZE):
+        batch.append(doc)
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            changed += await _apply(batch)
+            batch = []
+    if batch:
+        changed += await _apply(batch)
+
+    group: dict[str, Any] = {"_id": None}
+    for field in COUNTER_FIELDS:
+        group[field] = {"$sum": {"$ifNull": [f"$drift.counts.{field}", 0]}}
+    rows = await db.product_normalized.aggregate([{"$group": group}]).to_list(length=1)
+    totals = {field: int((rows[0] if rows else {}).get(field) or 0) for field in COUNTER_FIELDS}
+
+    now = _utc_now()
+    previous = await db[KPI_COLLECTION].find_one_and_update(
+        {"_id": KPI_DOC_ID},
+        {"$set": {"counters": totals, "updated_at": now, "recomputed_at": now}},
+        upsert=True,
+    )
+    corrected = {
+        field: totals[field] - _int(((previous or {}).get("counters") or {}).get(field))
+        for field in COUNTER_FIELDS
+        if previous and totals[field] != _int((previous.get("counters") or {}).get(field))
+    }
+    if corrected:
+        logger.warning("kpi_counters corrected by recompute: %s", corrected)
+    return {"drift_updated": changed, "counters": totals, "corrected": corrected, "recomputed_at": now}
+
+
+async def get_kpi_counters() -> dict[str, int]:
+    """Current counters; computed in full once if they have never been built."""
+    doc = await db[KPI_COLLECTION].find_one({"_id": KPI_DOC_ID})
+    if doc is None:
+        return (await recompute_kpi_counters())["counters"]
+    counters = doc.get("counters") or {}
+    return {field: _int(counters.get(field)) for field in COUNTER_FIELDS}
+
+
+class DriftCountersConsumer(ProductChangeConsumer):
+    """Keeps product_normalized.drift and kpi_counters current from product changes."""
+
+    name = KPI_COLLECTION
+    collections = ("product_normalized",)
+
+    async def bootstrap(self) -> None:
+        await ensure_drift_indexes()
+        if await db[KPI_COLLECTION].find_one({"_id": KPI_DOC_ID}, {"_id": 1}) is None:
+            logger.info("kpi_counters missing; computing drift for every product")
+            await recompute_kpi_counters()
+            return
+        await settle_pending_drift()
+
+    async def refresh(self, skus: list[str]) -> int:
+        return await refresh_drift(skus)
+
+    async def rebuild(self) -> int:
+        return (await recompute_kpi_counters())["drift_updated"]
@@ -1,16 +1,21 @@
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from pymongo import ReturnDocument
 
 from app.database.mongo import db
-from app.services.normalizer_service import normalize_from_raw
+from app.services.normalizer_service import compute_raw_digest, normalize_from_raw
 from app.services.shopify_sync import sync_to_shopify
 from app.services.multichannel_sync_service import ingest_sale_event, run_worker_batch
 
 logger = logging.getLogger(__name__)
 
 LISTING_SYNC_COLLECTION = "ebay_listing_sync_queue"
+LISTING_SYNC_LEASE_SECONDS = 600
+LISTING_SYNC_RETRY_BASE_SECONDS = 60
+LISTING_SYNC_RETRY_MAX_SECONDS = 3600
+# A job that has failed (or crashed its worker) this many times stays failed.
+LISTING_SYNC_MAX_ATTEMPTS = 5
 
 
 def _safe_int(value: Any, default: int = 0) -> int:
@@ -116,8 +121,51 @@ def _to_raw_from_itemlisted(payload: dict[str, Any]) -> tuple[str | None, str |
     return sku, item_id or None, raw_doc, posted_at
 
 
+def _listing_sync_claim_query(now: datetime) -> dict[str, Any]:
+    return {
+        "$or": [
+            {
+                "status": "queued",
+                "$or": [{"next_attempt_at": None}, {"next_attempt_at": {"$lte": now}}],
+            },
+            {"status": "processing", "lease_until": {"$lt": now}},
+            {
+                "status": "processing",
+                "lease_until": None,
+                "started_at": {"$lt": now - timedelta(seconds=LISTING_SYNC_LEASE_SECONDS)},
+            },
+        ]
+    }
+
+
+async def ensure_listing_sync_indexes() -> None:
+    await db[LISTING_SYNC_COLLECTION].create_index(
+        [("status", 1), ("next_attempt_at", 1), ("updated_at", 1)],
+        name="idx_ebay_listing_sync_status_next_attempt",
+        background=True,
+    )
+
+
+async def _finish_listing_sync_job(job: dict[str, Any], fields: dict[str, Any]) -> bool:
+    """Record a job outcome unless another worker has reclaimed it meanwhile."""
+    result = await db[LISTING_SYNC_COLLECTION].update_one(
+        {"_id": job.get("_id"), "lease_until": job.get("lease_until")},
+        {"$set": {**fields, "lease_until": None, "updated_at": datetime.now(timezone.utc)}},
+    )
+    if not result.matched_count:
+        logger.warning("ItemListed job %s lost its lease before finishing; outcome not recorded", job.get("_id"))
+        return False
+    return True
+
+
 async def process_ebay_listing_sync_queue(limit: int = 10) -> dict[str, Any]:
-    """Process queued ItemListed-derived sync jobs (normalize + Shopify sync) by SKU."""
+    """Process queued ItemListed-derived sync jobs (normalize + Shopify sync) by SKU.
+
+    Jobs are claimed under a lease so a crashed worker's job is picked up
+    again once ``lease_until`` passes; failures are retried with
+    exponential backoff through ``next_attempt_at``, up to
+    ``LISTING_SYNC_MAX_ATTEMPTS`` attempts.
+    """
     max_items = max(1, min(int(limit), 200))
 
     completed = 0
@@ -126,10 +174,15 @@ async def process_ebay_listing_sync_queue(limit: int = 10) -> dict[str, Any]:
     results: list[dict[str, Any]] = []
 
     for _ in range(max_items):
+        now = datetime.now(timezone.utc)
         job = await db[LISTING_SYNC_COLLECTION].find_one_and_update(
-            {"status": "queued"},
+            _listing_sync_claim_query(now),
             {
-                "$set": {"status": "processing", "started_at": datetime.now(timezone.utc)},
+                "$set": {
+                    "status": "processing",
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=LISTING_SYNC_LEASE_SECONDS),
+                },
                 "$inc": {"attempts": 1},
             },
             sort=[("updated_at", 1), ("created_at", 1)],
@@ -140,19 +193,13 @@ async def process_ebay_listing_sync_queue(limit: int = 10) -> dict[str, Any]:
 
         picked += 1
         sku = str(job.get("sku") or "").strip()
-        if not sku:
+        attempts = _safe_int(job.get("attempts"), 1)
+        if not sku or attempts > LISTING_SYNC_MAX_ATTEMPTS:
+            # Over the cap here means earlier attempts died with their worker.
+            error = "missing_sku" if not sku else "max_attempts_exceeded"
             failed += 1
-            await db[LISTING_SYNC_COLLECTION].update_one(
-                {"_id": job.get("_id")},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error": "missing_sku",
-                        "updated_at": datetime.now(timezone.utc),
-                    }
-                },
-            )
-            results.append({"sku": None, "status": "failed", "error": "missing_sku"})
+            await _finish_listing_sync_job(job, {"status": "failed", "error": error, "next_attempt_at": None})
+            results.append({"sku": sku or None, "status": "failed", "error": error})
             continue
 
         try:
@@ -165,17 +212,15 @@ async def process_ebay_listing_sync_queue(limit: int = 10) -> dict[str, Any]:
             )
 
             completed += 1
-            await db[LISTING_SYNC_COLLECTION].update_one(
-                {"_id": job.get("_id")},
+            await _finish_listing_sync_job(
+                job,
                 {
-                    "$set": {
-                        "status": "completed",
-                        "normalize_result": normalize_result,
-                        "shopify_result": shopify_result,
-                        "updated_at": datetime.now(timezone.utc),
-                        "completed_at": datetime.now(timezone.utc),
-                        "error": None,
-                    }
+                    "status": "completed",
+                    "normalize_result": normalize_result,
+                    "shopify_result": shopify_result,
+                    "completed_at": datetime.now(timezone.utc),
+                    "error": None,
+                    "next_attempt_at": None,
                 },
             )
             results.append({
@@ -187,17 +232,17 @@ async def process_ebay_listing_sync_queue(limit: int = 10) -> dict[str, Any]:
         except Exception as exc:
             failed += 1
             logger.exception("ItemListed queue job failed for sku=%s", sku)
-            await db[LISTING_SYNC_COLLECTION].update_one(
-                {"_id": job.get("_id")},
-                {
-                    "$set": {
-                        "status": "queued",
-                        "error": str(exc),
-                        "updated_at": datetime.now(timezone.utc),
-                    }
-                },
+            if attempts >= LISTING_SYNC_MAX_ATTEMPTS:
+                await _finish_listing_sync_job(job, {"status": "failed", "error": str(exc), "next_attempt_at": None})
+                results.append({"sku": sku, "status": "failed", "error": str(exc), "attempts": attempts})
+                continue
+            delay = min(LISTING_SYNC_RETRY_MAX_SECONDS, LISTING_SYNC_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+            next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await _finish_listing_sync_job(
+                job,
+                {"status": "queued", "error": str(exc), "next_attempt_at": next_attempt_at},
             )
-            results.append({"sku": sku, "status": "retry", "error": str(exc)})
+            results.append({"sku": sku, "status": "retry", "error": str(exc), "next_attempt_at": next_attempt_at})
 
     return {
         "requested_limit": max_items,
@@ -266,8 +311,13 @@ async def handle_ebay_order_webhook(payload: dict[str, Any], shopify_client: Any
 
     worker_result = None
     if make_unavailable:
-        # Run a short worker pass so important inventory pushes happen quickly.
-        worker_result = await run_worker_batch(limit=max(10, len(processed) * 3))
+        from app.services.background_job_runner import MULTICHANNEL_QUEUE, wake_background_jobs
+
+        if wake_background_jobs(MULTICHANNEL_QUEUE):
+            worker_result = {"status": "handed_to_background_runner"}
+        else:
+            # No runner in this process: run a short pass so pushes happen quickly.
+            worker_result = await run_worker_batch(limit=max(10, len(processed) * 3))
 
     # persist webhook processing record
     await db.sync_log.insert_one(
@@ -310,6 +360,7 @@ async def handle_ebay_item_listed(payload: dict[str, Any]) -> dict:
                 "sku": sku,
                 "raw": raw_doc,
                 "ebay_posted_at": posted_at,
+                "raw_digest": compute_raw_digest(raw_doc, posted_at),
                 "updated_at": now_utc,
                 "source": "ebay_itemlisted",
             },
@@ -326,6 +377,8 @@ async def handle_ebay_item_listed(payload: dict[str, Any]) -> dict:
                 "sku": sku,
                 "item_id": item_id,
                 "status": "queued",
+                # A fresh listing event is worth trying right away.
+                "next_attempt_at": None,
                 "updated_at": now_utc,
                 "source": "ebay_itemlisted",
             },
@@ -359,7 +412,10 @@ async def handle_ebay_item_listed(payload: dict[str, Any]) -> dict:
     try:
         import asyncio
 
-        asyncio.create_task(process_ebay_listing_sync_queue(limit=3))
+        from app.services.background_job_runner import LISTING_SYNC_QUEUE, wake_background_jobs
+
+        if not wake_background_jobs(LISTING_SYNC_QUEUE):
+            asyncio.create_task(process_ebay_listing_sync_queue(limit=3))
     except Exception:
         logger.exception("Failed to schedule ebay listing sync queue worker")
 
@@ -97,6 +97,11 @@ async def exchange_code_for_tokens(code: str) -> dict:
 
 async def refresh_access_token() -> str:
     """Use the stored Etsy refresh token to obtain a new access token."""
+    doc = await _refresh_token_doc()
+    return doc["access_token"]
+
+
+async def _refresh_token_doc() -> dict:
     _ensure_etsy_oauth_is_configured()
 
     doc = await db[TOKEN_COLLECTION].find_one({"_id": TOKEN_DOC_ID})
@@ -127,36 +132,55 @@ async def refresh_access_token() -> str:
     if "refresh_token" not in token_data:
         token_data["refresh_token"] = doc["refresh_token"]
 
-    await _save_tokens(token_data)
+    saved = await _save_tokens(token_data)
     logger.info("Etsy access token refreshed successfully")
-    return token_data["access_token"]
+    return saved
 
 
 async def get_valid_token(*, force_refresh: bool = False, allow_env_fallback: bool = True) -> str:
     """Return a valid Etsy access token, refreshing from Mongo-stored refresh token when needed."""
+    token, _expires_at = await get_valid_token_info(
+        force_refresh=force_refresh,
+        allow_env_fallback=allow_env_fallback,
+    )
+    return token
+
+
+async def get_valid_token_info(
+    *,
+    force_refresh: bool = False,
+    allow_env_fallback: bool = True,
+    refresh_margin: timedelta = timedelta(minutes=5),
+) -> tuple[str, datetime | None]:
+    """Like get_valid_token, but also return the token's expiry (None when unknown).
+
+    ``refresh_margin`` is how close to expiry a stored token is refreshed;
+    the Etsy API client passes a wider margin to refresh ahead of time.
+    """
     doc = await db[TOKEN_COLLECTION].find_one({"_id": TOKEN_DOC_ID})
 
     if doc and doc.get("access_token"):
         expires_at = _ensure_aware(doc.get("expires_at"))
 
         if not force_refresh:
-            if expires_at and datetime.now(timezone.utc) < expires_at - timedelta(minutes=5):
-                return doc["access_token"]
+            if expires_at and datetime.now(timezone.utc) < expires_at - refresh_margin:
+                return doc["access_token"], expires_at
 
             # If expiry is unknown, continue using stored token.
             if not expires_at:
-                return doc["access_token"]
+                return doc["access_token"], None
 
             # No refresh token available yet; use token while it is still valid.
             if datetime.now(timezone.utc) < expires_at and not doc.get("refresh_token"):
-                return doc["access_token"]
+                return doc["access_token"], expires_at
 
         if doc.get("refresh_token"):
             logger.info("Etsy access token expired or near expiry - refreshing automatically")
-            return await refresh_access_token()
+            refreshed = await _refresh_token_doc()
+            return refreshed["access_token"], refreshed.get("expires_at")
 
     if allow_env_fallback and settings.ETSY_TOKEN:
-        return settings.ETSY_TOKEN
+        return settings.ETSY_TOKEN, None
 
     raise ValueError(
         "No valid Etsy token available. Authorize Etsy and ensure a refresh token is stored."
@@ -197,7 +221,7 @@ async def get_token_status() -> dict:
     }
 
 
-async def _save_tokens(token_data: dict) -> None:
+async def _save_tokens(token_data: dict) -> dict:
     now = datetime.now(timezone.utc)
     expires_in = token_data.get("expires_in", 3600)
     access_token = token_data.get("access_token")
@@ -220,3 +244,5 @@ async def _save_tokens(token_data: dict) -> None:
 
     await db[TOKEN_COLLECTION].replace_one({"_id": TOKEN_DOC_ID}, doc, upsert=True)
     logger.info("Etsy tokens saved to MongoDB (expires in %ds)", expires_in)
+    return doc
+
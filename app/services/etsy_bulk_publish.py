@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Iterable
+
+from aiolimiter import AsyncLimiter
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from app.database.mongo import db
+from app.services.job_tracker import report_job_progress, start_job
+
+logger = logging.getLogger(__name__)
+
+RUNS_COLLECTION = "etsy_bulk_publish_runs"
+ITEMS_COLLECTION = "etsy_bulk_publish_items"
+
+# Items move through these stages in order; a handler returns the next stage
+# or one of the terminal states.
+STAGES = ("validate", "optimize", "create", "images")
+TERMINAL_STATES = ("ready", "created", "skipped", "failed")
+
+# Per-stage workers and rate budget (items started per minute). Optimize is
+# bounded by OpenAI, create/images by Etsy writes; the Etsy client still
+# paces every call underneath.
+STAGE_LIMITS: dict[str, dict[str, float]] = {
+    "validate": {"concurrency": 16, "per_minute": 6000},
+    "optimize": {"concurrency": 3, "per_minute": 60},
+    "create": {"concurrency": 4, "per_minute": 120},
+    "images": {"concurrency": 2, "per_minute": 60},
+}
+ITEM_LEASE_SECONDS = 600
+STAGE_MAX_ATTEMPTS = 3
+STAGE_RETRY_SECONDS = 30
+IDLE_POLL_SECONDS = 1.0
+# Backoff for a worker whose claim or item update failed (e.g. Mongo unavailable).
+WORKER_ERROR_BACKOFF_SECONDS = 2.0
+WORKER_ERROR_BACKOFF_MAX_SECONDS = 60.0
+PROGRESS_INTERVAL_SECONDS = 5.0
+# A running run without a heartbeat for this long is picked up by resume.
+RUN_STALE_SECONDS = 120
+SEED_BATCH_SIZE = 1000
+
+StageHandler = Callable[[dict[str, Any], dict[str, Any]], Awaitable[dict[str, Any]]]
+CompletionHook = Callable[[dict[str, Any]], Awaitable[None]]
+
+_stage_handlers: dict[str, StageHandler] = {}
+_on_complete: CompletionHook | None = None
+_running: set[str] = set()
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def register_stage_handlers(handlers: dict[str, StageHandler], *, on_complete: CompletionHook | None = None) -> None:
+    """Install the per-stage work functions (the Etsy publish routes own them).
+
+    A handler gets the claimed item and its run and returns the fields to
+    set, including ``stage``: the next stage or a terminal state.
+    ``on_complete`` receives the finished run document.
+    """
+    global _on_complete
+    unknown = set(handlers) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown bulk publish stages: {sorted(unknown)}")
+    _stage_handlers.update(handlers)
+    if on_complete is not None:
+        _on_complete = on_complete
+
+
+async def ensure_bulk_publish_indexes() -> None:
+    await db[ITEMS_COLLECTION].create_index(
+        [("run_id", ASCENDING), ("stage", ASCENDING), ("position", ASCENDING)],
+        name="idx_etsy_bulk_items_run_stage_position",
+        background=True,
+    )
+    await db[RUNS_COLLECTION].create_index(
+        [("status", ASCENDING), ("heartbeat_at", ASCENDING)],
+        name="idx_etsy_bulk_runs_status_heartbeat",
+        background=True,
+    )
+
+
+def _item_id(run_id: str, sku: str) -> str:
+    return f"{run_id}:{sku}"
+
+
+async def create_bulk_publish_run(skus: Iterable[str], *, create: bool, options: dict[str, Any]) -> dict[str, Any]:
+    """Persist a run and one item per SKU, all at the validate stage."""
+    await ensure_bulk_publish_indexes()
+    now = _utc_now()
+    run_id = f"bulk_{now.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    run = {
+        "_id": run_id,
+        "status": "running",
+        "create": bool(create),
+        "options": options,
+        "counts": {},
+        "created_at": now,
+        "updated_at": now,
+        "heartbeat_at": now,
+        "finished_at": None,
+    }
+    await db[RUNS_COLLECTION].insert_one(run)
+
+    total = 0
+    batch: list[dict[str, Any]] = []
+
+    async def _flush() -> None:
+        try:
+            await db[ITEMS_COLLECTION].insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            # Duplicate SKUs in the request collapse onto one item.
+            if any(err.get("code") != 11000 for err in exc.details.get("writeErrors", [])):
+                raise
+
+    for position, sku in enumerate(dict.fromkeys(str(sku) for sku in skus)):
+        batch.append(
+            {
+                "_id": _item_id(run_id, sku),
+                "run_id": run_id,
+                "sku": sku,
+                "position": position,
+                "stage": STAGES[0],
+                "attempts": 0,
+                "next_attempt_at": now,
+                "lease_until": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        total += 1
+        if len(batch) >= SEED_BATCH_SIZE:
+            await _flush()
+            batch = []
+    if batch:
+        await _flush()
+
+    await db[RUNS_COLLECTION].update_one({"_id": run_id}, {"$set": {"total": total}})
+    return {**run, "total": total}
+
+
+async def queue_ready_items_for_create(run_id: str, skus: Iterable[str] | None = None) -> int:
+    """Send a validated run's ``ready`` items (or only ``skus``) on to the create stage."""
+    query: dict[str, Any] = {"run_id": run_id, "stage": "ready"}
+    if skus is not None:
+        query["sku"] = {"$in": [str(sku) for sku in skus]}
+    now = _utc_now()
+    result = await db[ITEMS_COLLECTION].update_many(
+        query,
+        {"$set": {"stage": "create", "attempts": 0, "next_attempt_at": now, "lease_until": None, "updated_at": now}},
+    )
+    if result.modified_count:
+        await db[RUNS_COLLECTION].update_one(
+            {"_id": run_id},
+            {"$set": {"status": "running", "create": True, "heartbeat_at": now, "finished_at": None}},
+        )
+    return result.modified_count
+
+
+async def _claim(run_id: str, stage: str) -> dict[str, Any] | None:
+    now = _utc_now()
+    return await db[ITEMS_COLLECTION].find_one_and_update(
+        {
+            "run_id": run_id,
+            "stage": stage,
+            "next_attempt_at": {"$lte": now},
+            "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}],
+        },
+        {"$set": {"lease_until": now + timedelta(seconds=ITEM_LEASE_SECONDS), "updated_at": now}},
+        sort=[("position", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _stage_has_work(run_id: str, stage: str) -> bool:
+    """True while this stage or any earlier one still holds items."""
+    upstream = list(STAGES[: STAGES.index(stage) + 1])
+    return await db[ITEMS_COLLECTION].find_one({"run_id": run_id, "stage": {"$in": upstream}}, {"_id": 1}) is not None
+
+
+async def _process(item: dict[str, Any], run: dict[str, Any], stage: str) -> None:
+    now = _utc_now()
+    try:
+        update = dict(await _stage_handlers[stage](item, run))
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        attempts = int(item.get("attempts") or 0) + 1
+        logger.warning("Bulk publish %s failed for %s (attempt %s): %s", stage, item["sku"], attempts, exc)
+        if attempts >= STAGE_MAX_ATTEMPTS:
+            update = {"stage": "failed", "reason": f"{stage}_exception", "error": str(exc), "failed_stage": stage}
+        else:
+            await db[ITEMS_COLLECTION].update_one(
+                {"_id": item["_id"]},
+                {
+                    "$set": {
+                        "attempts": attempts,
+                        "error": str(exc),
+                        "lease_until": None,
+                        "next_attempt_at": now + timedelta(seconds=STAGE_RETRY_SECONDS * attempts),
+                        "updated_at": now,
+                    }
+                },
+            )
+            return
+
+    next_stage = update.get("stage")
+    if next_stage not in STAGES and next_stage not in TERMINAL_STATES:
+        logger.error("Bulk publish %s handler returned invalid stage %r for %s", stage, next_stage, item["sku"])
+        update = {"stage": "failed", "failed_stage": stage, "error": f"invalid_next_stage:{next_stage}"}
+    elif next_stage == "create" and not run.get("create"):
+        # Re-read: a create request may have switched this run to creating since it started.
+        current = await db[RUNS_COLLECTION].find_one({"_id": run["_id"]}, {"create": 1})
+        if current and current.get("create"):
+            run["create"] = True
+        else:
+            # Validation-only run: stop at ready until a create request queues it.
+            update["stage"] = "ready"
+    update.setdefault("error", None)
+    await db[ITEMS_COLLECTION].update_one(
+        {"_id": item["_id"]},
+        {"$set": {**update, "attempts": 0, "lease_until": None, "next_attempt_at": now, "updated_at": now}},
+    )
+
+
+async def _stage_worker(run: dict[str, Any], stage: str, limiter: AsyncLimiter) -> int:
+    processed = 0
+    failures = 0
+    while True:
+        try:
+            item = await _claim(run["_id"], stage)
+            if item is None:
+                if not await _stage_has_work(run["_id"], stage):
+                    return processed
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+                continue
+            await limiter.acquire()
+            await _process(item, run, stage)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # The item keeps its lease and is retried once it expires.
+            failures += 1
+            delay = min(WORKER_ERROR_BACKOFF_MAX_SECONDS, WORKER_ERROR_BACKOFF_SECONDS * 2 ** (failures - 1))
+            logger.warning("Bulk publish %s worker for %s failed: %s; retrying in %.0fs", stage, run["_id"], exc, delay)
+            await asyncio.sleep(delay)
+            continue
+        failures = 0
+        processed += 1
+
+
+async def get_bulk_publish_counts(run_id: str) -> dict[str, int]:
+    rows = await db[ITEMS_COLLECTION].aggregate(
+        [{"$match": {"run_id": run_id}}, {"$group": {"_id": "$stage", "count": {"$sum": 1}}}]
+    ).to_list(None)
+    return {str(row["_id"]): int(row["count"]) for row in rows}
+
+
+async def _publish_progress(run_id: str) -> dict[str, int]:
+    counts = await get_bulk_publish_counts(run_id)
+    now = _utc_now()
+    await db[RUNS_COLLECTION].update_one(
+        {"_id": run_id},
+        {"$set": {"counts": counts, "heartbeat_at": now, "updated_at": now}},
+    )
+    report_job_progress({"run_id": run_id, "counts": counts})
+    return counts
+
+
+async def _progress_loop(run_id: str) -> None:
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+        try:
+            await _publish_progress(run_id)
+        except Exception as exc:
+            logger.warning("Bulk publish progress update failed for %s: %s", run_id, exc)
+
+
+async def run_bulk_publish(run_id: str, *, limits: dict[str, dict[str, float]] | None = None) -> dict[str, Any]:
+    """Drive every stage of ``run_id`` until no item is left in a non-terminal stage.
+
+    All stages run at once, so items stream from validation to image upload.
+    Items are claimed under a lease, so a second process (or a resume after
+    a crash) only picks up items nobody is working on.
+    """
+    run = await db[RUNS_COLLECTION].find_one({"_id": run_id})
+    if run is None:
+        raise ValueError(f"Unknown bulk publish run {run_id}")
+    missing = [stage for stage in STAGES if stage not in _stage_handlers]
+    if missing:
+        raise RuntimeError(f"No bulk publish handlers registered for {missing}")
+
+    stage_limits = {stage: {**STAGE_LIMITS[stage], **((limits or {}).get(stage) or {})} for stage in STAGES}
+    _running.add(run_id)
+    progress = asyncio.create_task(_progress_loop(run_id), name=f"etsy-bulk-progress-{run_id}")
+    try:
+        workers: list[asyncio.Task] = []
+        for stage in STAGES:
+            limiter = AsyncLimiter(max(1.0, float(stage_limits[stage]["per_minute"])), 60)
+            for _ in range(max(1, int(stage_limits[stage]["concurrency"]))):
+                workers.append(asyncio.create_task(_stage_worker(run, stage, limiter), name=f"etsy-bulk-{stage}-{run_id}"))
+        try:
+            processed = await asyncio.gather(*workers)
+        except BaseException:
+            # Do not leave sibling workers running detached from an aborted run.
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+    finally:
+        progress.cancel()
+        await asyncio.gather(progress, return_exceptions=True)
+        _running.discard(run_id)
+
+    counts = await _publish_progress(run_id)
+    now = _utc_now()
+    run = await db[RUNS_COLLECTION].find_one_and_update(
+        {"_id": run_id},
+        {"$set": {"status": "completed", "finished_at": now, "updated_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if _on_complete is not None and run is not None:
+        try:
+            await _on_complete(run)
+        except Exception as exc:
+            logger.warning("Bulk publish completion hook failed for %s: %s", run_id, exc)
+    return {"run_id": run_id, "processed": int(sum(processed)), "counts": counts, "finished_at": now}
+
+
+async def start_bulk_publish_job(run_id: str, *, limits: dict[str, dict[str, float]] | None = None) -> dict[str, Any]:
+    async def _run() -> dict[str, Any]:
+        return await run_bulk_publish(run_id, limits=limits)
+
+    return await start_job(name=f"Etsy bulk publish {run_id}", fn=_run)
+
+
+async def resume_bulk_publish_runs() -> list[str]:
+    """Restart runs left ``running`` without a recent heartbeat (crash, redeploy)."""
+    stale_before = _utc_now() - timedelta(seconds=RUN_STALE_SECONDS)
+    resumed: list[str] = []
+    async for run in db[RUNS_COLLECTION].find(
+        {"status": "running", "heartbeat_at": {"$lt": stale_before}},
+        {"_id": 1, "options.limits": 1},
+    ):
+        run_id = str(run["_id"])
+        if run_id in _running:
+            continue
+        await start_bulk_publish_job(run_id, limits=(run.get("options") or {}).get("limits"))
+        resumed.append(run_id)
+    if resumed:
+        logger.info("Resumed Etsy bulk publish runs: %s", resumed)
+    return resumed
+
+
+async def get_bulk_publish_run(run_id: str) -> dict[str, Any] | None:
+    run = await db[RUNS_COLLECTION].find_one({"_id": run_id})
+    if run is None:
+        return None
+    run["counts"] = await get_bulk_publish_counts(run_id)
+    run["active_here"] = run_id in _running
+    return run
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+from openpyxl import load_workbook
+from pymongo import ASCENDING
+
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+ROWS_COLLECTION = "etsy_excel_match_rows"
+WORKBOOKS_COLLECTION = "etsy_excel_match_workbooks"
+CURRENT_WORKBOOK_ID = "latest"
+INSERT_BATCH_SIZE = 1000
+
+_ingest_lock = asyncio.Lock()
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _normalize_header(value: object) -> str:
+    return str(value or "").strip().lower()
+
+
+def _mongo_key(header: str) -> str:
+    return header.replace(".", "_").lstrip("$")
+
+
+def _to_listing_id(value: Any) -> int | None:
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_stamp(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_workbook_rows(workbook_path: Path) -> list[dict[str, Any]]:
+    """Rows of the active sheet as dicts keyed by lowercased header."""
+    wb = load_workbook(workbook_path, read_only=True, data_only=True)
+    try:
+        rows_iter = wb.active.iter_rows(values_only=True)
+        headers = next(rows_iter, None)
+        if not headers:
+            return []
+
+        header_map = {_mongo_key(_normalize_header(h)): i for i, h in enumerate(headers)}
+        out_rows: list[dict[str, Any]] = []
+        for values in rows_iter:
+            out_rows.append({key: values[idx] if idx < len(values) else None for key, idx in header_map.items()})
+        return out_rows
+    finally:
+        wb.close()
+
+
+def remove_listings_from_workbook(workbook_path: Path, listing_ids: Iterable[int]) -> set[int]:
+    """Delete the rows for ``listing_ids`` in one load/save; returns the ids actually removed."""
+    wanted = {int(listing_id) for listing_id in listing_ids}
+    wb = load_workbook(workbook_path)
+    try:
+        ws = wb.active
+        headers = [str(c.value or "").strip().lower() for c in ws[1]]
+        if "listing_id" not in headers:
+            raise ValueError("Workbook missing listing_id column")
+
+        listing_col = headers.index("listing_id") + 1
+        removed: set[int] = set()
+        target_rows: list[int] = []
+        for row_num in range(2, ws.max_row + 1):
+            listing_id = _to_listing_id(ws.cell(row=row_num, column=listing_col).value)
+            if listing_id in wanted:
+                removed.add(listing_id)
+                target_rows.append(row_num)
+
+        if target_rows:
+            # Bottom-up so earlier row numbers stay valid.
+            for row_num in reversed(target_rows):
+                ws.delete_rows(row_num, 1)
+            wb.save(workbook_path)
+        return removed
+    finally:
+        wb.close()
+
+
+async def ensure_excel_match_rows_indexes() -> None:
+    await db[ROWS_COLLECTION].create_index(
+        [("ingest_id", ASCENDING), ("position", ASCENDING)],
+        name="idx_etsy_excel_rows_ingest_position",
+        background=True,
+    )
+    await db[ROWS_COLLECTION].create_index(
+        [("ingest_id", ASCENDING), ("listing_id", ASCENDING)],
+        name="idx_etsy_excel_rows_ingest_listing",
+        background=True,
+    )
+    await db[ROWS_COLLECTION].create_index(
+        [("ingest_id", ASCENDING), ("image_checked_at", ASCENDING), ("position", ASCENDING)],
+        name="idx_etsy_excel_rows_ingest_image_checked",
+        background=True,
+    )
+
+
+async def _ingest(path: Path, sha256: str, stamp: dict[str, Any]) -> dict[str, Any]:
+    rows = await asyncio.to_thread(read_workbook_rows, path)
+    await ensure_excel_match_rows_indexes()
+    # Leftovers of an interrupted ingest of this same file.
+    await db[ROWS_COLLECTION].delete_many({"ingest_id": sha256})
+
+    docs = [
+        {
+            "ingest_id": sha256,
+            "position": position,
+            "listing_id": _to_listing_id(row.get("listing_id")),
+            "has_shopify_link": bool(row.get("matched_shopify_link")),
+            "has_matched_sku": bool(row.get("matched_mongo_sku")),
+            "row": row,
+        }
+        for position, row in enumerate(rows)
+    ]
+    for start in range(0, len(docs), INSERT_BATCH_SIZE):
+        await db[ROWS_COLLECTION].insert_many(docs[start:start + INSERT_BATCH_SIZE], ordered=False)
+
+    meta = {**stamp, "sha256": sha256, "ingest_id": sha256, "row_count": len(docs), "ingested_at": _utc_now()}
+    await db[WORKBOOKS_COLLECTION].replace_one({"_id": CURRENT_WORKBOOK_ID}, meta, upsert=True)
+    await db[ROWS_COLLECTION].delete_many({"ingest_id": {"$ne": sha256}})
+    logger.info("Ingested Etsy match workbook %s (%s rows)", path, len(docs))
+    return meta
+
+
+async def current_workbook(path: Path) -> dict[str, Any]:
+    """Ingested state of ``path`` (the newest workbook), ingesting it first if it changed.
+
+    Unchanged path, mtime and size skip the file entirely; a touched but
+    identical file (same sha256) is only restamped.
+    """
+    stamp = _file_stamp(path)
+    meta = await db[WORKBOOKS_COLLECTION].find_one({"_id": CURRENT_WORKBOOK_ID})
+    if meta and all(meta.get(key) == value for key, value in stamp.items()):
+        return meta
+
+    async with _ingest_lock:
+        meta = await db[WORKBOOKS_COLLECTION].find_one({"_id": CURRENT_WORKBOOK_ID})
+        stamp = _file_stamp(path)
+        if meta and all(meta.get(key) == value for key, value in stamp.items()):
+            return meta
+        sha256 = await asyncio.to_thread(_file_sha256, path)
+        if meta and meta.get("sha256") == sha256:
+            await db[WORKBOOKS_COLLECTION].update_one({"_id": CURRENT_WORKBOOK_ID}, {"$set": stamp})
+            return {**meta, **stamp}
+        return await _ingest(path, sha256, stamp)
+
+
+async def excel_match_summary(meta: dict[str, Any]) -> dict[str, int]:
+    rows = await db[ROWS_COLLECTION].aggregate(
+        [
+            {"$match": {"ingest_id": meta["ingest_id"]}},
+            {
+                "$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "with_shopify_link": {"$sum": {"$cond": ["$has_shopify_link", 1, 0]}},
+                    "with_matched_sku": {"$sum": {"$cond": ["$has_matched_sku", 1, 0]}},
+                }
+            },
+        ]
+    ).to_list(length=1)
+    totals = rows[0] if rows else {}
+    return {key: int(totals.get(key) or 0) for key in ("count", "with_shopify_link", "with_matched_sku")}
+
+
+async def excel_match_rows(meta: dict[str, Any], *, limit: int) -> list[dict[str, Any]]:
+    """Stored rows in workbook order: ``row`` plus the prefetched ``etsy_image``/``image_checked_at``."""
+    cursor = (
+        db[ROWS_COLLECTION]
+        .find({"ingest_id": meta["ingest_id"]}, {"row": 1, "etsy_image": 1, "image_checked_at": 1})
+        .sort("position", ASCENDING)
+        .limit(int(limit))
+    )
+    return await cursor.to_list(None)
+
+
+async def remove_excel_match_listings(path: Path, listing_ids: Iterable[int]) -> set[int]:
+    """Remove listings from the workbook file and from the ingested rows.
+
+    The stored stamp and hash move to the rewritten file while the rows keep
+    their ``ingest_id``, so the edit does not trigger a re-ingest.
+    """
+    ids = {int(listing_id) for listing_id in listing_ids}
+    if not ids:
+        return set()
+    meta = await current_workbook(path)
+    async with _ingest_lock:
+        removed = await asyncio.to_thread(remove_listings_from_workbook, path, ids)
+        if not removed:
+            return removed
+        result = await db[ROWS_COLLECTION].delete_many(
+            {"ingest_id": meta["ingest_id"], "listing_id": {"$in": list(removed)}}
+        )
+        sha256 = await asyncio.to_thread(_file_sha256, path)
+        await db[WORKBOOKS_COLLECTION].update_one(
+            {"_id": CURRENT_WORKBOOK_ID},
+            {"$set": {**_file_stamp(path), "sha256": sha256}, "$inc": {"row_count": -result.deleted_count}},
+        )
+    return removed
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from pymongo import UpdateOne
+
+from app.database.mongo import db
+from app.etsy.client import EtsyAPIError, get_etsy_client
+from app.services.etsy_excel_match_rows import CURRENT_WORKBOOK_ID, ROWS_COLLECTION, WORKBOOKS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_COLLECTION = "etsy_listing_image_cache"
+IMAGE_CACHE_TTL_SECONDS = 60 * 60 * 24 * 30
+# Listings Etsy answered without images (or with a 4xx) are retried sooner.
+IMAGE_CACHE_NEGATIVE_TTL_SECONDS = 60 * 60 * 24
+PREFETCH_CONCURRENCY = 6
+# Rows whose lookup failed are set aside with backoff so they do not block the
+# rest of the workbook; after the last attempt they are stamped without an image.
+PREFETCH_RETRY_BASE_SECONDS = 300
+PREFETCH_RETRY_MAX_SECONDS = 6 * 60 * 60
+PREFETCH_MAX_ATTEMPTS = 5
+IMAGE_URL_KEYS = ("url_fullxfull", "url_570xN", "url_170x135", "url_75x75")
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def first_image_url(images: Any) -> str | None:
+    if not isinstance(images, list) or not images or not isinstance(images[0], dict):
+        return None
+    for key in IMAGE_URL_KEYS:
+        value = images[0].get(key)
+        if value:
+            return str(value)
+    return None
+
+
+def etsy_image_from_doc(etsy_doc: dict | None) -> str | None:
+    """Main image of an etsy_listings_investigation doc."""
+    if not isinstance(etsy_doc, dict):
+        return None
+    return first_image_url((etsy_doc.get("raw") or {}).get("images"))
+
+
+async def ensure_etsy_image_cache_indexes() -> None:
+    await db[IMAGE_CACHE_COLLECTION].create_index(
+        [("expires_at", 1)],
+        name="idx_etsy_listing_image_cache_expires",
+        expireAfterSeconds=0,
+        background=True,
+    )
+
+
+async def cached_listing_images(listing_ids: Iterable[int]) -> dict[int, str | None]:
+    """Known main images from etsy_listings_investigation, then the image cache.
+
+    Listings missing from the result have never been looked up (or their
+    cache entry expired). A None value means Etsy had no image for them.
+    """
+    ids = list({int(listing_id) for listing_id in listing_ids})
+    known: dict[int, str | None] = {}
+    if not ids:
+        return known
+
+    async for doc in db.etsy_listings_investigation.find(
+        {"listing_id": {"$in": ids}},
+        {"_id": 0, "listing_id": 1, "raw.images": 1},
+    ):
+        image = etsy_image_from_doc(doc)
+        if image:
+            known[int(doc["listing_id"])] = image
+
+    remaining = [listing_id for listing_id in ids if listing_id not in known]
+    if remaining:
+        async for doc in db[IMAGE_CACHE_COLLECTION].find(
+            {"_id": {"$in": remaining}, "expires_at": {"$gt": _utc_now()}},
+            {"image_url": 1},
+        ):
+            known[int(doc["_id"])] = doc.get("image_url")
+    return known
+
+
+async def fetch_listing_image(listing_id: int) -> tuple[bool, str | None]:
+    """Look the listing up on Etsy and remember the answer.
+
+    Returns ``(resolved, image_url)``; throttling and server errors leave the
+    listing unresolved so a later pass retries it.
+    """
+    try:
+        images = await get_etsy_client().get_listing_images(listing_id)
+    except EtsyAPIError as exc:
+        if exc.status_code in (None, 429) or int(exc.status_code) >= 500:
+            logger.warning("Etsy images for listing %s unavailable: %s", listing_id, exc)
+            return False, None
+        images = []
+
+    now = _utc_now()
+    image_url = first_image_url(images)
+    ttl = IMAGE_CACHE_TTL_SECONDS if image_url else IMAGE_CACHE_NEGATIVE_TTL_SECONDS
+    await db[IMAGE_CACHE_COLLECTION].update_one(
+        {"_id": int(listing_id)},
+        {"$set": {"image_url": image_url, "images": images, "fetched_at": now, "expires_at": now + timedelta(seconds=ttl)}},
+        upsert=True,
+    )
+    if images:
+        # Keep the investigation snapshot complete for every other reader.
+        await db.etsy_listings_investigation.update_one(
+            {"listing_id": int(listing_id)},
+            {"$set": {"raw.images": images, "images_fetched_at": now}},
+        )
+    return True, image_url
+
+
+async def prefetch_workbook_images(limit: int, concurrency: int = PREFETCH_CONCURRENCY) -> dict[str, int]:
+    """Resolve the Etsy image of the next ``limit`` unchecked rows of the current workbook.
+
+    ``picked`` counts only rows that were resolved; rows left unresolved get
+    an ``image_retry_at`` and are skipped by later passes until then.
+    """
+    meta = await db[WORKBOOKS_COLLECTION].find_one({"_id": CURRENT_WORKBOOK_ID}, {"ingest_id": 1})
+    if not meta:
+        return {"picked": 0, "fetched": 0, "deferred": 0}
+
+    now = _utc_now()
+    rows = await (
+        db[ROWS_COLLECTION]
+        .find(
+            {
+                "ingest_id": meta["ingest_id"],
+                "image_checked_at": None,
+                "$or": [{"image_retry_at": None}, {"image_retry_at": {"$lte": now}}],
+            },
+            {"listing_id": 1, "image_attempts": 1},
+        )
+        .sort("position", 1)
+        .limit(max(1, int(limit)))
+        .to_list(None)
+    )
+    if not rows:
+        return {"picked": 0, "fetched": 0, "deferred": 0}
+
+    listing_ids = [row["listing_id"] for row in rows if row.get("listing_id") is not None]
+    images = await cached_listing_images(listing_ids)
+    missing = [listing_id for listing_id in dict.fromkeys(listing_ids) if listing_id not in images]
+
+    fetched = 0
+    # Without credentials nothing was tried, so the rows wait without using an attempt.
+    attempted = bool(missing)
+    if missing:
+        etsy = get_etsy_client()
+        try:
+            if not etsy.api_key:
+                raise ValueError("Missing Etsy API key")
+            await etsy.ensure_auth()
+        except ValueError as exc:
+            attempted = False
+            logger.info("Skipping Etsy image prefetch for %s listing(s): %s", len(missing), exc)
+        else:
+            await ensure_etsy_image_cache_indexes()
+            semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+            async def _fetch_one(listing_id: int) -> None:
+                nonlocal fetched
+                async with semaphore:
+                    resolved, image_url = await fetch_listing_image(listing_id)
+                if resolved:
+                    images[listing_id] = image_url
+                    fetched += 1
+
+            await asyncio.gather(*(_fetch_one(listing_id) for listing_id in missing))
+
+    now = _utc_now()
+    ops = []
+    resolved = deferred = 0
+    for row in rows:
+        attempts = int(row.get("image_attempts") or 0) + int(attempted)
+        if row.get("listing_id") is None or row["listing_id"] in images or attempts >= PREFETCH_MAX_ATTEMPTS:
+            resolved += 1
+            update = {"etsy_image": images.get(row.get("listing_id")), "image_checked_at": now, "image_retry_at": None}
+        else:
+            deferred += 1
+            delay = min(PREFETCH_RETRY_MAX_SECONDS, PREFETCH_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+            update = {"image_retry_at": now + timedelta(seconds=delay)}
+        ops.append(UpdateOne({"_id": row["_id"]}, {"$set": {**update, "image_attempts": attempts}}))
+    await db[ROWS_COLLECTION].bulk_write(ops, ordered=False)
+    return {"picked": resolved, "fetched": fetched, "deferred": deferred}
@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+from app.etsy.client import get_etsy_client
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_TIMEOUT_SECONDS = 60.0
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+# Prune the cache once this share of its budget has been written since the last prune.
+PRUNE_AFTER_FRACTION = 0.1
+
+UploadHook = Callable[[dict[str, Any]], Awaitable[None]]
+
+_http: httpx.AsyncClient | None = None
+_download_slots: asyncio.Semaphore | None = None
+_inflight: dict[str, asyncio.Task] = {}
+_bytes_since_prune = 0
+_prune_task: asyncio.Task | None = None
+stats = {
+    "cache_hits": 0,
+    "downloads": 0,
+    "coalesced": 0,
+    "download_errors": 0,
+    "bytes_downloaded": 0,
+    "uploads": 0,
+    "upload_errors": 0,
+    "pruned_files": 0,
+}
+
+
+class ImageDownloadError(Exception):
+    def __init__(self, status_code: int | None, message: str) -> None:
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def guess_image_filename(image_url: str, index: int) -> str:
+    name = Path(urlparse(image_url).path or "").name
+    if name:
+        return name
+    return f"image_{index}.jpg"
+
+
+def normalize_image_content_type(content_type: str | None, filename: str) -> str:
+    txt = (content_type or "").split(";")[0].strip().lower()
+    if txt.startswith("image/"):
+        return txt
+    guessed, _ = mimetypes.guess_type(filename)
+    if guessed and guessed.startswith("image/"):
+        return guessed
+    return "image/jpeg"
+
+
+def _cache_root() -> Path:
+    return Path(settings.ETSY_IMAGE_CACHE_DIR)
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _blob_path(sha256: str) -> Path:
+    return _cache_root() / "blobs" / sha256[:2] / sha256
+
+
+def _url_index_path(url: str) -> Path:
+    key = _url_key(url)
+    return _cache_root() / "urls" / key[:2] / f"{key}.json"
+
+
+def _get_http() -> httpx.AsyncClient:
+    # Source images live on eBay/Shopify CDNs, so downloads do not share the Etsy client.
+    global _http, _download_slots
+    if _http is None:
+        concurrency = max(1, int(settings.ETSY_IMAGE_DOWNLOAD_CONCURRENCY))
+        _http = httpx.AsyncClient(
+            timeout=DOWNLOAD_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        _download_slots = asyncio.Semaphore(concurrency)
+    return _http
+
+
+async def close_image_transfer_client() -> None:
+    global _http, _download_slots
+    if _http is not None:
+        await _http.aclose()
+    _http = None
+    _download_slots = None
+
+
+def _read_cached(url: str) -> dict[str, Any] | None:
+    try:
+        entry = json.loads(_url_index_path(url).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    blob = _blob_path(str(entry.get("sha256") or ""))
+    if not entry.get("sha256") or not blob.is_file():
+        return None
+    # mtime doubles as last use for pruning.
+    os.utime(blob)
+    return {**entry, "path": blob}
+
+
+def _write_json_atomic(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def _download(url: str) -> dict[str, Any]:
+    """Stream ``url`` to a temp file while hashing it, then move it to its content address."""
+    global _bytes_since_prune, _prune_task
+    client = _get_http()
+    tmp_dir = _cache_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with _download_slots:
+            async with client.stream("GET", url) as response:
+                if response.status_code >= 300:
+                    raise ImageDownloadError(response.status_code, "image_download_failed")
+                content_type = response.headers.get("content-type")
+                with tmp.open("wb") as handle:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                        digest.update(chunk)
+                        handle.write(chunk)
+                        size += len(chunk)
+        if size == 0:
+            raise ImageDownloadError(None, "image_download_empty")
+
+        sha256 = digest.hexdigest()
+        blob = _blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Same bytes from another URL are already stored; keep one copy.
+        if blob.exists():
+            tmp.unlink()
+        else:
+            os.replace(tmp, blob)
+        entry = {"url": url, "sha256": sha256, "size": size, "content_type": content_type, "fetched_at": time.time()}
+        _write_json_atomic(_url_index_path(url), entry)
+    except BaseException as exc:
+        tmp.unlink(missing_ok=True)
+        if isinstance(exc, Exception):
+            stats["download_errors"] += 1
+        raise
+
+    stats["downloads"] += 1
+    stats["bytes_downloaded"] += size
+    _bytes_since_prune += size
+    if _bytes_since_prune >= int(settings.ETSY_IMAGE_CACHE_MAX_BYTES) * PRUNE_AFTER_FRACTION and (
+        _prune_task is None or _prune_task.done()
+    ):
+        _bytes_since_prune = 0
+        _prune_task = asyncio.create_task(asyncio.to_thread(prune_image_cache), name="etsy-image-cache-prune")
+    return {**entry, "path": blob}
+
+
+async def fetch_image(url: str) -> dict[str, Any]:
+    """Local copy of ``url``: ``{path, sha256, size, content_type, cached}``.
+
+    Served from the disk cache when present. Concurrent requests for one URL
+    share a single download. Raises ImageDownloadError (or an httpx error).
+    """
+    cached = _read_cached(url)
+    if cached is not None:
+        stats["cache_hits"] += 1
+        return {**cached, "cached": True}
+
+    task = _inflight.get(url)
+    if task is not None:
+        stats["coalesced"] += 1
+    else:
+        task = asyncio.create_task(_download(url), name="etsy-image-download")
+        _inflight[url] = task
+        task.add_done_callback(lambda done, url=url: _inflight.pop(url, None))
+    entry = await asyncio.shield(task)
+    return {**entry, "cached": False}
+
+
+def prune_image_cache(max_bytes: int | None = None) -> dict[str, int]:
+    """Delete least recently used blobs until the cache fits ``max_bytes``.
+
+    URL index entries pointing at a deleted blob are treated as misses.
+    """
+    budget = int(settings.ETSY_IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+    blobs = []
+    for path in (_cache_root() / "blobs").glob("*/*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        blobs.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in blobs)
+    removed = 0
+    for _, size, path in sorted(blobs):
+        if total <= budget:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    stats["pruned_files"] += removed
+    return {"files": len(blobs) - removed, "bytes": total, "removed": removed}
+
+
+def _response_payload(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except Exception:
+        return response.text
+
+
+async def _upload_one(
+    *,
+    shop_id: str | int,
+    listing_id: int,
+    image_url: str,
+    rank: int,
+    upload_slots: asyncio.Semaphore,
+    on_uploaded: UploadHook | None,
+) -> dict[str, Any]:
+    entry: dict[str, Any] = {"rank": rank, "image_url": image_url, "uploaded": False}
+    try:
+        image = await fetch_image(image_url)
+    except ImageDownloadError as exc:
+        entry["error"] = str(exc)
+        if exc.status_code is not None:
+            entry["download_status"] = exc.status_code
+        return entry
+    except Exception as exc:
+        entry["error"] = "image_download_failed"
+        entry["message"] = str(exc)
+        return entry
+
+    entry.update({"sha256": image["sha256"], "bytes": image["size"], "cached": image["cached"]})
+    filename = guess_image_filename(image_url, rank)
+    content_type = normalize_image_content_type(image.get("content_type"), filename)
+    try:
+        async with upload_slots:
+            # The open file is streamed into the multipart body, not read into memory.
+            with Path(image["path"]).open("rb") as handle:
+                response = await get_etsy_client().upload_listing_image(
+                    shop_id,
+                    listing_id,
+                    filename=filename,
+                    content=handle,
+                    content_type=content_type,
+                    rank=rank,
+                )
+    except Exception as exc:
+        stats["upload_errors"] += 1
+        entry["error"] = "image_upload_exception"
+        entry["message"] = str(exc)
+        return entry
+
+    stats["uploads"] += 1
+    entry["upload_status"] = response.status_code
+    entry["etsy_response"] = _response_payload(response)
+    if response.status_code >= 300:
+        stats["upload_errors"] += 1
+        entry["error"] = "etsy_image_upload_failed"
+        return entry
+
+    entry["uploaded"] = True
+    if isinstance(entry["etsy_response"], dict):
+        entry["listing_image_id"] = entry["etsy_response"].get("listing_image_id")
+    if on_uploaded is not None:
+        await on_uploaded(entry)
+    return entry
+
+
+async def upload_listing_images(
+    *,
+    shop_id: str | int,
+    listing_id: int,
+    images: list[tuple[int, str]],
+    on_uploaded: UploadHook | None = None,
+) -> list[dict[str, Any]]:
+    """Download (or reuse) and upload ``images``, a list of ``(rank, url)``.
+
+    All downloads start at once through the shared download pool. Rank 1, when
+    present, is uploaded on its own first so it becomes the primary image; the
+    rest go up ETSY_IMAGE_UPLOAD_CONCURRENCY at a time, each with an explicit
+    rank, still paced by the Etsy client. ``on_uploaded`` is awaited with each
+    successful entry as soon as Etsy accepts it, so callers can record
+    progress. Completion order can shuffle ranks on Etsy; follow up with
+    reconcile_listing_image_order. Returns one result per image, in rank order.
+    """
+    images = sorted(images)
+    if not images:
+        return []
+    upload_slots = asyncio.Semaphore(max(1, int(settings.ETSY_IMAGE_UPLOAD_CONCURRENCY)))
+
+    def _upload(rank: int, url: str) -> Awaitable[dict[str, Any]]:
+        return _upload_one(
+            shop_id=shop_id,
+            listing_id=listing_id,
+            image_url=url,
+            rank=rank,
+            upload_slots=upload_slots,
+            on_uploaded=on_uploaded,
+        )
+
+    # Warm every download right away; uploads pick them up as they finish.
+    prefetch = [asyncio.create_task(fetch_image(url)) for url in dict.fromkeys(url for _, url in images)]
+    try:
+        results = []
+        if images[0][0] == 1:
+            results.append(await _upload(*images[0]))
+            images = images[1:]
+        results.extend(await asyncio.gather(*(_upload(rank, url) for rank, url in images)))
+    finally:
+        # Failures were already reported per image; just collect the tasks.
+        await asyncio.gather(*prefetch, return_exceptions=True)
+    return results
+
+
+async def reconcile_listing_image_order(
+    shop_id: str | int,
+    listing_id: int,
+    image_ids_by_rank: dict[int, int],
+) -> int:
+    """Move each image in ``image_ids_by_rank`` to its rank; returns how many were moved.
+
+    Images not in the mapping are left alone. Moves go in ascending rank, so
+    each one settles the prefix before the next.
+    """
+    etsy = get_etsy_client()
+
+    async def _ranks() -> dict[int, Any]:
+        return {
+            int(image["listing_image_id"]): image.get("rank")
+            for image in await etsy.get_listing_images(listing_id)
+            if image.get("listing_image_id") is not None
+        }
+
+    current = await _ranks()
+    moved = 0
+    for rank, listing_image_id in sorted(image_ids_by_rank.items()):
+        listing_image_id = int(listing_image_id)
+        if listing_image_id not in current or current[listing_image_id] == rank:
+            continue
+        await etsy.rerank_listing_image(shop_id, listing_id, listing_image_id=listing_image_id, rank=rank)
+        moved += 1
+        # A move shifts its neighbours, so read the order again.
+        current = await _ranks()
+    return moved
+
+
+def get_image_transfer_status() -> dict[str, Any]:
+    return {
+        "cache_dir": str(_cache_root()),
+        "max_bytes": int(settings.ETSY_IMAGE_CACHE_MAX_BYTES),
+        "download_concurrency": int(settings.ETSY_IMAGE_DOWNLOAD_CONCURRENCY),
+        "upload_concurrency": int(settings.ETSY_IMAGE_UPLOAD_CONCURRENCY),
+        "inflight_downloads": len(_inflight),
+        "stats": dict(stats),
+    }
@@ -154,8 +154,13 @@ async def handle_etsy_event(
                 enqueue_jobs_flag=True,
             )
 
-        # Small worker pass for near-real-time propagation.
-        worker_result = await run_worker_batch(limit=10)
+        from app.services.background_job_runner import MULTICHANNEL_QUEUE, wake_background_jobs
+
+        if wake_background_jobs(MULTICHANNEL_QUEUE):
+            worker_result = {"status": "handed_to_background_runner"}
+        else:
+            # Small worker pass for near-real-time propagation.
+            worker_result = await run_worker_batch(limit=10)
         sync_result["worker"] = worker_result
 
     doc = {
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import time
 import uuid
 from typing import Any, Awaitable, Callable
@@ -11,6 +12,8 @@ from typing import Any, Awaitable, Callable
 _JOBS: dict[str, dict[str, Any]] = {}
 _LOCK = asyncio.Lock()
 _MAX_JOBS = 200
+# Id of the tracked job whose task is running, for report_job_progress().
+_CURRENT_JOB_ID: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_job_id", default=None)
 
 
 def _prune_jobs_unlocked() -> None:
@@ -37,6 +40,7 @@ async def start_job(name: str, fn: Callable[[], Awaitable[Any]]) -> dict[str, An
         "finished_at": None,
         "result": None,
         "error": None,
+        "progress": None,
     }
 
     async with _LOCK:
@@ -44,6 +48,7 @@ async def start_job(name: str, fn: Callable[[], Awaitable[Any]]) -> dict[str, An
         _prune_jobs_unlocked()
 
     async def _runner() -> None:
+        _CURRENT_JOB_ID.set(job_id)
         try:
             result = await fn()
             status = "completed"
@@ -70,6 +75,18 @@ async def start_job(name: str, fn: Callable[[], Awaitable[Any]]) -> dict[str, An
     return dict(job)
 
 
+def report_job_progress(progress: dict[str, Any]) -> bool:
+    """Publish progress for the tracked job running in the current task.
+
+    Returns False when called outside a tracked job (scripts, inline runs).
+    """
+    job = _JOBS.get(_CURRENT_JOB_ID.get() or "")
+    if job is None:
+        return False
+    job["progress"] = {**progress, "updated_at": time.time()}
+    return True
+
+
 async def get_job(job_id: str) -> dict[str, Any] | None:
     async with _LOCK:
         job = _JOBS.get(job_id)
@@ -1,22 +1,33 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import hashlib
 import json
 import logging
+import time
+import weakref
 import xml.etree.ElementTree as ET
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from typing import Any
 from urllib.parse import urlparse
+from xml.sax.saxutils import escape as xml_escape
 
-import httpx
-from pymongo import ReturnDocument
+from aiolimiter import AsyncLimiter
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from app.config import settings
 from app.database.mongo import db
 from app.ebay.client import EbayClient
-from app.services.channel_utils import get_channel, get_shopify_field
-from app.services.etsy_auth_service import get_valid_token as get_valid_etsy_token
+from app.etsy.client import EtsyAPIError, get_etsy_client
+from app.services.channel_utils import channel_quantity, get_channel, get_shopify_field, is_channel_linked
+from app.services.conflict_policy_cache import POLICIES_COLLECTION, get_conflict_policy_cache
+from app.services.dashboard_pagination import COMMAND_CENTER_SORT, split_page, with_cursor
+from app.services.drift_counters import get_kpi_counters
+from app.services.search_index import search_filter
+from app.services.ttl_cache import get_ttl_cache
 from app.shopify.client import ShopifyClient
 from app.shopify.update_inventory import set_inventory_from_mongo
 
@@ -24,14 +35,49 @@ logger = logging.getLogger(__name__)
 
 EVENTS_COLLECTION = "inventory_events"
 JOBS_COLLECTION = "channel_sync_jobs"
-POLICIES_COLLECTION = "inventory_conflict_policies"
 POLICY_HISTORY_COLLECTION = "inventory_policy_history"
 MAX_JOB_ATTEMPTS = 5
+# A claimed job is reclaimable once its lease expires (crashed/killed worker).
+JOB_LEASE_SECONDS = 300
+JOB_RETRY_BASE_SECONDS = 30
+JOB_RETRY_MAX_SECONDS = 1800
 KPI_CACHE_TTL_SECONDS = 90
-_live_kpi_cache: dict[str, Any] = {
-    "expires_at": None,
-    "payload": None,
+# Past the TTL, the last live KPIs are served this long while one refresh runs.
+KPI_CACHE_STALE_SECONDS = 600
+CHANNEL_THROUGHPUT_WINDOW_SECONDS = 300
+# Trading API limit for InventoryStatus nodes per ReviseInventoryStatus call.
+EBAY_REVISE_INVENTORY_MAX_ITEMS = 4
+RECONCILE_WRITE_BATCH_SIZE = 1000
+# A "pending" sale event older than this was abandoned mid-apply and may be reclaimed.
+SALE_EVENT_PENDING_TIMEOUT_SECONDS = 60
+# Recent sale event ids kept on each product doc to make the decrement idempotent.
+SALE_EVENT_HISTORY = 50
+# A cached Etsy inventory template is re-read after this long, so price or
+# state edits made on Etsy are not replayed by quantity pushes for longer.
+ETSY_INVENTORY_TEMPLATE_TTL_SECONDS = 300
+ALL_CHANNELS = ("ebay", "etsy", "shopify")
+# Everything is_channel_linked and channel_quantity read.
+RECONCILE_PROJECTION = {
+    "_id": 1,
+    "quantity": 1,
+    "inventory_quantity": 1,
+    "shopify_id": 1,
+    "inventory_item_id": 1,
+    "shopify_variant_id": 1,
+    "channels.ebay.quantity": 1,
+    "channels.etsy.quantity": 1,
+    "channels.etsy.listing_id": 1,
+    "channels.shopify.quantity": 1,
+    "channels.shopify.inventory_quantity": 1,
+    "channels.shopify.shopify_id": 1,
+    "channels.shopify.inventory_item_id": 1,
+    "channels.shopify.shopify_variant_id": 1,
 }
+_live_kpi_cache = get_ttl_cache(
+    "live_api_kpis",
+    ttl_seconds=KPI_CACHE_TTL_SECONDS,
+    stale_seconds=KPI_CACHE_STALE_SECONDS,
+)
 
 
 def _utc_now() -> datetime:
@@ -46,12 +92,6 @@ def _as_aware_utc(value: Any) -> datetime | None:
     return value
 
 
-def _resolve_etsy_api_key() -> str | None:
-    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
-        return f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
-    return settings.ETSY_CLIENT_ID
-
-
 async def _resolve_etsy_shop_id() -> str | None:
     # Prefer linked normalized channel metadata.
     doc = await db.product_normalized.find_one(
@@ -116,61 +156,23 @@ async def _fetch_ebay_active_total() -> tuple[int | None, str | None]:
         return None, str(exc)
 
 
-async def _fetch_etsy_state_count(
-    *,
-    client: httpx.AsyncClient,
-    headers: dict[str, str],
-    shop_id: str,
-    state: str,
-) -> int:
-    limit = 100
-    offset = 0
-    total = 0
-
-    while True:
-        response = await client.get(
-            f"https://openapi.etsy.com/v3/application/shops/{shop_id}/listings",
-            headers=headers,
-            params={"state": state, "limit": limit, "offset": offset},
-        )
-        response.raise_for_status()
-
-        payload = response.json() if response.content else {}
-        rows = payload.get("results") or []
-        total += len(rows)
-
-        if len(rows) < limit:
-            break
-        offset += limit
-
-    return total
-
-
 async def _fetch_etsy_counts() -> tuple[dict[str, int] | None, str | None]:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
+        return None, "missing_etsy_api_key"
     try:
-        token = await get_valid_etsy_token()
+        await etsy.ensure_auth()
     except ValueError:
         return None, "missing_etsy_token"
 
-    api_key = _resolve_etsy_api_key()
-    if not api_key:
-        return None, "missing_etsy_api_key"
-
     shop_id = await _resolve_etsy_shop_id()
     if not shop_id:
         return None, "missing_etsy_shop_id"
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": api_key,
-        "Accept": "application/json",
-    }
-
     try:
-        async with httpx.AsyncClient(timeout=45.0) as client:
-            active = await _fetch_etsy_state_count(client=client, headers=headers, shop_id=shop_id, state="active")
-            draft = await _fetch_etsy_state_count(client=client, headers=headers, shop_id=shop_id, state="draft")
-            sold_out = await _fetch_etsy_state_count(client=client, headers=headers, shop_id=shop_id, state="sold_out")
+        active = await etsy.count_shop_listings(shop_id, state="active")
+        draft = await etsy.count_shop_listings(shop_id, state="draft")
+        sold_out = await etsy.count_shop_listings(shop_id, state="sold_out")
 
         return {
             "active": int(active),
@@ -195,13 +197,8 @@ async def _fetch_shopify_product_total() -> tuple[int | None, str | None]:
         return None, str(exc)
 
 
-async def _get_live_api_kpis() -> dict[str, Any]:
+async def _load_live_api_kpis() -> dict[str, Any]:
     now = _utc_now()
-    expires_at = _as_aware_utc(_live_kpi_cache.get("expires_at"))
-    cached_payload = _live_kpi_cache.get("payload")
-    if expires_at and cached_payload and expires_at > now:
-        return cached_payload
-
     ebay_total, ebay_error = await _fetch_ebay_active_total()
     etsy_counts, etsy_error = await _fetch_etsy_counts()
     shopify_total, shopify_error = await _fetch_shopify_product_total()
@@ -224,12 +221,13 @@ async def _get_live_api_kpis() -> dict[str, Any]:
             "shopify": shopify_error,
         },
     }
-
-    _live_kpi_cache["payload"] = payload
-    _live_kpi_cache["expires_at"] = now + timedelta(seconds=KPI_CACHE_TTL_SECONDS)
     return payload
 
 
+async def _get_live_api_kpis() -> dict[str, Any]:
+    return await _live_kpi_cache.get("all", _load_live_api_kpis)
+
+
 def _safe_int(value: Any, default: int = 0) -> int:
     try:
         return int(value)
@@ -250,37 +248,6 @@ def _iter_target_channels(source_channel: str) -> list[str]:
     return [channel for channel in all_channels if channel != source_channel]
 
 
-def _extract_channel_qty(doc: dict[str, Any], channel: str) -> int | None:
-    if channel == "shopify":
-        value = get_shopify_field(doc, "quantity")
-        if value is None:
-            value = get_shopify_field(doc, "inventory_quantity")
-    else:
-        value = get_channel(doc, channel).get("quantity")
-    if value is None:
-        return None
-    try:
-        return int(value)
-    except Exception:
-        return None
-
-
-def _is_channel_linked(doc: dict[str, Any], channel: str) -> bool:
-    if channel == "shopify":
-        return bool(
-            get_shopify_field(doc, "shopify_id")
-            or get_shopify_field(doc, "inventory_item_id")
-            or get_shopify_field(doc, "shopify_variant_id")
-        )
-    if channel == "etsy":
-        etsy = get_channel(doc, "etsy")
-        return bool(etsy.get("listing_id"))
-    if channel == "ebay":
-        # We can still enqueue and let the worker resolve item id from product_raw.
-        return True
-    return False
-
-
 def _normalize_channel(value: str | None) -> str | None:
     if value is None:
         return None
@@ -312,7 +279,12 @@ def _shopify_admin_product_url(shopify_store_url: str | None, shopify_id: object
 
 
 async def get_conflict_policy(sku: str) -> dict[str, Any]:
-    doc = await db[POLICIES_COLLECTION].find_one({"_id": str(sku)})
+    """Policy for ``sku`` from the process-local cache (defaults when it has none)."""
+    doc = await get_conflict_policy_cache().get_doc(str(sku))
+    return _policy_from_doc(str(sku), doc)
+
+
+def _policy_from_doc(sku: str, doc: dict[str, Any] | None) -> dict[str, Any]:
     if not doc:
         return {
             "sku": str(sku),
@@ -351,14 +323,16 @@ async def set_conflict_policy(
         "updated_at": _utc_now(),
     }
 
-    await db[POLICIES_COLLECTION].update_one(
+    doc = await db[POLICIES_COLLECTION].find_one_and_update(
         {"_id": str(sku)},
         {
             "$set": update_data,
             "$setOnInsert": {"created_at": _utc_now()},
         },
         upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
+    get_conflict_policy_cache().put(str(sku), doc)
 
     await db[POLICY_HISTORY_COLLECTION].insert_one(
         {
@@ -371,7 +345,7 @@ async def set_conflict_policy(
         }
     )
 
-    return await get_conflict_policy(str(sku))
+    return _policy_from_doc(str(sku), doc)
 
 
 async def get_item_timeline(*, sku: str, limit: int = 100) -> dict[str, Any]:
@@ -427,6 +401,7 @@ async def get_item_timeline(*, sku: str, limit: int = 100) -> dict[str, Any]:
             "reason": 1,
             "etsy_state_target": 1,
             "sync_note": 1,
+            "superseded_by": 1,
             "created_at": 1,
             "started_at": 1,
             "finished_at": 1,
@@ -481,6 +456,7 @@ async def get_item_timeline(*, sku: str, limit: int = 100) -> dict[str, Any]:
                     "reason": job.get("reason"),
                     "etsy_state_target": job.get("etsy_state_target"),
                     "sync_note": job.get("sync_note"),
+                    "superseded_by": job.get("superseded_by"),
                 },
                 "raw": job,
             }
@@ -565,6 +541,7 @@ async def replay_failed_jobs(
             "$set": {
                 "status": "retry",
                 "error": None,
+                "next_attempt_at": None,
                 "updated_at": _utc_now(),
                 "replay_requested_at": _utc_now(),
             }
@@ -578,6 +555,32 @@ async def replay_failed_jobs(
     }
 
 
+def _reconcile_job_upsert(
+    *,
+    sku: str,
+    channel: str,
+    target_qty: int,
+    event_id: str,
+    reason: str,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    job_id = f"{event_id}:{channel}"
+    now = _utc_now()
+    return {"_id": job_id}, {
+        "$setOnInsert": {
+            "_id": job_id,
+            "event_id": event_id,
+            "sku": sku,
+            "target_channel": channel,
+            "target_qty": int(target_qty),
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            "reason": reason,
+        },
+        "$set": {"updated_at": now},
+    }
+
+
 async def enqueue_reconcile_jobs_for_sku(
     *,
     sku: str,
@@ -613,29 +616,18 @@ async def enqueue_reconcile_jobs_for_sku(
     skipped_unlinked = 0
 
     for channel in normalized_channels:
-        if not _is_channel_linked(doc, channel):
+        if not is_channel_linked(doc, channel):
             skipped_unlinked += 1
             continue
 
-        job_id = f"{event_id}:{channel}"
-        result = await db[JOBS_COLLECTION].update_one(
-            {"_id": job_id},
-            {
-                "$setOnInsert": {
-                    "_id": job_id,
-                    "event_id": event_id,
-                    "sku": str(sku),
-                    "target_channel": channel,
-                    "target_qty": int(canonical_qty),
-                    "status": "queued",
-                    "attempts": 0,
-                    "created_at": _utc_now(),
-                    "reason": reason,
-                },
-                "$set": {"updated_at": _utc_now()},
-            },
-            upsert=True,
+        job_filter, job_update = _reconcile_job_upsert(
+            sku=str(sku),
+            channel=channel,
+            target_qty=canonical_qty,
+            event_id=event_id,
+            reason=reason,
         )
+        result = await db[JOBS_COLLECTION].update_one(job_filter, job_update, upsert=True)
         if getattr(result, "upserted_id", None):
             queued += 1
 
@@ -650,26 +642,120 @@ async def enqueue_reconcile_jobs_for_sku(
     }
 
 
+async def reconcile_catalog_drift(
+    *,
+    target_channels: list[str] | None = None,
+    reason: str = "catalog_reconcile",
+    dry_run: bool = False,
+    batch_size: int = RECONCILE_WRITE_BATCH_SIZE,
+) -> dict[str, Any]:
+    """Queue a push for every linked channel whose quantity differs from canonical.
+
+    One streaming pass over product_normalized with a narrow projection;
+    drift is computed in memory and jobs are written with unordered bulk
+    upserts. Channels whose quantity has never been recorded are counted as
+    unknown and left alone.
+    """
+    started = time.perf_counter()
+    requested = target_channels or list(ALL_CHANNELS)
+    channels = [channel for channel in (_normalize_channel(c) for c in requested) if channel]
+    if not channels:
+        return {"ok": False, "reason": "no_valid_channels"}
+
+    timestamp = int(_utc_now().timestamp())
+    by_channel = {
+        channel: {"linked": 0, "in_sync": 0, "drifted": 0, "unknown_qty": 0, "queued": 0}
+        for channel in channels
+    }
+    scanned = 0
+    drifted_skus = 0
+    pending: list[tuple[str, UpdateOne]] = []
+
+    async def _flush() -> None:
+        if not pending:
+            return
+        ops = [op for _channel, op in pending]
+        channel_by_index = [channel for channel, _op in pending]
+        pending.clear()
+        result = await db[JOBS_COLLECTION].bulk_write(ops, ordered=False)
+        for index in (getattr(result, "upserted_ids", None) or {}):
+            by_channel[channel_by_index[index]]["queued"] += 1
+
+    cursor = db.product_normalized.find({}, RECONCILE_PROJECTION).batch_size(batch_size)
+    async for doc in cursor:
+        scanned += 1
+        sku = str(doc.get("_id"))
+        canonical_qty = max(0, _safe_int(doc.get("quantity"), 0))
+        event_id = f"reconcile:{sku}:{timestamp}"
+        sku_drifted = False
+
+        for channel in channels:
+            if not is_channel_linked(doc, channel):
+                continue
+            stats = by_channel[channel]
+            stats["linked"] += 1
+            channel_qty = channel_quantity(doc, channel)
+            if channel_qty is None:
+                stats["unknown_qty"] += 1
+                continue
+            if channel_qty == canonical_qty:
+                stats["in_sync"] += 1
+                continue
+
+            stats["drifted"] += 1
+            sku_drifted = True
+            if dry_run:
+                continue
+            job_filter, job_update = _reconcile_job_upsert(
+                sku=sku,
+                channel=channel,
+                target_qty=canonical_qty,
+                event_id=event_id,
+                reason=reason,
+            )
+            pending.append((channel, UpdateOne(job_filter, job_update, upsert=True)))
+
+        drifted_skus += int(sku_drifted)
+        if len(pending) >= batch_size:
+            await _flush()
+
+    await _flush()
+
+    queued = sum(stats["queued"] for stats in by_channel.values())
+    if queued:
+        from app.services.background_job_runner import MULTICHANNEL_QUEUE, wake_background_jobs
+
+        wake_background_jobs(MULTICHANNEL_QUEUE)
+
+    return {
+        "ok": True,
+        "dry_run": dry_run,
+        "reason": reason,
+        "channels": channels,
+        "scanned": scanned,
+        "drifted_skus": drifted_skus,
+        "queued": queued,
+        "by_channel": by_channel,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
 async def get_inventory_command_center(
     *,
     status: str | None = None,
     drift_only: bool = False,
     search: str | None = None,
     limit: int = 100,
-    skip: int = 0,
+    cursor: str | None = None,
 ) -> dict[str, Any]:
+    """Command-center rows ordered by updated_at, paged with a keyset cursor.
+
+    Raises InvalidCursor for a token that does not belong to this list.
+    """
     # Allow larger pages for operations review while still guarding extremes.
     max_limit = max(1, min(int(limit), 5000))
-    offset = max(0, int(skip))
 
-    query: dict[str, Any] = {}
-    if search:
-        safe_search = str(search).strip()
-        if safe_search:
-            query["$or"] = [
-                {"_id": {"$regex": safe_search, "$options": "i"}},
-                {"title": {"$regex": safe_search, "$options": "i"}},
-            ]
+    query: dict[str, Any] = search_filter(search) if search else {}
 
     projection = {
         "_id": 1,
@@ -683,8 +769,13 @@ async def get_inventory_command_center(
     }
 
     total = await db.product_normalized.count_documents(query)
-    cursor = db.product_normalized.find(query, projection).sort("updated_at", -1).skip(offset).limit(max_limit)
-    products = [doc async for doc in cursor]
+    products = await (
+        db.product_normalized.find(with_cursor(query, cursor, COMMAND_CENTER_SORT), projection)
+        .sort(COMMAND_CENTER_SORT)
+        .limit(max_limit + 1)
+        .to_list(length=max_limit + 1)
+    )
+    products, next_cursor = split_page(products, COMMAND_CENTER_SORT, max_limit)
 
     skus = [str(doc.get("_id")) for doc in products if doc.get("_id")]
     job_stats: dict[str, dict[str, int]] = {sku: {} for sku in skus}
@@ -738,8 +829,8 @@ async def get_inventory_command_center(
 
         # eBay is the source of truth: mirror canonical Mongo quantity for eBay view.
         ebay_qty = canonical_qty
-        etsy_qty = _extract_channel_qty(doc, "etsy")
-        shopify_qty = _extract_channel_qty(doc, "shopify")
+        etsy_qty = channel_quantity(doc, "etsy")
+        shopify_qty = channel_quantity(doc, "shopify")
 
         drift_ebay = None if ebay_qty is None else ebay_qty - canonical_qty
         drift_etsy = None if etsy_qty is None else etsy_qty - canonical_qty
@@ -847,8 +938,9 @@ async def get_inventory_command_center(
             "drift_only": bool(drift_only),
             "search": search or "",
             "limit": max_limit,
-            "skip": offset,
+            "cursor": cursor,
         },
+        "next_cursor": next_cursor,
         "total_products": total,
         "returned": len(rows_out),
         "status_counts": status_counts,
@@ -934,13 +1026,6 @@ async def _resolve_sku_from_etsy_listing_id(listing_id: Any) -> str | None:
     return str(doc.get("_id"))
 
 
-async def _get_etsy_access_token() -> str | None:
-    try:
-        return await get_valid_etsy_token()
-    except ValueError:
-        return None
-
-
 async def get_etsy_receipt_transactions_from_payload(payload: dict[str, Any]) -> list[dict[str, Any]]:
     parsed = _parse_etsy_resource_url(payload.get("resource_url"))
 
@@ -952,9 +1037,10 @@ async def get_etsy_receipt_transactions_from_payload(payload: dict[str, Any]) ->
     if receipt_id_int <= 0 or shop_id_int <= 0:
         return []
 
-    token = await _get_etsy_access_token()
-    api_key = _resolve_etsy_api_key()
-    if not token or not api_key:
+    etsy = get_etsy_client()
+    try:
+        await etsy.ensure_auth()
+    except ValueError:
         logger.warning(
             "Cannot resolve Etsy receipt transactions: missing auth | shop_id=%s | receipt_id=%s",
             shop_id_int,
@@ -962,29 +1048,8 @@ async def get_etsy_receipt_transactions_from_payload(payload: dict[str, Any]) ->
         )
         return []
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": api_key,
-        "Accept": "application/json",
-    }
-
-    url = f"https://openapi.etsy.com/v3/application/shops/{shop_id_int}/receipts/{receipt_id_int}/transactions"
-    limit = 100
-    offset = 0
-    transactions: list[dict[str, Any]] = []
-
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            while True:
-                response = await client.get(url, headers=headers, params={"limit": limit, "offset": offset})
-                response.raise_for_status()
-                body = response.json() if response.content else {}
-                rows = body.get("results") or []
-                transactions.extend([row for row in rows if isinstance(row, dict)])
-
-                if len(rows) < limit:
-                    break
-                offset += limit
+        return await etsy.get_receipt_transactions(shop_id_int, receipt_id_int)
     except Exception:
         logger.exception(
             "Failed to fetch Etsy receipt transactions | shop_id=%s | receipt_id=%s",
@@ -993,8 +1058,6 @@ async def get_etsy_receipt_transactions_from_payload(payload: dict[str, Any]) ->
         )
         return []
 
-    return transactions
-
 
 def _etsy_tx_event_id(base_event_id: str, tx: dict[str, Any], index: int) -> str:
     tx_id = tx.get("transaction_id")
@@ -1203,6 +1266,75 @@ async def enqueue_inventory_jobs(
     return {"queued": queued, "deduped": deduped}
 
 
+async def _claim_sale_event(event_id: str, doc: dict[str, Any]) -> bool:
+    """Insert the event unless it already exists; False means it is a duplicate.
+
+    A "pending" event whose claim is older than SALE_EVENT_PENDING_TIMEOUT_SECONDS
+    was left by a process that died before finishing it, so a redelivery takes it
+    over. The decrement is idempotent per event, so re-running it is safe.
+    """
+    now = _utc_now()
+    try:
+        existing = await db[EVENTS_COLLECTION].find_one_and_update(
+            {"_id": event_id},
+            {"$setOnInsert": {**doc, "claimed_at": now}},
+            projection={"status": 1, "claimed_at": 1, "created_at": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        return False
+    if existing is None:
+        return True
+    if existing.get("status") != "pending" or doc.get("status") != "pending":
+        return False
+
+    claimed_at = existing.get("claimed_at")
+    claimed = _as_aware_utc(claimed_at or existing.get("created_at"))
+    if claimed is not None and claimed > now - timedelta(seconds=SALE_EVENT_PENDING_TIMEOUT_SECONDS):
+        return False
+    result = await db[EVENTS_COLLECTION].update_one(
+        {"_id": event_id, "status": "pending", "claimed_at": claimed_at},
+        {"$set": {"claimed_at": now}},
+    )
+    if result.modified_count:
+        logger.warning("Reclaimed stale pending sale event %s", event_id)
+    return bool(result.modified_count)
+
+
+def _sale_decrement_pipeline(event_id: str, sold_qty: int, now: datetime) -> list[dict[str, Any]]:
+    # $inc cannot be clamped in the same update, so the decrement is an
+    # update pipeline: quantity = max(0, max(0, quantity) - sold_qty). The
+    # event is appended to a short sale_events history in the same write, and
+    # an event already in it leaves the doc unchanged, so a reclaimed event
+    # cannot decrement twice.
+    current = {"$max": [0, {"$convert": {"input": "$quantity", "to": "int", "onError": 0, "onNull": 0}}]}
+    after = {"$max": [0, {"$subtract": [current, int(sold_qty)]}]}
+    history = {"$ifNull": ["$sale_events", []]}
+    applied = {"$in": [{"$literal": event_id}, {"$ifNull": ["$sale_events.event_id", []]}]}
+    entry = {
+        "event_id": {"$literal": event_id},
+        "quantity_before": current,
+        "quantity_after": after,
+        "applied_at": {"$literal": now},
+    }
+    return [
+        {
+            "$set": {
+                "quantity": {"$cond": [applied, "$quantity", after]},
+                "sale_events": {
+                    "$cond": [
+                        applied,
+                        history,
+                        {"$slice": [{"$concatArrays": [history, [entry]]}, -SALE_EVENT_HISTORY]},
+                    ]
+                },
+                "updated_at": {"$cond": [applied, "$updated_at", {"$literal": now}]},
+            }
+        }
+    ]
+
+
 async def ingest_sale_event(
     *,
     source_channel: str,
@@ -1212,128 +1344,93 @@ async def ingest_sale_event(
     explicit_event_id: str | None = None,
     enqueue_jobs_flag: bool = True,
 ) -> dict[str, Any]:
+    """Record a sale and decrement the canonical quantity exactly once.
+
+    An applied sale takes three writes: the event is claimed with an upsert
+    keyed by event_id, the decrement is one find_one_and_update (so concurrent
+    sales of one SKU cannot overwrite each other), and the event is marked
+    applied. The decrement also records event_id on the product, so a stale
+    pending event reclaimed after a crash is not decremented twice.
+    """
     payload = payload or {}
     sold_qty = max(1, _safe_int(quantity_sold, 1))
 
     sku = await _resolve_sku(source_channel, payload, explicit_sku)
     event_id = explicit_event_id or _event_id(source_channel, payload, sku, sold_qty)
 
-    exists = await db[EVENTS_COLLECTION].find_one({"_id": event_id}, {"_id": 1, "status": 1})
-    if exists:
-        return {
-            "event_id": event_id,
-            "status": "duplicate",
-            "sku": sku,
-        }
+    event_doc: dict[str, Any] = {
+        "source_channel": source_channel,
+        "type": "sale",
+        "quantity_sold": sold_qty,
+        "payload": payload,
+        "created_at": _utc_now(),
+    }
 
     if not sku:
-        await db[EVENTS_COLLECTION].insert_one(
-            {
-                "_id": event_id,
-                "source_channel": source_channel,
-                "type": "sale",
-                "quantity_sold": sold_qty,
-                "status": "unresolved_sku",
-                "payload": payload,
-                "created_at": _utc_now(),
-            }
-        )
+        if not await _claim_sale_event(event_id, {**event_doc, "status": "unresolved_sku"}):
+            return {"event_id": event_id, "status": "duplicate", "sku": sku}
         return {
             "event_id": event_id,
             "status": "unresolved_sku",
             "sku": None,
         }
 
-    product = await db.product_normalized.find_one({"_id": sku}, {"_id": 1, "quantity": 1})
-    if not product:
-        await db[EVENTS_COLLECTION].insert_one(
-            {
-                "_id": event_id,
-                "source_channel": source_channel,
-                "type": "sale",
-                "sku": sku,
-                "quantity_sold": sold_qty,
-                "status": "no_product",
-                "payload": payload,
-                "created_at": _utc_now(),
-            }
-        )
-        return {
-            "event_id": event_id,
-            "status": "no_product",
-            "sku": sku,
-        }
-
+    event_doc["sku"] = sku
     policy = await get_conflict_policy(str(sku))
 
+    blocked_status = None
     max_delta_guard = policy.get("max_delta_guard")
+    priority_channel = policy.get("priority_channel")
     if max_delta_guard is not None and sold_qty > int(max_delta_guard):
-        await db[EVENTS_COLLECTION].insert_one(
-            {
-                "_id": event_id,
-                "source_channel": source_channel,
-                "type": "sale",
-                "sku": sku,
-                "quantity_sold": sold_qty,
-                "status": "blocked_by_max_delta_guard",
-                "policy": policy,
-                "payload": payload,
-                "created_at": _utc_now(),
-            }
-        )
+        blocked_status = "blocked_by_max_delta_guard"
+    elif bool(policy.get("strict_priority", False)) and priority_channel and source_channel != priority_channel:
+        blocked_status = "blocked_by_priority_channel"
+
+    if blocked_status:
+        if not await _claim_sale_event(event_id, {**event_doc, "status": blocked_status, "policy": policy}):
+            return {"event_id": event_id, "status": "duplicate", "sku": sku}
         return {
             "event_id": event_id,
-            "status": "blocked_by_max_delta_guard",
+            "status": blocked_status,
             "sku": sku,
             "policy": policy,
         }
 
-    priority_channel = policy.get("priority_channel")
-    strict_priority = bool(policy.get("strict_priority", False))
-    if strict_priority and priority_channel and source_channel != priority_channel:
-        await db[EVENTS_COLLECTION].insert_one(
-            {
-                "_id": event_id,
-                "source_channel": source_channel,
-                "type": "sale",
-                "sku": sku,
-                "quantity_sold": sold_qty,
-                "status": "blocked_by_priority_channel",
-                "policy": policy,
-                "payload": payload,
-                "created_at": _utc_now(),
-            }
+    if not await _claim_sale_event(event_id, {**event_doc, "status": "pending", "policy": policy}):
+        return {"event_id": event_id, "status": "duplicate", "sku": sku}
+
+    after = await db.product_normalized.find_one_and_update(
+        {"_id": sku},
+        _sale_decrement_pipeline(event_id, sold_qty, _utc_now()),
+        projection={"sale_events": {"$elemMatch": {"event_id": event_id}}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not after:
+        await db[EVENTS_COLLECTION].update_one(
+            {"_id": event_id},
+            {"$set": {"status": "no_product"}, "$unset": {"policy": ""}},
         )
         return {
             "event_id": event_id,
-            "status": "blocked_by_priority_channel",
+            "status": "no_product",
             "sku": sku,
-            "policy": policy,
         }
 
-    current_qty = max(0, _safe_int(product.get("quantity"), 0))
-    new_qty = max(0, current_qty - sold_qty)
+    applied = (after.get("sale_events") or [{}])[0]
+    current_qty = _safe_int(applied.get("quantity_before"), 0)
+    new_qty = _safe_int(applied.get("quantity_after"), 0)
 
-    await db.product_normalized.update_one(
-        {"_id": sku},
-        {"$set": {"quantity": new_qty, "updated_at": _utc_now()}},
+    await db[EVENTS_COLLECTION].update_one(
+        {"_id": event_id},
+        {
+            "$set": {
+                "status": "applied",
+                "quantity_before": current_qty,
+                "quantity_after": new_qty,
+            }
+        },
     )
 
-    event_doc = {
-        "_id": event_id,
-        "source_channel": source_channel,
-        "type": "sale",
-        "sku": sku,
-        "quantity_sold": sold_qty,
-        "quantity_before": current_qty,
-        "quantity_after": new_qty,
-        "status": "applied",
-        "policy": policy,
-        "payload": payload,
-        "created_at": _utc_now(),
-    }
-    await db[EVENTS_COLLECTION].insert_one(event_doc)
-
     queue_stats = {"queued": 0, "deduped": 0}
     if enqueue_jobs_flag:
         queue_stats = await enqueue_inventory_jobs(
@@ -1440,7 +1537,39 @@ def _build_etsy_inventory_payload_for_quantity(
     }
 
 
+def _etsy_inventory_template(inventory: dict[str, Any]) -> dict[str, Any]:
+    """Keep only what _build_etsy_inventory_payload_for_quantity reads."""
+    return {
+        "products": [
+            {
+                "offerings": [
+                    {
+                        "price": offering.get("price"),
+                        "is_enabled": offering.get("is_enabled"),
+                        "readiness_state_id": offering.get("readiness_state_id"),
+                    }
+                    for offering in (product.get("offerings") or [])
+                ],
+                "property_values": product.get("property_values") or [],
+            }
+            for product in (inventory.get("products") or [])
+        ],
+        "price_on_property": inventory.get("price_on_property") or [],
+        "quantity_on_property": inventory.get("quantity_on_property") or [],
+        "sku_on_property": inventory.get("sku_on_property") or [],
+        "readiness_state_on_property": inventory.get("readiness_state_on_property") or [],
+    }
+
+
 async def _push_etsy_quantity(doc: dict[str, Any], target_qty: int) -> tuple[bool, str | None]:
+    """PUT the listing inventory with the new quantity.
+
+    The inventory structure is cached under channels.etsy.inventory_template,
+    so a routine quantity change is a single PUT. The PUT must carry every
+    offering's price and state, so the template is re-read from Etsy when it
+    is older than ``ETSY_INVENTORY_TEMPLATE_TTL_SECONDS``, when there is none
+    for the listing, or when Etsy rejects the cached structure (400/409).
+    """
     etsy_channel = get_channel(doc, "etsy")
     listing_id = etsy_channel.get("listing_id")
     shop_id = etsy_channel.get("shop_id")
@@ -1448,60 +1577,75 @@ async def _push_etsy_quantity(doc: dict[str, Any], target_qty: int) -> tuple[boo
     if not listing_id or not shop_id:
         return False, "missing_etsy_link"
 
+    etsy = get_etsy_client()
+    if not etsy.api_key:
+        return False, "missing_etsy_api_key"
     try:
-        token = await get_valid_etsy_token()
+        await etsy.ensure_auth()
     except ValueError:
         return False, "missing_etsy_token"
 
-    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
-        api_key = f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
-    else:
-        api_key = settings.ETSY_CLIENT_ID
-
-    if not api_key:
-        return False, "missing_etsy_api_key"
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": api_key,
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
     sku = str(doc.get("_id") or "").strip()
     if not sku:
         return False, "missing_sku"
 
-    inventory_url = f"https://openapi.etsy.com/v3/application/listings/{listing_id}/inventory"
+    template = etsy_channel.get("inventory_template")
+    fetched_at = _as_aware_utc(etsy_channel.get("inventory_template_updated_at"))
+    if (
+        str(etsy_channel.get("inventory_template_listing_id") or "") != str(listing_id)
+        or fetched_at is None
+        or (_utc_now() - fetched_at).total_seconds() > ETSY_INVENTORY_TEMPLATE_TTL_SECONDS
+    ):
+        template = None
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        get_response = await client.get(
-            inventory_url,
-            headers=headers,
-            params={"show_deleted": "true"},
-        )
-
-        if get_response.status_code >= 400:
-            return False, f"etsy_inventory_get_failed:{get_response.status_code}"
+    async def _fetch_template() -> tuple[dict[str, Any] | None, str | None]:
+        try:
+            return await etsy.get_listing_inventory(listing_id), None
+        except EtsyAPIError as exc:
+            return None, f"etsy_inventory_get_failed:{exc.status_code}"
 
-        inventory_payload = get_response.json() if get_response.content else {}
+    async def _put(inventory: dict[str, Any]) -> tuple[Any, str | None, int | None]:
         try:
             update_payload = _build_etsy_inventory_payload_for_quantity(
-                inventory=inventory_payload,
+                inventory=inventory,
                 sku=sku,
                 target_qty=int(target_qty),
             )
         except Exception as exc:
-            return False, f"etsy_inventory_payload_error:{exc}"
+            return None, f"etsy_inventory_payload_error:{exc}", None
+        try:
+            return await etsy.update_listing_inventory(listing_id, update_payload), None, None
+        except EtsyAPIError as exc:
+            return None, f"etsy_inventory_put_failed:{exc.status_code}", exc.status_code
+
+    fetched = template is None
+    if template is None:
+        template, error = await _fetch_template()
+        if error:
+            return False, error
 
-        put_response = await client.put(
-            inventory_url,
-            headers=headers,
-            content=json.dumps(update_payload),
-        )
+    refreshed, error, status_code = await _put(template)
+    if not fetched and error and status_code in (None, 400, 409):
+        # Listing structure changed since the template was cached.
+        fetched = True
+        template, error = await _fetch_template()
+        if error:
+            return False, error
+        refreshed, error, status_code = await _put(template)
 
-    if put_response.status_code >= 400:
-        return False, f"etsy_inventory_put_failed:{put_response.status_code}"
+    if error:
+        return False, error
+
+    if isinstance(refreshed, dict) and refreshed.get("products"):
+        template = refreshed
+    updates: dict[str, Any] = {
+        "channels.etsy.inventory_template": _etsy_inventory_template(template),
+        "channels.etsy.inventory_template_listing_id": listing_id,
+    }
+    if fetched:
+        # Only a GET restarts the TTL; a PUT response echoes the cached values.
+        updates["channels.etsy.inventory_template_updated_at"] = _utc_now()
+    await db.product_normalized.update_one({"_id": doc.get("_id")}, {"$set": updates})
 
     return True, None
 
@@ -1523,93 +1667,423 @@ def _parse_ebay_trading_response(response_text: str) -> tuple[bool, str | None]:
     return True, None
 
 
-async def _push_ebay_quantity(sku: str, target_qty: int) -> tuple[bool, str | None]:
-    raw_doc = await db.product_raw.find_one({"_id": sku}, {"raw.ItemID": 1})
-    item_id = ((raw_doc or {}).get("raw") or {}).get("ItemID")
+def _parse_ebay_inventory_status_response(
+    response_text: str,
+    items: list[tuple[str, str]],
+) -> dict[str, str | None]:
+    """Map each (item_id, sku) sent in one ReviseInventoryStatus call to None (ok) or an error.
 
-    if not item_id:
-        return False, "missing_ebay_item_id"
+    Errors are attributed to an item through their ErrorParameters values;
+    on a Failure/PartialFailure ack, items not echoed back in an
+    InventoryStatus node are treated as failed.
+    """
+    ns = {"e": "urn:ebay:apis:eBLBaseComponents"}
+    try:
+        root = ET.fromstring(response_text)
+    except ET.ParseError as exc:
+        return {item_id: f"ebay_xml_parse_error:{exc}" for item_id, _sku in items}
 
-    client = EbayClient()
-    await client.ensure_fresh_token()
+    ack = root.findtext(".//e:Ack", default="", namespaces=ns)
+    revised = {
+        (node.findtext("e:ItemID", default="", namespaces=ns) or "").strip()
+        for node in root.findall("e:InventoryStatus", ns)
+    }
 
-    try:
+    errors: list[tuple[set[str], str]] = []
+    for err in root.findall("e:Errors", ns):
+        if err.findtext("e:SeverityCode", default="", namespaces=ns) == "Warning":
+            continue
+        message = (
+            err.findtext("e:LongMessage", default="", namespaces=ns)
+            or err.findtext("e:ShortMessage", default="", namespaces=ns)
+            or "ebay_api_error"
+        )
+        params = {
+            (param.findtext("e:Value", default="", namespaces=ns) or "").strip()
+            for param in err.findall("e:ErrorParameters", ns)
+        }
+        errors.append((params, message))
+
+    out: dict[str, str | None] = {}
+    for item_id, sku in items:
+        message = next((msg for params, msg in errors if item_id in params or sku in params), None)
+        if message is None and (ack in ("Success", "Warning") or item_id in revised):
+            out[item_id] = None
+            continue
+        if message is None:
+            message = errors[0][1] if errors else "ebay_api_error"
+        out[item_id] = f"ebay_ack_{ack}:{message}"
+    return out
+
+
+async def _push_ebay_quantities(
+    jobs: list[dict[str, Any]],
+    *,
+    client: EbayClient | None = None,
+    lane: "_ChannelLane | None" = None,
+) -> dict[str, tuple[bool, str | None]]:
+    """Push eBay quantities for several jobs; returns {job_id: (ok, error)}.
+
+    Positive quantities are packed into ReviseInventoryStatus calls of up to
+    EBAY_REVISE_INVENTORY_MAX_ITEMS items; zero ends the listing, which has
+    no multi-item form. The calls run concurrently on one token-refreshed
+    client. A caller passing ``lane`` already holds one of its slots, so the
+    calls here only draw on the lane's rate budget.
+    """
+    outcomes: dict[str, tuple[bool, str | None]] = {}
+    if not jobs:
+        return outcomes
+
+    skus = sorted({str(job.get("sku")) for job in jobs})
+    item_ids: dict[str, str] = {}
+    async for raw_doc in db.product_raw.find({"_id": {"$in": skus}}, {"raw.ItemID": 1}):
+        item_id = ((raw_doc or {}).get("raw") or {}).get("ItemID")
+        if item_id:
+            item_ids[str(raw_doc["_id"])] = str(item_id)
+
+    to_end: list[tuple[str, str, str]] = []
+    to_revise: list[tuple[str, str, str, int]] = []
+    for job in jobs:
+        job_id = str(job.get("_id"))
+        sku = str(job.get("sku"))
+        item_id = item_ids.get(sku)
+        if not item_id:
+            outcomes[job_id] = (False, "missing_ebay_item_id")
+            continue
+        target_qty = _safe_int(job.get("target_qty"), 0)
         if target_qty <= 0:
-            # End the listing entirely when quantity reaches zero
-            end_xml = f"""<?xml version=\"1.0\" encoding=\"utf-8\"?>
+            to_end.append((job_id, sku, item_id))
+        else:
+            to_revise.append((job_id, sku, item_id, target_qty))
+
+    if not to_end and not to_revise:
+        return outcomes
+
+    if client is None:
+        client = EbayClient()
+        await client.ensure_fresh_token()
+
+    async def _trading_post(call_name: str, request_xml: str) -> str:
+        if lane is not None and lane.limiter is not None:
+            await lane.limiter.acquire()
+        # trading_post is blocking (requests); keep it off the event loop.
+        return await asyncio.to_thread(client.trading_post, call_name, request_xml)
+
+    async def _end(job_id: str, sku: str, item_id: str) -> None:
+        # End the listing entirely when quantity reaches zero
+        end_xml = f"""<?xml version=\"1.0\" encoding=\"utf-8\"?>
 <EndFixedPriceItemRequest xmlns=\"urn:ebay:apis:eBLBaseComponents\">
-  <ItemID>{item_id}</ItemID>
+  <ItemID>{xml_escape(item_id)}</ItemID>
   <EndingReason>NotAvailable</EndingReason>
 </EndFixedPriceItemRequest>"""
-            response_text = client.trading_post("EndFixedPriceItem", end_xml)
-            ok, error = _parse_ebay_trading_response(response_text)
-            if not ok:
-                logger.warning("eBay EndFixedPriceItem failed for SKU=%s item=%s: %s", sku, item_id, error)
-                return False, error
+        try:
+            response_text = await _trading_post("EndFixedPriceItem", end_xml)
+        except Exception as exc:  # pragma: no cover - network call
+            outcomes[job_id] = (False, f"ebay_update_failed:{exc}")
+            return
+        ok, error = _parse_ebay_trading_response(response_text)
+        if ok:
             logger.info("eBay listing ended (qty=0) | SKU=%s | item_id=%s", sku, item_id)
-            return True, None
+        else:
+            logger.warning("eBay EndFixedPriceItem failed for SKU=%s item=%s: %s", sku, item_id, error)
+        outcomes[job_id] = (ok, error)
 
-        request_xml = f"""<?xml version=\"1.0\" encoding=\"utf-8\"?>
-<ReviseInventoryStatusRequest xmlns=\"urn:ebay:apis:eBLBaseComponents\">
+    async def _revise(chunk: list[tuple[str, str, str, int]]) -> None:
+        nodes = "".join(
+            f"""
   <InventoryStatus>
-    <ItemID>{item_id}</ItemID>
-    <SKU>{sku}</SKU>
+    <ItemID>{xml_escape(item_id)}</ItemID>
+    <SKU>{xml_escape(sku)}</SKU>
     <Quantity>{int(target_qty)}</Quantity>
-  </InventoryStatus>
+  </InventoryStatus>"""
+            for _job_id, sku, item_id, target_qty in chunk
+        )
+        request_xml = f"""<?xml version=\"1.0\" encoding=\"utf-8\"?>
+<ReviseInventoryStatusRequest xmlns=\"urn:ebay:apis:eBLBaseComponents\">{nodes}
 </ReviseInventoryStatusRequest>"""
-        response_text = client.trading_post("ReviseInventoryStatus", request_xml)
-        ok, error = _parse_ebay_trading_response(response_text)
-        if not ok:
-            logger.warning("eBay ReviseInventoryStatus failed for SKU=%s item=%s: %s", sku, item_id, error)
-            return False, error
-        return True, None
+        try:
+            response_text = await _trading_post("ReviseInventoryStatus", request_xml)
+        except Exception as exc:  # pragma: no cover - network call
+            for job_id, *_rest in chunk:
+                outcomes[job_id] = (False, f"ebay_update_failed:{exc}")
+            return
+
+        per_item = _parse_ebay_inventory_status_response(
+            response_text,
+            [(item_id, sku) for _job_id, sku, item_id, _qty in chunk],
+        )
+        for job_id, sku, item_id, _qty in chunk:
+            error = per_item.get(item_id)
+            if error:
+                logger.warning("eBay ReviseInventoryStatus failed for SKU=%s item=%s: %s", sku, item_id, error)
+            outcomes[job_id] = (error is None, error)
+
+    await asyncio.gather(
+        *(_end(*entry) for entry in to_end),
+        *(
+            _revise(to_revise[start:start + EBAY_REVISE_INVENTORY_MAX_ITEMS])
+            for start in range(0, len(to_revise), EBAY_REVISE_INVENTORY_MAX_ITEMS)
+        ),
+    )
+    return outcomes
 
-    except Exception as exc:  # pragma: no cover - network call
-        return False, f"ebay_update_failed:{exc}"
 
+async def _push_ebay_quantity(sku: str, target_qty: int) -> tuple[bool, str | None]:
+    job = {"_id": sku, "sku": sku, "target_qty": target_qty}
+    outcomes = await _push_ebay_quantities([job])
+    return outcomes.get(sku, (False, "ebay_update_failed:no_result"))
+
+
+class _ChannelLane:
+    """Concurrency and request-rate budget for pushes to one target channel."""
+
+    def __init__(self, channel: str, concurrency: int, rate_per_second: int | None) -> None:
+        self.channel = channel
+        self.concurrency = max(1, int(concurrency))
+        self.rate_per_second = int(rate_per_second) if rate_per_second else None
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = AsyncLimiter(self.rate_per_second, 1) if self.rate_per_second else None
+        self.in_flight = 0
+        self.processed = 0
+        self.by_status: dict[str, int] = {}
+        self.busy_seconds = 0.0
+        self.last_queue_wait_seconds: float | None = None
+        self.max_queue_wait_seconds = 0.0
+        # Finish times (monotonic) for a rolling throughput figure.
+        self.recent_finishes: deque[float] = deque(maxlen=2000)
+
+    def record(self, status: str, elapsed: float, queue_wait: float | None) -> None:
+        self.processed += 1
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        self.busy_seconds += elapsed
+        self.recent_finishes.append(time.monotonic())
+        if queue_wait is not None:
+            self.last_queue_wait_seconds = queue_wait
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, queue_wait)
+
+    def snapshot(self) -> dict[str, Any]:
+        window_start = time.monotonic() - CHANNEL_THROUGHPUT_WINDOW_SECONDS
+        recent = sum(1 for ts in self.recent_finishes if ts >= window_start)
+        return {
+            "concurrency": self.concurrency,
+            "rate_per_second": self.rate_per_second,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "by_status": dict(self.by_status),
+            "avg_job_seconds": round(self.busy_seconds / self.processed, 3) if self.processed else None,
+            "jobs_per_minute": round(recent * 60 / CHANNEL_THROUGHPUT_WINDOW_SECONDS, 2),
+            "last_queue_wait_seconds": self.last_queue_wait_seconds,
+            "max_queue_wait_seconds": self.max_queue_wait_seconds,
+        }
 
-async def process_single_job(job_id: str) -> dict[str, Any]:
-    job = await db[JOBS_COLLECTION].find_one_and_update(
-        {"_id": job_id, "status": {"$in": ["queued", "retry"]}},
-        {"$set": {"status": "processing", "started_at": _utc_now()}, "$inc": {"attempts": 1}},
+
+_channel_lanes: dict[str, _ChannelLane] = {}
+# One lock per (sku, channel): target_qty is absolute, so two jobs for the same
+# listing must never be pushed concurrently or out of order.
+_sku_channel_locks: "weakref.WeakValueDictionary[tuple[str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _get_channel_lane(channel: str) -> _ChannelLane:
+    lane = _channel_lanes.get(channel)
+    if lane is None:
+        prefix = f"MULTICHANNEL_{channel.upper()}"
+        lane = _ChannelLane(
+            channel,
+            concurrency=getattr(settings, f"{prefix}_CONCURRENCY", 1),
+            rate_per_second=getattr(settings, f"{prefix}_RATE_PER_SECOND", None),
+        )
+        _channel_lanes[channel] = lane
+    return lane
+
+
+def _sku_channel_lock(sku: str, channel: str) -> asyncio.Lock:
+    key = (sku, channel)
+    lock = _sku_channel_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _sku_channel_locks[key] = lock
+    return lock
+
+
+def _retry_delay_seconds(attempts: int) -> int:
+    return min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def _claimable_jobs_query(now: datetime) -> dict[str, Any]:
+    """Jobs that are due, plus processing jobs whose worker lost its lease."""
+    return {
+        "$or": [
+            {
+                "status": {"$in": ["queued", "retry"]},
+                "$or": [{"next_attempt_at": None}, {"next_attempt_at": {"$lte": now}}],
+            },
+            {"status": "processing", "lease_until": {"$lt": now}},
+            # Claimed before leases existed.
+            {
+                "status": "processing",
+                "lease_until": None,
+                "started_at": {"$lt": now - timedelta(seconds=JOB_LEASE_SECONDS)},
+            },
+        ]
+    }
+
+
+async def ensure_job_indexes() -> None:
+    await db[JOBS_COLLECTION].create_index(
+        [("status", 1), ("next_attempt_at", 1), ("created_at", 1)],
+        name="idx_channel_sync_jobs_status_next_attempt",
+        background=True,
+    )
+    await db[JOBS_COLLECTION].create_index(
+        [("status", 1), ("lease_until", 1)],
+        name="idx_channel_sync_jobs_status_lease",
+        background=True,
+    )
+    await db[JOBS_COLLECTION].create_index(
+        [("sku", 1), ("target_channel", 1), ("status", 1), ("created_at", -1)],
+        name="idx_channel_sync_jobs_sku_channel_status",
+        background=True,
+    )
+
+
+async def _claim_job(job_id: str, *, ignore_schedule: bool = False) -> dict[str, Any] | None:
+    now = _utc_now()
+    if ignore_schedule:
+        claim_query: dict[str, Any] = {"_id": job_id, "status": {"$in": ["queued", "retry"]}}
+    else:
+        claim_query = {"_id": job_id, **_claimable_jobs_query(now)}
+    return await db[JOBS_COLLECTION].find_one_and_update(
+        claim_query,
+        {
+            "$set": {
+                "status": "processing",
+                "started_at": now,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
         return_document=ReturnDocument.AFTER,
     )
 
+
+async def _finish_job(job: dict[str, Any], fields: dict[str, Any]) -> bool:
+    """Record a job outcome unless another worker has reclaimed it meanwhile."""
+    result = await db[JOBS_COLLECTION].update_one(
+        {"_id": job.get("_id"), "lease_until": job.get("lease_until")},
+        {"$set": {**fields, "lease_until": None}},
+    )
+    if not result.matched_count:
+        logger.warning("Job %s lost its lease before finishing; outcome not recorded", job.get("_id"))
+        return False
+    return True
+
+
+def _superseded_fields(superseded_by: Any) -> dict[str, Any]:
+    return {
+        "status": "superseded",
+        "superseded_by": str(superseded_by),
+        "finished_at": _utc_now(),
+        "next_attempt_at": None,
+        "error": None,
+    }
+
+
+async def _coalesce_claimed_job(job: dict[str, Any]) -> tuple[dict[str, Any] | None, int]:
+    """Keep only the newest pending job of a claimed job's (sku, channel).
+
+    target_qty is absolute, so when several jobs for the same listing are
+    waiting only the newest one needs pushing. The claim moves to the newest
+    pending job and every older pending job is marked ``superseded`` (they
+    stay in the collection, so the item timeline still shows them).
+
+    Returns the job to push (None if a newer one is already being pushed
+    elsewhere) and the number of jobs superseded.
+    """
+    key = {"sku": job.get("sku"), "target_channel": job.get("target_channel")}
+    superseded = 0
+
+    while True:
+        newer = await db[JOBS_COLLECTION].find_one(
+            {**key, "status": {"$in": ["queued", "retry"]}, "created_at": {"$gt": job.get("created_at")}},
+            {"_id": 1},
+            sort=[("created_at", -1)],
+        )
+        if not newer:
+            break
+
+        # Pushing now anyway, so a pending retry backoff does not apply.
+        newer_job = await _claim_job(str(newer["_id"]), ignore_schedule=True)
+        if await _finish_job(job, _superseded_fields(newer["_id"])):
+            superseded += 1
+        if not newer_job:
+            # Another worker claimed (or superseded) the newer job first.
+            return None, superseded
+        job = newer_job
+
+    result = await db[JOBS_COLLECTION].update_many(
+        {**key, "status": {"$in": ["queued", "retry"]}, "created_at": {"$lt": job.get("created_at")}},
+        {"$set": {**_superseded_fields(job.get("_id")), "lease_until": None}},
+    )
+    superseded += int(getattr(result, "modified_count", 0) or 0)
+    return job, superseded
+
+
+async def _claim_and_coalesce(job_id: str) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    """Claim a job and coalesce it; returns (job to push, result when there is nothing to push)."""
+    job = await _claim_job(job_id)
     if not job:
-        return {"job_id": job_id, "status": "not_claimed"}
+        return None, {"job_id": job_id, "status": "not_claimed"}
+
+    job, superseded = await _coalesce_claimed_job(job)
+    if job is None:
+        return None, {"job_id": job_id, "status": "superseded", "superseded": superseded}
+    job["_superseded"] = superseded
+    return job, None
+
+
+async def process_single_job(job_id: str) -> dict[str, Any]:
+    job, skipped = await _claim_and_coalesce(job_id)
+
+    if not job:
+        return skipped
+
+    result = await _process_claimed_job(job)
+    return _with_coalesce_info(result, job, job_id)
+
+
+def _with_coalesce_info(result: dict[str, Any], job: dict[str, Any], requested_job_id: str) -> dict[str, Any]:
+    if str(job.get("_id")) != requested_job_id:
+        result["coalesced_from"] = requested_job_id
+    if job.get("_superseded"):
+        result["superseded"] = job["_superseded"]
+    return result
 
+
+JOB_PRODUCT_PROJECTION = {
+    "_id": 1,
+    "quantity": 1,
+    "shopify_variant_id": 1,
+    "shopify_id": 1,
+    "inventory_item_id": 1,
+    "location_id": 1,
+    "channels": 1,
+}
+
+
+async def _process_claimed_job(job: dict[str, Any]) -> dict[str, Any]:
+    job_id = str(job.get("_id"))
     sku = str(job.get("sku"))
     target_channel = str(job.get("target_channel"))
     target_qty = _safe_int(job.get("target_qty"), 0)
 
-    doc = await db.product_normalized.find_one(
-        {"_id": sku},
-        {
-            "_id": 1,
-            "quantity": 1,
-            "shopify_variant_id": 1,
-            "shopify_id": 1,
-            "inventory_item_id": 1,
-            "location_id": 1,
-            "channels": 1,
-        },
-    )
+    doc = await db.product_normalized.find_one({"_id": sku}, JOB_PRODUCT_PROJECTION)
 
     if not doc:
-        await db[JOBS_COLLECTION].update_one(
-            {"_id": job_id},
-            {"$set": {"status": "failed", "error": "product_not_found", "finished_at": _utc_now()}},
-        )
+        await _finish_job(job, {"status": "failed", "error": "product_not_found", "finished_at": _utc_now()})
         return {"job_id": job_id, "status": "failed", "error": "product_not_found"}
 
     ok = False
     error: str | None = None
-    etsy_state_target: str | None = None
-    sync_note: str | None = None
-
-    if target_channel == "etsy" and target_qty <= 0:
-        etsy_state_target = "sold_out"
-        sync_note = "etsy_marked_sold_out"
 
     if target_channel == "shopify":
         ok, error = await _push_shopify_quantity(doc, target_qty)
@@ -1621,17 +2095,31 @@ async def process_single_job(job_id: str) -> dict[str, Any]:
         ok = False
         error = f"unsupported_channel:{target_channel}"
 
+    return await _record_job_outcome(job, ok, error)
+
+
+async def _record_job_outcome(job: dict[str, Any], ok: bool, error: str | None) -> dict[str, Any]:
+    job_id = str(job.get("_id"))
+    sku = str(job.get("sku"))
+    target_channel = str(job.get("target_channel"))
+    target_qty = _safe_int(job.get("target_qty"), 0)
+
+    etsy_state_target: str | None = None
+    sync_note: str | None = None
+    if target_channel == "etsy" and target_qty <= 0:
+        etsy_state_target = "sold_out"
+        sync_note = "etsy_marked_sold_out"
+
     if ok:
-        await db[JOBS_COLLECTION].update_one(
-            {"_id": job_id},
+        await _finish_job(
+            job,
             {
-                "$set": {
-                    "status": "completed",
-                    "finished_at": _utc_now(),
-                    "error": None,
-                    "etsy_state_target": etsy_state_target,
-                    "sync_note": sync_note,
-                }
+                "status": "completed",
+                "finished_at": _utc_now(),
+                "error": None,
+                "next_attempt_at": None,
+                "etsy_state_target": etsy_state_target,
+                "sync_note": sync_note,
             },
         )
         return {
@@ -1645,21 +2133,25 @@ async def process_single_job(job_id: str) -> dict[str, Any]:
 
     attempts = _safe_int(job.get("attempts"), 1)
     next_status = "failed" if attempts >= MAX_JOB_ATTEMPTS else "retry"
-    await db[JOBS_COLLECTION].update_one(
-        {"_id": job_id},
+    finished_at = _utc_now()
+    next_attempt_at = None
+    if next_status == "retry":
+        next_attempt_at = finished_at + timedelta(seconds=_retry_delay_seconds(attempts))
+    await _finish_job(
+        job,
         {
-            "$set": {
-                "status": next_status,
-                "error": error,
-                "finished_at": _utc_now(),
-                "etsy_state_target": etsy_state_target,
-                "sync_note": sync_note,
-            }
+            "status": next_status,
+            "error": error,
+            "finished_at": finished_at,
+            "next_attempt_at": next_attempt_at,
+            "etsy_state_target": etsy_state_target,
+            "sync_note": sync_note,
         },
     )
     return {
         "job_id": job_id,
         "status": next_status,
+        "next_attempt_at": next_attempt_at,
         "channel": target_channel,
         "sku": sku,
         "error": error,
@@ -1668,20 +2160,198 @@ async def process_single_job(job_id: str) -> dict[str, Any]:
     }
 
 
+async def _run_job_in_lane(job_id: str, lane: _ChannelLane) -> dict[str, Any]:
+    async with lane.semaphore:
+        job, skipped = await _claim_and_coalesce(job_id)
+        if not job:
+            return skipped
+
+        lane.in_flight += 1
+        started = time.perf_counter()
+        try:
+            if lane.limiter is not None:
+                await lane.limiter.acquire()
+            result = await _process_claimed_job(job)
+        finally:
+            lane.in_flight -= 1
+
+        created_at = _as_aware_utc(job.get("created_at"))
+        started_at = _as_aware_utc(job.get("started_at"))
+        queue_wait = (started_at - created_at).total_seconds() if created_at and started_at else None
+        lane.record(str(result.get("status")), time.perf_counter() - started, queue_wait)
+        return _with_coalesce_info(result, job, job_id)
+
+
+async def _run_ebay_chunk(
+    lane: _ChannelLane,
+    client: EbayClient,
+    groups: dict[str, list[str]],
+    token_error: str | None = None,
+) -> list[dict[str, Any]]:
+    """Claim and push the jobs of up to EBAY_REVISE_INVENTORY_MAX_ITEMS SKUs in one lane slot.
+
+    With ``token_error`` set nothing is pushed; the claimed jobs are recorded
+    as failed attempts with that error and retried through the usual backoff.
+    """
+    results: list[dict[str, Any]] = []
+    claimed: list[tuple[dict[str, Any], str]] = []
+
+    async with contextlib.AsyncExitStack() as stack:
+        # Sorted acquisition so concurrent batches cannot deadlock on each other.
+        for sku in sorted(groups):
+            await stack.enter_async_context(_sku_channel_lock(sku, "ebay"))
+        # Claim only once a slot is free, so the lease covers just this chunk's calls.
+        await stack.enter_async_context(lane.semaphore)
+
+        for sku in sorted(groups):
+            for job_id in groups[sku]:
+                job, skipped = await _claim_and_coalesce(job_id)
+                if job:
+                    claimed.append((job, job_id))
+                else:
+                    results.append(skipped)
+
+        if not claimed:
+            return results
+
+        skus = [str(job.get("sku")) for job, _job_id in claimed]
+        existing = {
+            str(doc["_id"])
+            async for doc in db.product_normalized.find({"_id": {"$in": skus}}, {"_id": 1})
+        }
+        pushable: list[dict[str, Any]] = []
+        for job, job_id in claimed:
+            if str(job.get("sku")) in existing:
+                pushable.append(job)
+                continue
+            await _finish_job(job, {"status": "failed", "error": "product_not_found", "finished_at": _utc_now()})
+            results.append(
+                _with_coalesce_info(
+                    {"job_id": str(job.get("_id")), "status": "failed", "error": "product_not_found"},
+                    job,
+                    job_id,
+                )
+            )
+
+        lane.in_flight += len(pushable)
+        started = time.perf_counter()
+        try:
+            if token_error:
+                outcomes = {str(job.get("_id")): (False, token_error) for job in pushable}
+            else:
+                outcomes = await _push_ebay_quantities(pushable, client=client, lane=lane)
+        finally:
+            lane.in_flight -= len(pushable)
+        elapsed = time.perf_counter() - started
+
+        requested_ids = {str(job.get("_id")): job_id for job, job_id in claimed}
+        for job in pushable:
+            ok, error = outcomes.get(str(job.get("_id")), (False, "ebay_update_failed:no_result"))
+            result = await _record_job_outcome(job, ok, error)
+            created_at = _as_aware_utc(job.get("created_at"))
+            started_at = _as_aware_utc(job.get("started_at"))
+            queue_wait = (started_at - created_at).total_seconds() if created_at and started_at else None
+            lane.record(str(result.get("status")), elapsed / max(1, len(pushable)), queue_wait)
+            results.append(_with_coalesce_info(result, job, requested_ids[str(job.get("_id"))]))
+
+    return results
+
+
+async def _run_ebay_jobs(groups: dict[str, list[str]]) -> list[dict[str, Any]]:
+    """eBay leg of a worker batch: SKUs in chunks of one ReviseInventoryStatus call each.
+
+    Chunks run concurrently up to the eBay lane's concurrency. Each chunk
+    claims its jobs only when it gets a slot, so a large batch never holds
+    leases on jobs it has not started pushing.
+    """
+    lane = _get_channel_lane("ebay")
+    skus = sorted(groups)
+    chunks = [
+        {sku: groups[sku] for sku in skus[start:start + EBAY_REVISE_INVENTORY_MAX_ITEMS]}
+        for start in range(0, len(skus), EBAY_REVISE_INVENTORY_MAX_ITEMS)
+    ]
+    client = EbayClient()
+    token_error = None
+    try:
+        await client.ensure_fresh_token()
+    except Exception as exc:
+        logger.warning("eBay token unavailable; deferring %s SKU(s): %s", len(skus), exc)
+        token_error = f"ebay_token_unavailable:{exc}"
+    chunk_results = await asyncio.gather(
+        *(_run_ebay_chunk(lane, client, chunk, token_error) for chunk in chunks)
+    )
+    return [result for results in chunk_results for result in results]
+
+
+async def _run_sku_channel_jobs(sku: str, channel: str, job_ids: list[str]) -> list[dict[str, Any]]:
+    lane = _get_channel_lane(channel)
+    results: list[dict[str, Any]] = []
+    async with _sku_channel_lock(sku, channel):
+        for job_id in job_ids:
+            results.append(await _run_job_in_lane(job_id, lane))
+    return results
+
+
 async def run_worker_batch(limit: int = 25) -> dict[str, Any]:
+    """Process up to ``limit`` queued jobs through per-channel worker lanes.
+
+    Each target channel has its own concurrency limit and rate limiter, so a
+    slow Etsy push does not hold up Shopify or eBay jobs. Jobs for the same
+    (sku, channel) still run one at a time, oldest first.
+    """
     max_items = max(1, min(int(limit), 500))
 
     cursor = db[JOBS_COLLECTION].find(
-        {"status": {"$in": ["queued", "retry"]}},
-        {"_id": 1},
+        _claimable_jobs_query(_utc_now()),
+        {"_id": 1, "sku": 1, "target_channel": 1},
     ).sort("created_at", 1).limit(max_items)
 
-    job_ids = [str(doc.get("_id")) async for doc in cursor]
+    job_ids: list[str] = []
+    groups: dict[tuple[str, str], list[str]] = {}
+    async for doc in cursor:
+        job_id = str(doc.get("_id"))
+        job_ids.append(job_id)
+        key = (str(doc.get("sku")), str(doc.get("target_channel")))
+        groups.setdefault(key, []).append(job_id)
+
+    # eBay jobs are pushed together so several SKUs share one Trading API call.
+    ebay_groups = {sku: ids for (sku, channel), ids in groups.items() if channel == "ebay"}
+    legs = [_run_sku_channel_jobs(sku, channel, ids) for (sku, channel), ids in groups.items() if channel != "ebay"]
+    leg_names = [f"{channel}:{sku}" for (sku, channel) in groups if channel != "ebay"]
+    if ebay_groups:
+        legs.append(_run_ebay_jobs(ebay_groups))
+        leg_names.append("ebay")
+
+    started = time.perf_counter()
+    # One leg failing must not abandon the others mid-flight or lose their results.
+    group_results = await asyncio.gather(*legs, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    leg_errors: list[dict[str, str]] = []
+    for name, results in zip(leg_names, group_results):
+        if isinstance(results, BaseException):
+            logger.error("Worker batch leg %s failed", name, exc_info=results)
+            leg_errors.append({"leg": name, "error": str(results)})
+    by_id = {
+        str(item.get("coalesced_from") or item.get("job_id")): item
+        for results in group_results
+        if not isinstance(results, BaseException)
+        for item in results
+    }
+    processed = [by_id[job_id] for job_id in job_ids if job_id in by_id]
 
-    processed: list[dict[str, Any]] = []
-    for job_id in job_ids:
-        result = await process_single_job(job_id)
-        processed.append(result)
+    by_channel: dict[str, dict[str, int]] = {}
+    for (_sku, channel), ids in groups.items():
+        counts = by_channel.setdefault(
+            channel, {"picked": 0, "completed": 0, "retry": 0, "failed": 0, "superseded": 0}
+        )
+        for job_id in ids:
+            counts["picked"] += 1
+            item = by_id.get(job_id, {})
+            status = str(item.get("status"))
+            if status in counts and status != "superseded":
+                counts[status] += 1
+            counts["superseded"] += _safe_int(item.get("superseded"), 0)
 
     summary = {
         "requested_limit": max_items,
@@ -1689,11 +2359,47 @@ async def run_worker_batch(limit: int = 25) -> dict[str, Any]:
         "completed": sum(1 for item in processed if item.get("status") == "completed"),
         "retry": sum(1 for item in processed if item.get("status") == "retry"),
         "failed": sum(1 for item in processed if item.get("status") == "failed"),
+        "superseded": sum(counts["superseded"] for counts in by_channel.values()),
+        "elapsed_seconds": round(elapsed, 3),
+        "by_channel": by_channel,
         "results": processed,
+        "leg_errors": leg_errors,
     }
     return summary
 
 
+async def get_channel_worker_metrics() -> dict[str, Any]:
+    """Per-channel worker throughput (this process) and queue depth/age (Mongo)."""
+    now = _utc_now()
+    rows = await db[JOBS_COLLECTION].aggregate(
+        [
+            {"$match": {"status": {"$in": ["queued", "retry"]}}},
+            {
+                "$group": {
+                    "_id": "$target_channel",
+                    "pending": {"$sum": 1},
+                    "oldest_created_at": {"$min": "$created_at"},
+                }
+            },
+        ]
+    ).to_list(None)
+    queues = {str(row.get("_id")): row for row in rows}
+
+    channels: dict[str, Any] = {}
+    for channel in sorted(set(_channel_lanes) | set(queues) | {"ebay", "etsy", "shopify"}):
+        row = queues.get(channel) or {}
+        oldest = _as_aware_utc(row.get("oldest_created_at"))
+        channels[channel] = {
+            "queue": {
+                "pending": int(row.get("pending") or 0),
+                "oldest_created_at": oldest,
+                "oldest_age_seconds": round((now - oldest).total_seconds(), 1) if oldest else None,
+            },
+            "worker": _get_channel_lane(channel).snapshot(),
+        }
+    return {"generated_at": now, "channels": channels}
+
+
 async def get_sync_dashboard(limit_recent_jobs: int = 50) -> dict[str, Any]:
     status_pipeline = [
         {"$group": {"_id": "$status", "count": {"$sum": 1}}},
@@ -1720,15 +2426,10 @@ async def get_sync_dashboard(limit_recent_jobs: int = 50) -> dict[str, Any]:
         },
     ).sort("created_at", -1).limit(max(1, min(int(limit_recent_jobs), 250))).to_list(None)
 
-    mismatched_shopify = await db.product_normalized.count_documents(
-        {
-            "inventory_item_id": {"$exists": True, "$ne": None},
-            "location_id": {"$exists": True, "$ne": None},
-            "$expr": {"$ne": ["$quantity", "$channels.shopify.quantity"]},
-        }
-    )
+    counters = await get_kpi_counters()
 
     policies_count = await db[POLICIES_COLLECTION].count_documents({})
+    channel_workers = await get_channel_worker_metrics()
 
     return {
         "generated_at": _utc_now(),
@@ -1736,7 +2437,9 @@ async def get_sync_dashboard(limit_recent_jobs: int = 50) -> dict[str, Any]:
         "queued_jobs": jobs_by_status.get("queued", 0) + jobs_by_status.get("retry", 0),
         "policies_count": policies_count,
         "mismatch_hints": {
-            "shopify_vs_canonical": mismatched_shopify,
+            "shopify_vs_canonical": counters["shopify_mismatch_hint"],
+            "drifted_products": counters["drifted_products"],
         },
+        "channel_workers": channel_workers["channels"],
         "recent_jobs": recent_jobs,
     }
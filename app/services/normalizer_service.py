@@ -8,11 +8,35 @@ from openai import OpenAI
 from app.config import settings
 import asyncio
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from app.services.content_hash import canonical_digest, is_canonical_digest, sectioned_digest
+from app.services.channel_utils import get_shopify_field, set_shopify_fields_set
+from app.services.search_index import SEARCH_FIELD, build_search_terms
 
 
 logger = logging.getLogger(__name__)
 
 RECENT_DAYS = 7  # How many days count as "recent"
+RECENTLY_ADDED_TAG = "Recently Added"
+
+# product_raw "raw" keys read by normalize_from_raw (ItemID feeds search_terms).
+# Everything else on the raw item (LastSyncAt, QuantitySold, ...) changes on
+# every fetch without affecting the normalized output, so it stays out of the
+# raw digest.
+RAW_DIGEST_FIELDS = (
+    "ItemID",
+    "Title",
+    "Description",
+    "Images",
+    "Price",
+    "QuantityAvailable",
+    "PrimaryCategoryID",
+    "PrimaryCategoryName",
+    "CategoryPath",
+    "CategoryName",
+    "CategoryFullName",
+    "ItemSpecifics",
+    "Shipping",
+)
 
 
 def _money_2dp(value: object) -> float | None:
@@ -165,39 +189,59 @@ def pick_existing_sc_tag(tags: list[str]) -> str | None:
             return t
     return None
 
-def infer_collection_key_from_mapping(category: str, item_specifics: dict) -> str | None:
+def match_collection_from_mapping(category: str, data: dict | None = None) -> tuple[str, str] | None:
     """
-    Try to match the product category to a collection key in the mapping file.
+    Return (collection_name, sc_key) for the first mapping entry matching category.
+
+    `data` defaults to the loaded mapping file; passing an older snapshot lets
+    callers replay how a category resolved before a mapping edit.
     """
-    data = load_collection_keys()
-    
+    if data is None:
+        data = load_collection_keys()
+    category_lower = (category or "").lower()
+
     # Direct lookup: if category matches a collection name in mapping, return its SC key
     for _group, collections in data.items():
         for collection_name, sc_key in collections.items():
-            if collection_name.lower() == category.lower():
-                return sc_key
-    
+            if collection_name.lower() == category_lower:
+                return collection_name, sc_key
+
     # Partial match: if category contains key words from collection names
-    category_lower = category.lower()
     for _group, collections in data.items():
         for collection_name, sc_key in collections.items():
             collection_lower = collection_name.lower()
             # Check if collection name is a substring or close match
             if collection_lower in category_lower or category_lower in collection_lower:
-                return sc_key
-    
+                return collection_name, sc_key
+
     return None
 
-def build_collection_key_fingerprint(title: str, category: str, tags: list[str], attributes: dict, metafields: dict) -> str:
+
+def infer_collection_key_from_mapping(category: str, item_specifics: dict) -> str | None:
+    """
+    Try to match the product category to a collection key in the mapping file.
+    """
+    match = match_collection_from_mapping(category)
+    return match[1] if match else None
+
+def _collection_key_fingerprint_core(title: str, category: str, tags: list[str], attributes: dict, metafields: dict) -> dict:
     # Keep fingerprint tight so minor changes don’t trigger new LLM calls
-    core = {
+    return {
         "title": (title or "")[:180],
         "category": category or "",
         "tags": sorted([t for t in (tags or []) if isinstance(t, str) and (t.startswith("Category:") or t.startswith("Material:") or t.startswith("Domain:"))])[:80],
         "attributes_keys": sorted(list((attributes or {}).keys()))[:80],
         "metafields": metafields.get("system", {}),
     }
-    return hash_dict(core)
+
+
+def build_collection_key_fingerprint(title: str, category: str, tags: list[str], attributes: dict, metafields: dict) -> str:
+    return hash_dict(_collection_key_fingerprint_core(title, category, tags, attributes, metafields))
+
+
+def build_legacy_collection_key_fingerprint(title: str, category: str, tags: list[str], attributes: dict, metafields: dict) -> str:
+    """Pre-canonical fingerprint, only used to recognise docs written before the hash switch."""
+    return legacy_hash_dict(_collection_key_fingerprint_core(title, category, tags, attributes, metafields))
 
 def infer_collection_key_llm(
     title: str,
@@ -291,6 +335,10 @@ def infer_collection_key_llm(
 
 def hash_dict(d: dict) -> str:
     """Stable hash of important fields to detect changes."""
+    return canonical_digest(d)
+
+
+def legacy_hash_dict(d: dict) -> str:
     s = str(sorted(d.items()))
     return hashlib.md5(s.encode()).hexdigest()
 
@@ -315,17 +363,60 @@ def compute_title_hash(title: object) -> str | None:
 
 
 def compute_content_hash(fields: dict) -> str:
-    """Stable content hash for normalized Shopify-relevant fields.
+    """Stable content hash for normalized Shopify-relevant fields."""
+    return compute_content_hash_sections(fields)[0]
+
 
-    Uses JSON with sorted keys for determinism; falls back to hash_dict if
-    something isn't JSON-serializable.
+def compute_content_hash_sections(fields: dict) -> tuple[str, dict[str, str]]:
+    """Content hash plus a per-field digest breakdown (see app.services.content_hash)."""
+    return sectioned_digest(fields)
+
+
+def compute_raw_digest(raw: dict | None, ebay_posted_at: object = None) -> str:
+    """Digest of the raw inputs normalization reads; stored as product_raw.raw_digest."""
+    raw = raw or {}
+    fields = {key: raw.get(key) for key in RAW_DIGEST_FIELDS}
+    fields["ebay_posted_at"] = ebay_posted_at
+    return canonical_digest(fields)
+
+
+async def find_stale_raw_ids(ids: list | None = None, *, now_utc: datetime | None = None) -> list:
+    """Raw _ids that need normalizing.
+
+    A SKU is stale when its normalized doc is missing, was built from a
+    different raw digest, or still carries a "Recently Added" tag whose window
+    has expired. Only _id/raw_digest are read, so an unchanged catalog is cheap.
     """
+    id_filter: dict = {"_id": {"$in": ids}} if ids is not None else {}
+
+    built_from: dict = {}
+    async for doc in db.product_normalized.find(id_filter, {"raw_digest": 1}):
+        built_from[doc["_id"]] = doc.get("raw_digest")
+
+    stale: set = set()
+    async for doc in db.product_raw.find(id_filter, {"raw_digest": 1, "SKU": 1}):
+        digest = doc.get("raw_digest")
+        if digest is None or built_from.get(doc.get("SKU") or doc["_id"]) != digest:
+            stale.add(doc["_id"])
+
+    cutoff = (now_utc or datetime.now(timezone.utc)) - timedelta(days=RECENT_DAYS)
+    async for doc in db.product_normalized.find(
+        {**id_filter, "tags": RECENTLY_ADDED_TAG, "first_seen_at": {"$lt": cutoff}},
+        {"_id": 1},
+    ):
+        stale.add(doc["_id"])
+
+    return sorted(stale, key=str)
+
+
+def compute_legacy_content_hash(fields: dict) -> str:
+    """MD5-over-JSON content hash stored by older normalizer runs."""
 
     try:
         payload = json.dumps(fields, sort_keys=True, separators=(",", ":"))
     except TypeError:
         # Fallback: still deterministic, but less structured than JSON
-        return hash_dict(fields)
+        return legacy_hash_dict(fields)
     return hashlib.md5(payload.encode("utf-8")).hexdigest()
 
 
@@ -559,6 +650,32 @@ TAG_ROOM_KEYS = {"Room"}
 
 TAG_IGNORE_VALUES = {"", "No", "Not Water Resistant", "Unknown", "N/A", "na", "NA", "None"}
 
+# Ordered (prefix, keys) rules: the first set containing an item-specifics key wins.
+TAG_KEY_RULES: list[tuple[str, set[str]]] = [
+    ("Brand", TAG_BRAND_KEYS),
+    ("Model", TAG_MODEL_KEYS),
+    ("Material", TAG_MATERIAL_KEYS),
+    ("Color", TAG_COLOR_KEYS),
+    ("Era", TAG_ERA_KEYS),
+    ("Origin", TAG_ORIGIN_KEYS),
+    ("Style", TAG_STYLE_KEYS),
+    ("Movement", TAG_MOVEMENT_KEYS),
+    ("Category", TAG_CATEGORY_KEYS),
+    ("Stone", TAG_STONE_KEYS),
+    ("Feature", TAG_FEATURE_KEYS),
+    ("Size", TAG_SIZE_KEYS),
+    ("Theme", TAG_THEME_KEYS),
+    ("Sport", TAG_SPORT_KEYS),
+    ("Room", TAG_ROOM_KEYS),
+]
+
+
+def tag_prefix_for_key(key: str) -> str | None:
+    for prefix, keys in TAG_KEY_RULES:
+        if key in keys:
+            return prefix
+    return None
+
 
 def build_tags_from_item_specifics(item_specifics: dict) -> list[str]:
     """
@@ -579,45 +696,82 @@ def build_tags_from_item_specifics(item_specifics: dict) -> list[str]:
             tags.add(f"{prefix}:{v}")
 
     for key, value in item_specifics.items():
-        k = str(key).strip()
-
-        if k in TAG_BRAND_KEYS:
-            add_tag("Brand", value)
-        elif k in TAG_MODEL_KEYS:
-            add_tag("Model", value)
-        elif k in TAG_MATERIAL_KEYS:
-            add_tag("Material", value)
-        elif k in TAG_COLOR_KEYS:
-            add_tag("Color", value)
-        elif k in TAG_ERA_KEYS:
-            add_tag("Era", value)
-        elif k in TAG_ORIGIN_KEYS:
-            add_tag("Origin", value)
-        elif k in TAG_STYLE_KEYS:
-            add_tag("Style", value)
-        elif k in TAG_MOVEMENT_KEYS:
-            add_tag("Movement", value)
-        elif k in TAG_CATEGORY_KEYS:
-            add_tag("Category", value)
-        elif k in TAG_STONE_KEYS:
-            add_tag("Stone", value)
-        elif k in TAG_FEATURE_KEYS:
-            add_tag("Feature", value)
-        elif k in TAG_SIZE_KEYS:
-            add_tag("Size", value)
-        elif k in TAG_THEME_KEYS:
-            add_tag("Theme", value)
-        elif k in TAG_SPORT_KEYS:
-            add_tag("Sport", value)
-        elif k in TAG_ROOM_KEYS:
-            add_tag("Room", value)
-        else:
+        prefix = tag_prefix_for_key(str(key).strip())
+        if prefix is None:
             # ignore noisy one-offs to keep tags clean
             continue
+        add_tag(prefix, value)
 
     return sorted(tags)
 
 
+# ---------- Rule versions (selective renormalization) ----------
+
+def _rules_digest(value: object) -> str:
+    return compute_content_hash({"rules": value})
+
+
+def mapping_entries(data: dict | None = None) -> list[list[str]]:
+    """Flatten the collection mapping into ordered [group, collection_name, sc_key] rows."""
+    if data is None:
+        data = load_collection_keys()
+    return [
+        [group, collection_name, sc_key]
+        for group, collections in data.items()
+        for collection_name, sc_key in collections.items()
+    ]
+
+
+@lru_cache(maxsize=1)
+def mapping_version() -> str:
+    # Entry order matters (first match wins), so hash the ordered rows.
+    return _rules_digest(mapping_entries())
+
+
+@lru_cache(maxsize=None)
+def domain_map_version(domain: str | None) -> str:
+    return _rules_digest(
+        {
+            "universal": UNIVERSAL_META_MAP,
+            "domain": DOMAIN_META_MAP.get(domain, {}) if domain else {},
+            "ignore_values": sorted(IGNORE_VALUES),
+        }
+    )
+
+
+@lru_cache(maxsize=1)
+def tag_rules_version() -> str:
+    return _rules_digest(
+        {
+            "keys": [[prefix, sorted(keys)] for prefix, keys in TAG_KEY_RULES],
+            "ignore_values": sorted(TAG_IGNORE_VALUES),
+        }
+    )
+
+
+def build_rule_dependencies(
+    *,
+    category: str,
+    matched_collection: str | None,
+    domain: str | None,
+    item_specifics: dict,
+) -> dict:
+    """Record which rule inputs a normalized doc was built from.
+
+    Indexed fields (attribute_keys, domain, category, matched_collection) let a
+    rule edit be mapped back to the SKUs it can actually affect.
+    """
+    return {
+        "mapping_version": mapping_version(),
+        "matched_collection": matched_collection,
+        "category": category,
+        "domain": domain,
+        "domain_map_version": domain_map_version(domain),
+        "tag_rules_version": tag_rules_version(),
+        "attribute_keys": sorted({str(k).strip() for k in (item_specifics or {})}),
+    }
+
+
 # ---------- eBay taxonomy helpers (unchanged) ----------
 
 BAD_LEAF_NAMES = {
@@ -750,15 +904,22 @@ def normalize_shipping(shipping_raw: dict) -> list[dict]:
     return options
 
 
-async def normalize_from_raw(skus: list[str] | None = None):
+async def normalize_from_raw(skus: list[str] | None = None, *, only_changed: bool | None = None):
     """
     Read product_raw, build Shopify-friendly normalized docs in product_normalized.
     Adds:
       - normalized["metafields"] namespaced structure
       - normalized["metafields"]["raw"]["attributes"] leftovers
       - normalized["metafields"]["system"]["domain"] inferred domain
+
+    only_changed (default: True for catalog runs, False when skus are given)
+    restricts the run to SKUs whose raw digest differs from the one their
+    normalized doc was built from, plus expired "Recently Added" windows.
+    Pass only_changed=False to force a full pass, e.g. after normalizer code changes.
     """
     target_skus = sorted({str(s).strip() for s in (skus or []) if str(s).strip()})
+    if only_changed is None:
+        only_changed = not target_skus
     if target_skus:
         logger.info("▶ Normalizing RAW products for %s SKU(s)...", len(target_skus))
     else:
@@ -769,449 +930,570 @@ async def normalize_from_raw(skus: list[str] | None = None):
         name="idx_product_normalized_canonical_title_hash",
         background=True,
     )
+    for field in ("rule_deps.attribute_keys", "rule_deps.domain", "rule_deps.category", "rule_deps.matched_collection"):
+        await db.product_normalized.create_index(
+            field,
+            name=f"idx_product_normalized_{field.replace('.', '_')}",
+            background=True,
+        )
+    await db.product_normalized.create_index(
+        [("tags", 1), ("first_seen_at", 1)],
+        name="idx_product_normalized_tags_first_seen_at",
+        background=True,
+    )
+
+    target_ids: list | None = target_skus or None
+    if only_changed:
+        target_ids = await find_stale_raw_ids(target_ids)
+        logger.info("Raw digest check: %s SKU(s) changed or due for recency update", len(target_ids))
+        if not target_ids:
+            return {"normalized": 0, "candidates": 0, "collection_key_llm": None}
 
     batch_size = 100
     last_id = None
+    offset = 0
     count = 0
 
     # Limit concurrent normalization work so we don't overload Mongo or external services
     sem = asyncio.Semaphore(10)
 
-    while True:
-        query = {}
-        if target_skus:
-            id_query: dict[str, object] = {"$in": target_skus}
-            if last_id is not None:
-                id_query["$gt"] = last_id
-            query["_id"] = id_query
-        elif last_id is not None:
-            query["_id"] = {"$gt": last_id}
-
-        cursor = db.product_raw.find(query).limit(batch_size).sort("_id", 1)
-
-        batch_docs = []
-        async for raw_doc in cursor:
-            batch_docs.append(raw_doc)
-            last_id = raw_doc["_id"]
-
-        if not batch_docs:
-            break
-
-        # Prefetch existing normalized docs for this batch to avoid N+1 lookups
-        sku_list: list = []
-        for raw_doc in batch_docs:
-            sku = raw_doc.get("SKU") or raw_doc.get("_id")
-            if sku:
-                sku_list.append(sku)
-
-        existing_by_sku: dict = {}
-        if sku_list:
-            cursor_norm = db.product_normalized.find(
-                {"_id": {"$in": sku_list}},
-                {
-                    "first_seen_at": 1,
-                    "collection_key": 1,
-                    "collection_key_fingerprint": 1,
-                    "hash": 1,
-                    "content_hash": 1,
-                    "channels": 1,
-                },
-            )
-            async for doc in cursor_norm:
-                existing_by_sku[doc["_id"]] = doc
-
-        title_hashes: set[str] = set()
-        for raw_doc in batch_docs:
-            raw = raw_doc.get("raw", {}) or {}
-            title_hash = compute_title_hash(raw.get("Title"))
-            if title_hash:
-                title_hashes.add(title_hash)
-
-        existing_by_title_hash: dict[str, list[dict]] = {}
-        if title_hashes:
-            cursor_title_matches = db.product_normalized.find(
-                {"canonical_title_hash": {"$in": list(title_hashes)}},
-                {
-                    "_id": 1,
-                    "title": 1,
-                    "canonical_title": 1,
-                    "canonical_title_hash": 1,
-                    "quantity": 1,
-                    "updated_at": 1,
-                },
-            )
-            async for doc in cursor_title_matches:
-                title_hash = doc.get("canonical_title_hash")
-                if not title_hash:
-                    continue
-                existing_by_title_hash.setdefault(title_hash, []).append(doc)
-
-        # Single timestamp per batch is sufficient and cheaper
-        now_utc = datetime.now(timezone.utc)
-
-        async def process_raw(raw_doc: dict) -> int:
-            async with sem:
-                sku = raw_doc.get("SKU") or raw_doc.get("_id")
-                if not sku:
-                    logger.warning("Found raw product with no SKU, skipping")
-                    return 0
+    # SKUs the mapping file cannot resolve are classified by a separate batched
+    # LLM stage instead of one blocking OpenAI call per SKU.
+    from app.services.collection_key_classifier import CollectionKeyClassifier
 
-                logger.debug(f"Processing normalization for SKU: {sku}")
-                raw = raw_doc.get("raw", {}) or {}
+    classifier = CollectionKeyClassifier(
+        allowed_keys=allowed_collection_keys(),
+        model=OPENAI_MODEL,
+        hash_fields=compute_content_hash_sections,
+    )
+    classifier.start()
 
-                title = (raw.get("Title") or "").strip()
-                canonical_title = canonicalize_title(title)
-                canonical_title_hash = compute_title_hash(title)
-                description = (raw.get("Description") or "").strip()
-                images = raw.get("Images", []) or []
-                # Normalize price to a numeric value (float) when possible
-                raw_price = raw.get("Price")
-                price = None
-                if isinstance(raw_price, (int, float)):
-                    price = float(raw_price)
-                elif raw_price is not None:
-                    try:
-                        # Allow common string formats like "49.99" or "$49.99"
-                        price_str = str(raw_price).replace("$", "").strip()
-                        price = float(price_str) if price_str else None
-                    except (TypeError, ValueError):
-                        price = None
-                quantity = raw.get("QuantityAvailable", 0)
-                category_id = raw.get("PrimaryCategoryID")
-                item_specifics = raw.get("ItemSpecifics", {}) or {}
-
-                # --- eBay taxonomy: path → category + tags + metafield-like structure ---
-                category_path, category_leaf, category_ancestors, category_root = parse_ebay_category_path(
-                    raw,
-                    item_specifics,
+    try:
+        while True:
+            query = {}
+            if target_ids is not None:
+                chunk = target_ids[offset:offset + batch_size]
+                if not chunk:
+                    break
+                offset += batch_size
+                query["_id"] = {"$in": chunk}
+            elif last_id is not None:
+                query["_id"] = {"$gt": last_id}
+
+            cursor = db.product_raw.find(query).limit(batch_size).sort("_id", 1)
+
+            batch_docs = []
+            async for raw_doc in cursor:
+                batch_docs.append(raw_doc)
+                last_id = raw_doc["_id"]
+
+            if not batch_docs:
+                break
+
+            # Prefetch existing normalized docs for this batch to avoid N+1 lookups
+            sku_list: list = []
+            for raw_doc in batch_docs:
+                sku = raw_doc.get("SKU") or raw_doc.get("_id")
+                if sku:
+                    sku_list.append(sku)
+
+            existing_by_sku: dict = {}
+            if sku_list:
+                cursor_norm = db.product_normalized.find(
+                    {"_id": {"$in": sku_list}},
+                    {
+                        "first_seen_at": 1,
+                        "collection_key": 1,
+                        "collection_key_fingerprint": 1,
+                        "hash": 1,
+                        "content_hash": 1,
+                        "last_synced_hash": 1,
+                        "channels": 1,
+                        "rule_deps": 1,
+                        "raw_digest": 1,
+                        SEARCH_FIELD: 1,
+                    },
                 )
+                async for doc in cursor_norm:
+                    existing_by_sku[doc["_id"]] = doc
 
-                mapped_category = choose_category_from_path(
-                    category_leaf,
-                    category_ancestors,
-                    category_id,
+            title_hashes: set[str] = set()
+            for raw_doc in batch_docs:
+                raw = raw_doc.get("raw", {}) or {}
+                title_hash = compute_title_hash(raw.get("Title"))
+                if title_hash:
+                    title_hashes.add(title_hash)
+
+            existing_by_title_hash: dict[str, list[dict]] = {}
+            if title_hashes:
+                cursor_title_matches = db.product_normalized.find(
+                    {"canonical_title_hash": {"$in": list(title_hashes)}},
+                    {
+                        "_id": 1,
+                        "title": 1,
+                        "canonical_title": 1,
+                        "canonical_title_hash": 1,
+                        "quantity": 1,
+                        "updated_at": 1,
+                    },
                 )
+                async for doc in cursor_title_matches:
+                    title_hash = doc.get("canonical_title_hash")
+                    if not title_hash:
+                        continue
+                    existing_by_title_hash.setdefault(title_hash, []).append(doc)
+
+            # Single timestamp per batch is sufficient and cheaper
+            now_utc = datetime.now(timezone.utc)
+
+            async def process_raw(raw_doc: dict) -> int:
+                async with sem:
+                    sku = raw_doc.get("SKU") or raw_doc.get("_id")
+                    if not sku:
+                        logger.warning("Found raw product with no SKU, skipping")
+                        return 0
+
+                    logger.debug(f"Processing normalization for SKU: {sku}")
+                    raw = raw_doc.get("raw", {}) or {}
+
+                    raw_digest = compute_raw_digest(raw, raw_doc.get("ebay_posted_at"))
+                    if raw_doc.get("raw_digest") != raw_digest:
+                        # Written before digests existed, or by a path that dropped it.
+                        await db.product_raw.update_one({"_id": raw_doc["_id"]}, {"$set": {"raw_digest": raw_digest}})
+
+                    title = (raw.get("Title") or "").strip()
+                    canonical_title = canonicalize_title(title)
+                    canonical_title_hash = compute_title_hash(title)
+                    description = (raw.get("Description") or "").strip()
+                    images = raw.get("Images", []) or []
+                    # Normalize price to a numeric value (float) when possible
+                    raw_price = raw.get("Price")
+                    price = None
+                    if isinstance(raw_price, (int, float)):
+                        price = float(raw_price)
+                    elif raw_price is not None:
+                        try:
+                            # Allow common string formats like "49.99" or "$49.99"
+                            price_str = str(raw_price).replace("$", "").strip()
+                            price = float(price_str) if price_str else None
+                        except (TypeError, ValueError):
+                            price = None
+                    quantity = raw.get("QuantityAvailable", 0)
+                    category_id = raw.get("PrimaryCategoryID")
+                    item_specifics = raw.get("ItemSpecifics", {}) or {}
+
+                    # --- eBay taxonomy: path → category + tags + metafield-like structure ---
+                    category_path, category_leaf, category_ancestors, category_root = parse_ebay_category_path(
+                        raw,
+                        item_specifics,
+                    )
 
-                # NEW: build structured metafields from ItemSpecifics
-                structured_metafields, _leftovers = build_structured_metafields(mapped_category, item_specifics)
+                    mapped_category = choose_category_from_path(
+                        category_leaf,
+                        category_ancestors,
+                        category_id,
+                    )
 
-                # Default AI workflow status for downstream content generation.
-                # Do NOT overwrite if it already exists (e.g., moved to in_progress/completed).
-                ai_ns = structured_metafields.setdefault("ai_", {})
-                if not ai_ns.get("content_status"):
-                    ai_ns["content_status"] = "pending"
+                    # NEW: build structured metafields from ItemSpecifics
+                    structured_metafields, _leftovers = build_structured_metafields(mapped_category, item_specifics)
 
-                # Preserve first_seen_at
-                existing_norm = existing_by_sku.get(sku)
+                    # Default AI workflow status for downstream content generation.
+                    # Do NOT overwrite if it already exists (e.g., moved to in_progress/completed).
+                    ai_ns = structured_metafields.setdefault("ai_", {})
+                    if not ai_ns.get("content_status"):
+                        ai_ns["content_status"] = "pending"
 
-                if existing_norm and existing_norm.get("first_seen_at"):
-                    first_seen_at = existing_norm["first_seen_at"]
-                else:
-                    first_seen_at = now_utc
+                    # Preserve first_seen_at
+                    existing_norm = existing_by_sku.get(sku)
 
-                # Tags from item specifics (unchanged)
-                attr_tags = set(build_tags_from_item_specifics(item_specifics))
+                    if existing_norm and existing_norm.get("first_seen_at"):
+                        first_seen_at = existing_norm["first_seen_at"]
+                    else:
+                        first_seen_at = now_utc
 
-                # Add taxonomy tags from ancestors and root
-                if category_root:
-                    attr_tags.add(f"Domain:{category_root}")
+                    # Tags from item specifics (unchanged)
+                    attr_tags = set(build_tags_from_item_specifics(item_specifics))
 
-                for ancestor in category_ancestors:
-                    attr_tags.add(f"Category:{ancestor}")
+                    # Add taxonomy tags from ancestors and root
+                    if category_root:
+                        attr_tags.add(f"Domain:{category_root}")
 
-                # Ensure tz-aware for comparisons and storage
-                if first_seen_at.tzinfo is None:
-                    first_seen_at = first_seen_at.replace(tzinfo=timezone.utc)
+                    for ancestor in category_ancestors:
+                        attr_tags.add(f"Category:{ancestor}")
 
-                local_now_utc = now_utc
-                if local_now_utc.tzinfo is None:
-                    local_now_utc = local_now_utc.replace(tzinfo=timezone.utc)
+                    # Ensure tz-aware for comparisons and storage
+                    if first_seen_at.tzinfo is None:
+                        first_seen_at = first_seen_at.replace(tzinfo=timezone.utc)
 
-                if first_seen_at >= (local_now_utc - timedelta(days=RECENT_DAYS)):
-                    attr_tags.add("Recently Added")
+                    local_now_utc = now_utc
+                    if local_now_utc.tzinfo is None:
+                        local_now_utc = local_now_utc.replace(tzinfo=timezone.utc)
 
-                all_tags = sorted(attr_tags)
+                    if first_seen_at >= (local_now_utc - timedelta(days=RECENT_DAYS)):
+                        attr_tags.add(RECENTLY_ADDED_TAG)
 
-                # --- COLLECTION KEY (SC:...) ---
-                existing_sc = pick_existing_sc_tag(all_tags)
+                    all_tags = sorted(attr_tags)
 
-                # only re-run the model if we don't already have one OR inputs changed
-                ck_fingerprint = build_collection_key_fingerprint(
-                    title, mapped_category, all_tags, item_specifics, structured_metafields
-                )
-                prev_ck_fp = existing_norm.get("collection_key_fingerprint") if existing_norm else None
-                prev_ck = existing_norm.get("collection_key") if existing_norm else None
-
-                collection_key = None
-
-                if existing_sc:
-                    # Already has SC: tag in tags
-                    collection_key = existing_sc
-                    logger.debug(f"SKU {sku}: Using existing SC tag: {collection_key}")
-                elif prev_ck and prev_ck_fp == ck_fingerprint:
-                    # Reuse previous collection key if inputs haven't changed
-                    collection_key = prev_ck
-                    logger.debug(f"SKU {sku}: Reusing previous collection key: {collection_key}")
-                else:
-                    # Try mapping-based approach first
-                    collection_key = infer_collection_key_from_mapping(mapped_category, item_specifics)
-                    logger.debug(f"SKU {sku}: Mapping-based collection key: {collection_key}")
-
-                    # Fall back to LLM if mapping didn't find a match
-                    if not collection_key:
-                        try:
-                            collection_key = await asyncio.to_thread(
-                                infer_collection_key_llm,
-                                title,
-                                mapped_category,
-                                all_tags,
-                                item_specifics,
-                                structured_metafields,
-                            )
-                            logger.debug(f"SKU {sku}: LLM-inferred collection key: {collection_key}")
-                        except Exception as e:  # pragma: no cover - defensive around external API
-                            logger.warning(f"LLM collection-key inference failed for SKU={sku}: {e}")
-                            collection_key = None
+                    # --- COLLECTION KEY (SC:...) ---
+                    existing_sc = pick_existing_sc_tag(all_tags)
 
-                if collection_key:
-                    attr_tags.add(collection_key)
-                    all_tags = sorted(attr_tags)
+                    # only re-run the model if we don't already have one OR inputs changed
+                    ck_fingerprint = build_collection_key_fingerprint(
+                        title, mapped_category, all_tags, item_specifics, structured_metafields
+                    )
+                    prev_ck_fp = existing_norm.get("collection_key_fingerprint") if existing_norm else None
+                    prev_ck = existing_norm.get("collection_key") if existing_norm else None
+                    if prev_ck and prev_ck_fp and not is_canonical_digest(prev_ck_fp):
+                        # Written before the canonical hash switch: accept the legacy
+                        # fingerprint so unchanged docs don't trigger new LLM calls.
+                        legacy_fp = build_legacy_collection_key_fingerprint(
+                            title, mapped_category, all_tags, item_specifics, structured_metafields
+                        )
+                        if prev_ck_fp == legacy_fp:
+                            prev_ck_fp = ck_fingerprint
+
+                    collection_key = None
+                    needs_llm_key = False
+                    mapping_match = match_collection_from_mapping(mapped_category)
+
+                    if existing_sc:
+                        # Already has SC: tag in tags
+                        collection_key = existing_sc
+                        logger.debug(f"SKU {sku}: Using existing SC tag: {collection_key}")
+                    elif mapping_match:
+                        # Mapping is cheap and authoritative, so a mapping edit always wins
+                        # over a previously reused key.
+                        collection_key = mapping_match[1]
+                        logger.debug(f"SKU {sku}: Mapping-based collection key: {collection_key}")
+                    elif prev_ck and prev_ck_fp == ck_fingerprint:
+                        # Reuse previous collection key if inputs haven't changed
+                        collection_key = prev_ck
+                        logger.debug(f"SKU {sku}: Reusing previous collection key: {collection_key}")
+                    else:
+                        # Fall back to the batched LLM stage if mapping didn't find a match;
+                        # the key is written back once the doc itself has been saved.
+                        needs_llm_key = classifier.enabled
+
+                    rule_deps = build_rule_dependencies(
+                        category=mapped_category,
+                        matched_collection=mapping_match[0] if mapping_match else None,
+                        domain=(structured_metafields.get("system") or {}).get("domain"),
+                        item_specifics=item_specifics,
+                    )
 
-                # Normalize shipping
-                shipping_raw = raw.get("Shipping", {}) or {}
-                normalized_shipping = normalize_shipping(shipping_raw)
-
-                # Extract package weight/dimensions from Shipping.package_details (if present)
-                package_details_raw = shipping_raw.get("package_details") or {}
-                normalized_package: dict = {}
-
-                def _normalize_measure(measure: object) -> dict | None:
-                    if not isinstance(measure, dict):
-                        return None
-                    value = measure.get("value")
-                    if value is None:
-                        return None
-                    try:
-                        v = float(str(value).strip())
-                    except Exception:
-                        return None
-                    out: dict[str, object] = {"value": v}
-                    unit = measure.get("unit")
-                    if unit:
-                        out["unit"] = str(unit)
-                    msys = measure.get("measurement_system") or measure.get("measurementSystem")
-                    if msys:
-                        out["measurement_system"] = str(msys)
-                    return out
-
-                if isinstance(package_details_raw, dict):
-                    weight_raw = package_details_raw.get("weight") or {}
-                    dims_raw = package_details_raw.get("dimensions") or {}
-
-                    # Weight (major/minor, e.g. lb/oz)
-                    weight_norm: dict = {}
-                    major_norm = _normalize_measure(weight_raw.get("major")) if isinstance(weight_raw, dict) else None
-                    minor_norm = _normalize_measure(weight_raw.get("minor")) if isinstance(weight_raw, dict) else None
-                    if major_norm is not None:
-                        weight_norm["major"] = major_norm
-                    if minor_norm is not None:
-                        weight_norm["minor"] = minor_norm
-                    if weight_norm:
-                        normalized_package["weight"] = weight_norm
-
-                    # Dimensions (length/width/height)
-                    dims_norm: dict = {}
-                    if isinstance(dims_raw, dict):
-                        for key in ("length", "width", "height"):
-                            m = _normalize_measure(dims_raw.get(key))
-                            if m is not None:
-                                dims_norm[key] = m
-                    if dims_norm:
-                        normalized_package["dimensions"] = dims_norm
-
-                # Expose package info as a shipping namespace metafield for Shopify
-                if normalized_package:
-                    structured_metafields.setdefault("shipping", {})["package"] = normalized_package
-
-                # Adjust price based on shipping cost
-                adjusted_price = price
-                if normalized_shipping:
-                    # Get the first domestic shipping cost
-                    shipping_cost = None
-                    for opt in normalized_shipping:
-                        if opt.get("type") == "domestic":
-                            try:
-                                shipping_cost = float(opt.get("cost", 0))
-                                break
-                            except (ValueError, TypeError):
-                                continue
+                    if collection_key:
+                        attr_tags.add(collection_key)
+                        all_tags = sorted(attr_tags)
 
-                    if shipping_cost is not None:
-                        # Apply pricing adjustment based on shipping cost tier
-                        if shipping_cost == 8.0:
-                            adjusted_price = (price or 0) + 10
-                            attr_tags.add("free_shipping")
-                            logger.debug(
-                                f"SKU {sku}: $8 shipping → +$10 to price, added free_shipping tag"
-                            )
-                        elif shipping_cost == 14.0:
-                            adjusted_price = (price or 0) + 15
-                            attr_tags.add("free_shipping")
-                            logger.debug(
-                                f"SKU {sku}: $14 shipping → +$15 to price, added free_shipping tag"
-                            )
-                        elif shipping_cost == 18.0:
-                            adjusted_price = (price or 0) + 20
-                            attr_tags.add("free_shipping")
-                            logger.debug(
-                                f"SKU {sku}: $18 shipping → +$20 to price, added free_shipping tag"
-                            )
+                    # Normalize shipping
+                    shipping_raw = raw.get("Shipping", {}) or {}
+                    normalized_shipping = normalize_shipping(shipping_raw)
 
-                    # Update all_tags with any new tags added
-                    all_tags = sorted(attr_tags)
+                    # Extract package weight/dimensions from Shipping.package_details (if present)
+                    package_details_raw = shipping_raw.get("package_details") or {}
+                    normalized_package: dict = {}
+
+                    def _normalize_measure(measure: object) -> dict | None:
+                        if not isinstance(measure, dict):
+                            return None
+                        value = measure.get("value")
+                        if value is None:
+                            return None
+                        try:
+                            v = float(str(value).strip())
+                        except Exception:
+                            return None
+                        out: dict[str, object] = {"value": v}
+                        unit = measure.get("unit")
+                        if unit:
+                            out["unit"] = str(unit)
+                        msys = measure.get("measurement_system") or measure.get("measurementSystem")
+                        if msys:
+                            out["measurement_system"] = str(msys)
+                        return out
+
+                    if isinstance(package_details_raw, dict):
+                        weight_raw = package_details_raw.get("weight") or {}
+                        dims_raw = package_details_raw.get("dimensions") or {}
+
+                        # Weight (major/minor, e.g. lb/oz)
+                        weight_norm: dict = {}
+                        major_norm = _normalize_measure(weight_raw.get("major")) if isinstance(weight_raw, dict) else None
+                        minor_norm = _normalize_measure(weight_raw.get("minor")) if isinstance(weight_raw, dict) else None
+                        if major_norm is not None:
+                            weight_norm["major"] = major_norm
+                        if minor_norm is not None:
+                            weight_norm["minor"] = minor_norm
+                        if weight_norm:
+                            normalized_package["weight"] = weight_norm
+
+                        # Dimensions (length/width/height)
+                        dims_norm: dict = {}
+                        if isinstance(dims_raw, dict):
+                            for key in ("length", "width", "height"):
+                                m = _normalize_measure(dims_raw.get(key))
+                                if m is not None:
+                                    dims_norm[key] = m
+                        if dims_norm:
+                            normalized_package["dimensions"] = dims_norm
+
+                    # Expose package info as a shipping namespace metafield for Shopify
+                    if normalized_package:
+                        structured_metafields.setdefault("shipping", {})["package"] = normalized_package
+
+                    # Adjust price based on shipping cost
+                    adjusted_price = price
+                    if normalized_shipping:
+                        # Get the first domestic shipping cost
+                        shipping_cost = None
+                        for opt in normalized_shipping:
+                            if opt.get("type") == "domestic":
+                                try:
+                                    shipping_cost = float(opt.get("cost", 0))
+                                    break
+                                except (ValueError, TypeError):
+                                    continue
+
+                        if shipping_cost is not None:
+                            # Apply pricing adjustment based on shipping cost tier
+                            if shipping_cost == 8.0:
+                                adjusted_price = (price or 0) + 10
+                                attr_tags.add("free_shipping")
+                                logger.debug(
+                                    f"SKU {sku}: $8 shipping → +$10 to price, added free_shipping tag"
+                                )
+                            elif shipping_cost == 14.0:
+                                adjusted_price = (price or 0) + 15
+                                attr_tags.add("free_shipping")
+                                logger.debug(
+                                    f"SKU {sku}: $14 shipping → +$15 to price, added free_shipping tag"
+                                )
+                            elif shipping_cost == 18.0:
+                                adjusted_price = (price or 0) + 20
+                                attr_tags.add("free_shipping")
+                                logger.debug(
+                                    f"SKU {sku}: $18 shipping → +$20 to price, added free_shipping tag"
+                                )
+
+                        # Update all_tags with any new tags added
+                        all_tags = sorted(attr_tags)
+
+                    # Ensure money values are stable (2dp) for storage + downstream integrations.
+                    # This prevents float artifacts like 39.989999999999995.
+                    adjusted_price = _money_2dp(adjusted_price)
+
+                    # Extract eBay posted date from raw document
+                    ebay_posted_at = raw_doc.get("ebay_posted_at")
+
+                    # Compute a stable "content hash" of the normalized business fields.
+                    # This intentionally excludes transient fields like last_normalized_at
+                    # so we can skip writing unchanged documents.
+                    content_fields = {
+                        "title": title,
+                        "description": description,
+                        "images": tuple(images),
+                        "price": adjusted_price,
+                        "quantity": quantity,
+                        "category": mapped_category,
+                        "tags": tuple(all_tags),
+                        "metafields": structured_metafields,
+                        "shipping": normalized_shipping,
+                        "package": normalized_package,
+                    }
 
-                # Ensure money values are stable (2dp) for storage + downstream integrations.
-                # This prevents float artifacts like 39.989999999999995.
-                adjusted_price = _money_2dp(adjusted_price)
-
-                # Extract eBay posted date from raw document
-                ebay_posted_at = raw_doc.get("ebay_posted_at")
-
-                # Compute a stable "content hash" of the normalized business fields.
-                # This intentionally excludes transient fields like last_normalized_at
-                # so we can skip writing unchanged documents.
-                content_fields = {
-                    "title": title,
-                    "description": description,
-                    "images": tuple(images),
-                    "price": adjusted_price,
-                    "quantity": quantity,
-                    "category": mapped_category,
-                    "tags": tuple(all_tags),
-                    "metafields": structured_metafields,
-                    "shipping": normalized_shipping,
-                    "package": normalized_package,
-                }
-
-                new_hash = compute_content_hash(content_fields)
-
-                existing_hash = None
-                if existing_norm:
-                    existing_hash = existing_norm.get("content_hash") or existing_norm.get("hash")
-                if existing_hash == new_hash:
-                    logger.debug(f"SKU {sku}: normalized hash unchanged, skipping update")
-                    return 0
-
-                title_match_candidates: list[dict[str, object]] = []
-                if canonical_title_hash:
-                    for candidate in existing_by_title_hash.get(canonical_title_hash, []):
-                        candidate_sku = candidate.get("_id")
-                        if not candidate_sku or candidate_sku == sku:
-                            continue
-                        title_match_candidates.append(
-                            {
-                                "sku": str(candidate_sku),
-                                "title": candidate.get("title") or "",
-                                "quantity": int(candidate.get("quantity") or 0),
-                                "updated_at": candidate.get("updated_at"),
+                    new_hash, hash_sections = compute_content_hash_sections(content_fields)
+                    search_terms = build_search_terms(
+                        keys=(sku, raw.get("ItemID")),
+                        texts=(
+                            title,
+                            mapped_category,
+                            (((existing_norm or {}).get("channels") or {}).get("etsy") or {}).get("title"),
+                        ),
+                    )
+
+                    llm_item = None
+                    if needs_llm_key:
+                        llm_item = {
+                            "sku": sku,
+                            "title": title,
+                            "category": mapped_category,
+                            "tags": all_tags,
+                            "attributes": item_specifics,
+                            "metafields": structured_metafields,
+                            "content_fields": content_fields,
+                            "fingerprint": ck_fingerprint,
+                        }
+
+                    existing_hash = None
+                    if existing_norm:
+                        existing_hash = existing_norm.get("content_hash") or existing_norm.get("hash")
+                    hash_migration: dict = {}
+                    if existing_hash and not is_canonical_digest(existing_hash):
+                        # First run after the canonical hash switch: an unchanged doc still
+                        # carries the legacy digest. Upgrade the stored hashes in place
+                        # (including Shopify's last_synced_hash) instead of rewriting it.
+                        if compute_legacy_content_hash(content_fields) == existing_hash:
+                            hash_migration = {
+                                "hash": new_hash,
+                                "content_hash": new_hash,
+                                "content_hash_sections": hash_sections,
+                                "collection_key_fingerprint": ck_fingerprint,
                             }
-                        )
+                            if get_shopify_field(existing_norm, "last_synced_hash") == existing_hash:
+                                hash_migration.update(set_shopify_fields_set({"last_synced_hash": new_hash}))
+                            existing_hash = new_hash
+
+                    if existing_hash == new_hash:
+                        logger.debug(f"SKU {sku}: normalized hash unchanged, skipping update")
+                        stamp_update = dict(hash_migration)
+                        if existing_norm.get("rule_deps") != rule_deps:
+                            # Keep dependency stamps current even when content is unchanged.
+                            stamp_update["rule_deps"] = rule_deps
+                        if existing_norm.get("raw_digest") != raw_digest:
+                            stamp_update["raw_digest"] = raw_digest
+                        if existing_norm.get(SEARCH_FIELD) != search_terms:
+                            stamp_update[SEARCH_FIELD] = search_terms
+                        if stamp_update:
+                            await db.product_normalized.update_one({"_id": sku}, {"$set": stamp_update})
+                        if llm_item:
+                            classifier.submit(llm_item)
+                        return 0
+
+                    title_match_candidates: list[dict[str, object]] = []
+                    if canonical_title_hash:
+                        for candidate in existing_by_title_hash.get(canonical_title_hash, []):
+                            candidate_sku = candidate.get("_id")
+                            if not candidate_sku or candidate_sku == sku:
+                                continue
+                            title_match_candidates.append(
+                                {
+                                    "sku": str(candidate_sku),
+                                    "title": candidate.get("title") or "",
+                                    "quantity": int(candidate.get("quantity") or 0),
+                                    "updated_at": candidate.get("updated_at"),
+                                }
+                            )
 
-                title_match_candidates.sort(
-                    key=lambda candidate: (
-                        -int(candidate.get("quantity") or 0),
-                        str(candidate.get("sku") or ""),
+                    title_match_candidates.sort(
+                        key=lambda candidate: (
+                            -int(candidate.get("quantity") or 0),
+                            str(candidate.get("sku") or ""),
+                        )
                     )
-                )
-                title_match_candidates = title_match_candidates[:10]
+                    title_match_candidates = title_match_candidates[:10]
+
+                    channels = dict((existing_norm or {}).get("channels") or {})
+                    channels_ebay = dict(channels.get("ebay") or {})
+                    channels_ebay.update(
+                        {
+                            "posted_at": ebay_posted_at,
+                            "category": {
+                                "id": category_id,
+                                "path": category_path,
+                                "root": category_root,
+                                "leaf": category_leaf,
+                                "ancestors": category_ancestors,
+                            },
+                        }
+                    )
+                    channels["ebay"] = channels_ebay
 
-                channels = dict((existing_norm or {}).get("channels") or {})
-                channels_ebay = dict(channels.get("ebay") or {})
-                channels_ebay.update(
-                    {
-                        "posted_at": ebay_posted_at,
-                        "category": {
+                    normalized = {
+                        "_id": sku,
+                        "sku": sku,
+                        "title": title,
+                        "canonical_title": canonical_title,
+                        "canonical_title_hash": canonical_title_hash,
+                        "description": description,
+                        "images": images,
+                        "price": adjusted_price,
+                        "quantity": quantity,
+
+                        # leaf-based (or ancestor-based) category
+                        "category": mapped_category,
+
+                        # raw item specifics (keep as-is, useful for audits/debug)
+                        "attributes": item_specifics,
+
+                        # NEW: namespaced, Shopify-ready metafield structure
+                        "metafields": structured_metafields,
+
+                        # combined tags: specifics + taxonomy + recency
+                        "tags": all_tags,
+
+                        # shipping options and costs
+                        "shipping": normalized_shipping,
+
+                        # package-level weight and dimensions (already mirrored into metafields.shipping.package)
+                        "package": normalized_package,
+
+                        # structured breakdown of the eBay taxonomy
+                        "ebay_category": {
                             "id": category_id,
                             "path": category_path,
                             "root": category_root,
                             "leaf": category_leaf,
                             "ancestors": category_ancestors,
                         },
-                    }
-                )
-                channels["ebay"] = channels_ebay
-
-                normalized = {
-                    "_id": sku,
-                    "sku": sku,
-                    "title": title,
-                    "canonical_title": canonical_title,
-                    "canonical_title_hash": canonical_title_hash,
-                    "description": description,
-                    "images": images,
-                    "price": adjusted_price,
-                    "quantity": quantity,
-
-                    # leaf-based (or ancestor-based) category
-                    "category": mapped_category,
-
-                    # raw item specifics (keep as-is, useful for audits/debug)
-                    "attributes": item_specifics,
-
-                    # NEW: namespaced, Shopify-ready metafield structure
-                    "metafields": structured_metafields,
-
-                    # combined tags: specifics + taxonomy + recency
-                    "tags": all_tags,
-
-                    # shipping options and costs
-                    "shipping": normalized_shipping,
-
-                    # package-level weight and dimensions (already mirrored into metafields.shipping.package)
-                    "package": normalized_package,
-
-                    # structured breakdown of the eBay taxonomy
-                    "ebay_category": {
-                        "id": category_id,
-                        "path": category_path,
-                        "root": category_root,
-                        "leaf": category_leaf,
-                        "ancestors": category_ancestors,
-                    },
 
-                    "first_seen_at": first_seen_at,
-                    "last_normalized_at": local_now_utc,
-                    "collection_key": collection_key,
-                    "collection_key_fingerprint": ck_fingerprint,
-                    "title_match_candidate_count": len(title_match_candidates),
-                    "title_match_candidate_skus": [candidate["sku"] for candidate in title_match_candidates],
-                    "title_match_candidates": title_match_candidates,
-                    # Backwards compatibility: keep legacy 'hash' field, but also
-                    # store a more explicit 'content_hash' used by Shopify sync.
-                    "hash": new_hash,
-                    "content_hash": new_hash,
-                    "ebay_posted_at": ebay_posted_at,
-                    "channels": channels,
-
-                }
-
-                await db.product_normalized.update_one(
-                    {"_id": sku},
-                    {"$set": normalized},
-                    upsert=True,
-                )
+                        "first_seen_at": first_seen_at,
+                        "last_normalized_at": local_now_utc,
+                        "collection_key": collection_key,
+                        "collection_key_fingerprint": ck_fingerprint,
+                        "title_match_candidate_count": len(title_match_candidates),
+                        "title_match_candidate_skus": [candidate["sku"] for candidate in title_match_candidates],
+                        "title_match_candidates": title_match_candidates,
+                        # Backwards compatibility: keep legacy 'hash' field, but also
+                        # store a more explicit 'content_hash' used by Shopify sync.
+                        "hash": new_hash,
+                        "content_hash": new_hash,
+                        # per-field digests, handy for seeing which section changed
+                        "content_hash_sections": hash_sections,
+                        "ebay_posted_at": ebay_posted_at,
+                        "channels": channels,
+                        "rule_deps": rule_deps,
+                        # raw inputs this doc was built from (see find_stale_raw_ids)
+                        "raw_digest": raw_digest,
+                        # lowercased tokens for dashboard prefix search (search_index.py)
+                        SEARCH_FIELD: search_terms,
+                    }
 
-                logger.debug(
-                    f"✓ Saved normalized product for SKU: {sku} | Category: {mapped_category} | Tags: {len(all_tags)}"
-                )
+                    await db.product_normalized.update_one(
+                        {"_id": sku},
+                        {"$set": normalized},
+                        upsert=True,
+                    )
 
-                return 1
+                    logger.debug(
+                        f"✓ Saved normalized product for SKU: {sku} | Category: {mapped_category} | Tags: {len(all_tags)}"
+                    )
 
-        # Process this batch concurrently with bounded concurrency
-        tasks = [asyncio.create_task(process_raw(raw_doc)) for raw_doc in batch_docs]
-        if tasks:
-            results = await asyncio.gather(*tasks)
-            count += sum(results)
+                    if llm_item:
+                        classifier.submit(llm_item)
+
+                    return 1
+
+            # Process this batch concurrently with bounded concurrency
+            tasks = [asyncio.create_task(process_raw(raw_doc)) for raw_doc in batch_docs]
+            if tasks:
+                results = await asyncio.gather(*tasks)
+                count += sum(results)
+    finally:
+        # Stop the workers and flush queued writes even when a batch fails.
+        llm_stats = await classifier.close()
+
+    if llm_stats.get("submitted"):
+        logger.info(
+            "✔ LLM collection keys: %s submitted, %s classified in %s request(s), %s written",
+            llm_stats["submitted"],
+            llm_stats["classified"],
+            llm_stats["requests"],
+            llm_stats["written"],
+        )
 
     logger.info(f"✔ Normalization complete. {count} products updated.")
-    return {"normalized": count}
+    return {
+        "normalized": count,
+        "candidates": len(target_ids) if target_ids is not None else None,
+        "collection_key_llm": llm_stats,
+    }
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+SOURCE_COLLECTIONS = ("product_raw", "product_normalized")
+RESUME_TOKEN_COLLECTION = "change_stream_resume_tokens"
+RESUME_TOKEN_PREFIX = "product_change_tailer"
+FLUSH_INTERVAL_SECONDS = 0.5
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+RESUME_TOKEN_LOST_CODES = {260, 280, 286}
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573}
+
+PRODUCT_CHANGE_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+    {"$project": {"documentKey": 1, "operationType": 1, "updateDescription": 1}},
+]
+# Fields the consumers write back onto product_normalized; updates touching
+# only these are not product changes.
+DERIVED_FIELD_PREFIXES = ("drift",)
+
+
+class ProductChangeConsumer:
+    """A derived structure kept current from product_raw/product_normalized changes.
+
+    ``refresh`` receives the SKUs changed in the consumer's ``collections``
+    and returns a count of rows touched. ``rebuild`` recomputes everything
+    and is used when changes may have been missed. ``bootstrap`` runs once
+    on start (indexes, first build).
+    """
+
+    name = "consumer"
+    collections: tuple[str, ...] = SOURCE_COLLECTIONS
+
+    async def bootstrap(self) -> None:
+        return None
+
+    async def refresh(self, skus: list[str]) -> int:
+        raise NotImplementedError
+
+    async def rebuild(self) -> int:
+        raise NotImplementedError
+
+
+class ProductChangeTailer:
+    """Tail product_raw and product_normalized once and fan changed SKUs out to consumers.
+
+    Changed SKUs are collected per flush interval and refreshed in batches.
+    Resume tokens are only saved after every consumer has refreshed every
+    SKU seen so far. When a token has expired, all consumers rebuild in
+    full. Without change streams (standalone mongod), they rebuild every
+    ``rebuild_seconds`` instead.
+    """
+
+    def __init__(self, consumers: list[ProductChangeConsumer], *, rebuild_seconds: float | None = None) -> None:
+        self.consumers = list(consumers)
+        self.rebuild_seconds = float(rebuild_seconds or settings.PRODUCT_CHANGE_TAILER_REBUILD_SECONDS)
+        self._pending: dict[str, set[str]] = {consumer.name: set() for consumer in self.consumers}
+        self._tokens: dict[str, dict | None] = {}
+        self._saved_tokens: dict[str, dict | None] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._rebuild_lock = asyncio.Lock()
+        self.stats: dict[str, Any] = {
+            "events": 0,
+            "flushes": 0,
+            "rebuilds": 0,
+            "errors": 0,
+            "refreshed": {consumer.name: 0 for consumer in self.consumers},
+        }
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._bootstrap(), name="product-change-bootstrap"),
+            asyncio.create_task(self._flush_loop(), name="product-change-flush"),
+            *(
+                asyncio.create_task(self._watch_loop(name), name=f"product-change-watch-{name}")
+                for name in SOURCE_COLLECTIONS
+            ),
+        ]
+        logger.info("Product change tailer started (consumers=%s)", [c.name for c in self.consumers])
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Product change tailer stopped | stats=%s", self.stats)
+
+    async def run_forever(self) -> None:
+        """Entry point for a dedicated worker process."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _rebuild(self, reason: str) -> None:
+        async with self._rebuild_lock:
+            for consumer in self.consumers:
+                logger.info("Rebuilding %s (%s)", consumer.name, reason)
+                self.stats["refreshed"][consumer.name] += await consumer.rebuild()
+            self.stats["rebuilds"] += 1
+
+    async def _bootstrap(self) -> None:
+        for consumer in self.consumers:
+            try:
+                await consumer.bootstrap()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                logger.exception("%s bootstrap failed", consumer.name)
+
+    @staticmethod
+    def _token_id(collection: str) -> str:
+        return f"{RESUME_TOKEN_PREFIX}:{collection}"
+
+    @staticmethod
+    def _derived_only(change: dict[str, Any]) -> bool:
+        if change.get("operationType") != "update":
+            return False
+        description = change.get("updateDescription") or {}
+        fields = [*(description.get("updatedFields") or {}), *(description.get("removedFields") or [])]
+        return bool(fields) and all(field.split(".", 1)[0] in DERIVED_FIELD_PREFIXES for field in fields)
+
+    def _record(self, collection: str, sku: str) -> None:
+        self.stats["events"] += 1
+        for consumer in self.consumers:
+            if collection in consumer.collections:
+                self._pending[consumer.name].add(sku)
+
+    async def _watch_loop(self, collection: str) -> None:
+        attempt = 0
+        while not self._stopping.is_set():
+            doc = await db[RESUME_TOKEN_COLLECTION].find_one({"_id": self._token_id(collection)})
+            token = (doc or {}).get("token")
+            self._saved_tokens[collection] = token
+            try:
+                async with db[collection].watch(PRODUCT_CHANGE_PIPELINE, resume_after=token) as stream:
+                    attempt = 0
+                    async for change in stream:
+                        sku = (change.get("documentKey") or {}).get("_id")
+                        if sku is not None and not self._derived_only(change):
+                            self._record(collection, str(sku))
+                        self._tokens[collection] = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                    if collection == SOURCE_COLLECTIONS[0]:
+                        await self._periodic_rebuild_loop()
+                    return
+                if exc.code in RESUME_TOKEN_LOST_CODES:
+                    logger.warning("%s resume token is no longer valid (%s); rebuilding consumers", collection, exc)
+                    await self._save_token(collection, None)
+                    self._tokens.pop(collection, None)
+                    await self._rebuild(f"{collection} resume token lost")
+                    continue
+                logger.warning("%s change stream failed: %s", collection, exc)
+            except PyMongoError as exc:
+                logger.warning("%s change stream interrupted: %s", collection, exc)
+
+            delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+            attempt += 1
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _periodic_rebuild_loop(self) -> None:
+        logger.info("Change streams unavailable; product change consumers rebuild every %.0fs", self.rebuild_seconds)
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.rebuild_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._rebuild("scheduled")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                logger.exception("Scheduled product change rebuild failed")
+
+    async def _save_token(self, collection: str, token: dict | None) -> None:
+        await db[RESUME_TOKEN_COLLECTION].update_one(
+            {"_id": self._token_id(collection)},
+            {"$set": {"token": token, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        self._saved_tokens[collection] = token
+
+    async def _flush_loop(self) -> None:
+        while not self._stopping.is_set():
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            if not any(self._pending.values()):
+                continue
+            # Tokens captured before taking the SKUs cover only events already pending.
+            tokens = dict(self._tokens)
+            failed = False
+            for consumer in self.consumers:
+                skus = list(self._pending[consumer.name])
+                if not skus:
+                    continue
+                self._pending[consumer.name].clear()
+                try:
+                    self.stats["refreshed"][consumer.name] += await consumer.refresh(skus)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    failed = True
+                    self.stats["errors"] += 1
+                    logger.exception("%s refresh failed for %s SKU(s)", consumer.name, len(skus))
+                    self._pending[consumer.name].update(skus)
+            if failed:
+                await asyncio.sleep(RECONNECT_BACKOFF_SECONDS[-1])
+                continue
+            self.stats["flushes"] += 1
+            for collection, token in tokens.items():
+                if token is not None and token != self._saved_tokens.get(collection):
+                    try:
+                        await self._save_token(collection, token)
+                    except PyMongoError as exc:
+                        logger.warning("Failed to persist %s resume token: %s", collection, exc)
+
+
+_tailer: ProductChangeTailer | None = None
+
+
+def build_product_change_consumers() -> list[ProductChangeConsumer]:
+    # Imported here: consumers import this module for the base class.
+    from app.services.drift_counters import DriftCountersConsumer
+    from app.services.report_items_view import ReportItemsViewConsumer
+
+    return [ReportItemsViewConsumer(), DriftCountersConsumer()]
+
+
+def start_product_change_tailer() -> ProductChangeTailer:
+    global _tailer
+    if _tailer is None:
+        _tailer = ProductChangeTailer(build_product_change_consumers())
+    _tailer.start()
+    return _tailer
+
+
+async def stop_product_change_tailer() -> None:
+    if _tailer is not None:
+        await _tailer.stop()
+
+
+def get_product_change_tailer_status() -> dict[str, Any]:
+    if _tailer is None:
+        return {"running": False}
+    return {
+        "running": _tailer.running,
+        "pending_skus": {name: len(skus) for name, skus in _tailer._pending.items()},
+        "stats": {**_tailer.stats, "refreshed": dict(_tailer.stats["refreshed"])},
+    }
@@ -2,6 +2,7 @@ from app.database.mongo import db
 from app.ebay.fetch_products import fetch_all_ebay_products
 from datetime import datetime, timezone
 from pymongo import UpdateOne
+from app.services.normalizer_service import compute_raw_digest
 
 
 def _parse_ebay_datetime(value: object) -> datetime | None:
@@ -62,6 +63,7 @@ async def sync_ebay_raw_to_mongo():
                     "sku": sku,
                     "raw": raw_doc,
                     "ebay_posted_at": posted_at,
+                    "raw_digest": compute_raw_digest(raw_doc, posted_at),
                 }
             },
             upsert=True,
@@ -78,9 +80,10 @@ async def sync_ebay_raw_to_mongo():
     # zero available quantity so normalization will propagate quantity=0.
     zeroed = 0
     if current_skus:
+        # Dropping raw_digest flags the doc for the next normalization run.
         result = await db.product_raw.update_many(
-            {"_id": {"$nin": list(current_skus)}},
-            {"$set": {"raw.QuantityAvailable": 0}},
+            {"_id": {"$nin": list(current_skus)}, "raw.QuantityAvailable": {"$ne": 0}},
+            {"$set": {"raw.QuantityAvailable": 0}, "$unset": {"raw_digest": ""}},
         )
         zeroed = getattr(result, "modified_count", 0)
 
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database.mongo import db
+from app.services.normalizer_service import normalize_from_raw
+
+logger = logging.getLogger(__name__)
+
+RESUME_TOKEN_COLLECTION = "change_stream_resume_tokens"
+RESUME_TOKEN_DOC_ID = "product_raw_normalizer"
+FLUSH_INTERVAL_SECONDS = 0.5
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+# Resume token no longer in the oplog / stream invalidated.
+RESUME_TOKEN_LOST_CODES = {260, 280, 286}
+
+RAW_CHANGE_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+    {"$project": {"documentKey": 1, "operationType": 1}},
+]
+
+
+async def load_resume_token() -> dict | None:
+    doc = await db[RESUME_TOKEN_COLLECTION].find_one({"_id": RESUME_TOKEN_DOC_ID})
+    return (doc or {}).get("token")
+
+
+async def save_resume_token(token: dict | None) -> None:
+    await db[RESUME_TOKEN_COLLECTION].update_one(
+        {"_id": RESUME_TOKEN_DOC_ID},
+        {"$set": {"token": token, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+class RawChangeNormalizer:
+    """Tail product_raw and normalize changed SKUs within seconds.
+
+    Each change pushes its SKU's flush out by ``debounce_seconds``, but
+    never past ``max_wait_seconds`` after the first pending change. The
+    resume token is saved only up to the oldest unnormalized event.
+    """
+
+    def __init__(
+        self,
+        *,
+        debounce_seconds: float | None = None,
+        max_wait_seconds: float | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        self.debounce_seconds = float(
+            settings.RAW_CHANGE_NORMALIZER_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        )
+        self.max_wait_seconds = max(
+            self.debounce_seconds,
+            float(settings.RAW_CHANGE_NORMALIZER_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds),
+        )
+        self.max_batch = max(1, int(max_batch or settings.RAW_CHANGE_NORMALIZER_MAX_BATCH))
+
+        # sku -> {"due": loop time, "deadline": loop time the SKU must flush by,
+        #         "first_seq": oldest unprocessed event, "last_seq": newest event}
+        self._pending: dict[str, dict[str, float | int]] = {}
+        self._tokens: deque[tuple[int, dict]] = deque()
+        self._seq = 0
+        self._saved_token: dict | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self.stats = {"events": 0, "flushes": 0, "normalized": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._watch_loop(), name="raw-change-watch"),
+            asyncio.create_task(self._flush_loop(), name="raw-change-flush"),
+        ]
+        logger.info(
+            "Raw change normalizer started (debounce=%.1fs, max_wait=%.1fs)",
+            self.debounce_seconds,
+            self.max_wait_seconds,
+        )
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Raw change normalizer stopped | stats=%s", self.stats)
+
+    async def run_forever(self) -> None:
+        """Entry point for a dedicated worker process."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def _record_event(self, sku: str, token: dict) -> None:
+        self._seq += 1
+        self.stats["events"] += 1
+        self._tokens.append((self._seq, token))
+        now = asyncio.get_running_loop().time()
+        entry = self._pending.get(sku)
+        if entry is None:
+            self._pending[sku] = {
+                "due": now + self.debounce_seconds,
+                "deadline": now + self.max_wait_seconds,
+                "first_seq": self._seq,
+                "last_seq": self._seq,
+            }
+        else:
+            entry["due"] = min(now + self.debounce_seconds, entry["deadline"])
+            entry["last_seq"] = self._seq
+
+    async def _watch_loop(self) -> None:
+        attempt = 0
+        while not self._stopping.is_set():
+            token = await load_resume_token()
+            self._saved_token = token
+            try:
+                async with db.product_raw.watch(RAW_CHANGE_PIPELINE, resume_after=token) as stream:
+                    attempt = 0
+                    async for change in stream:
+                        sku = (change.get("documentKey") or {}).get("_id")
+                        if sku is None:
+                            continue
+                        self._record_event(str(sku), stream.resume_token)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code in RESUME_TOKEN_LOST_CODES:
+                    logger.warning(
+                        "product_raw resume token is no longer valid (%s); restarting from now. "
+                        "Run /sync/prod/normalize-raw to catch up on missed changes.",
+                        exc,
+                    )
+                    await save_resume_token(None)
+                    continue
+                logger.warning("product_raw change stream failed: %s", exc)
+            except PyMongoError as exc:
+                logger.warning("product_raw change stream interrupted: %s", exc)
+
+            delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+            attempt += 1
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _take_due_skus(self) -> list[str]:
+        now = asyncio.get_running_loop().time()
+        due = [sku for sku, entry in self._pending.items() if entry["due"] <= now]
+        due.sort(key=lambda sku: self._pending[sku]["first_seq"])
+        return due[: self.max_batch]
+
+    def _safe_token(self) -> dict | None:
+        """Latest token whose preceding events have all been normalized."""
+        oldest_pending = min((int(e["first_seq"]) for e in self._pending.values()), default=None)
+        token = None
+        while self._tokens and (oldest_pending is None or self._tokens[0][0] < oldest_pending):
+            token = self._tokens.popleft()[1]
+        return token
+
+    async def _flush_loop(self) -> None:
+        while not self._stopping.is_set():
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            skus = self._take_due_skus()
+            if skus:
+                # Snapshot last_seq so an event arriving mid-normalization keeps the SKU pending.
+                taken = {sku: self._pending[sku]["last_seq"] for sku in skus}
+                try:
+                    # Fetches rewrite every raw doc; the digest check drops SKUs
+                    # whose normalization inputs did not actually change.
+                    result = await normalize_from_raw(skus=skus, only_changed=True)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.stats["errors"] += 1
+                    logger.exception("Incremental normalization failed for %s SKU(s)", len(skus))
+                    retry_at = asyncio.get_running_loop().time() + RECONNECT_BACKOFF_SECONDS[-1]
+                    for sku in skus:
+                        if sku in self._pending:
+                            self._pending[sku]["due"] = max(self._pending[sku]["due"], retry_at)
+                    continue
+
+                self.stats["flushes"] += 1
+                self.stats["normalized"] += int((result or {}).get("normalized") or 0)
+                now = asyncio.get_running_loop().time()
+                for sku, last_seq in taken.items():
+                    entry = self._pending.get(sku)
+                    if entry is None:
+                        continue
+                    if entry["last_seq"] == last_seq:
+                        self._pending.pop(sku, None)
+                    else:
+                        # Changed mid-normalization: the max-wait restarts from this flush.
+                        entry["deadline"] = now + self.max_wait_seconds
+                        entry["due"] = min(entry["due"], entry["deadline"])
+
+            token = self._safe_token()
+            if token is not None and token != self._saved_token:
+                try:
+                    await save_resume_token(token)
+                    self._saved_token = token
+                except PyMongoError as exc:
+                    logger.warning("Failed to persist product_raw resume token: %s", exc)
+
+
+_worker: RawChangeNormalizer | None = None
+
+
+def start_raw_change_normalizer() -> RawChangeNormalizer:
+    global _worker
+    if _worker is None:
+        _worker = RawChangeNormalizer()
+    _worker.start()
+    return _worker
+
+
+async def stop_raw_change_normalizer() -> None:
+    if _worker is not None:
+        await _worker.stop()
+
+
+def get_raw_change_normalizer_status() -> dict[str, Any]:
+    if _worker is None:
+        return {"running": False}
+    return {
+        "running": _worker.running,
+        "pending_skus": len(_worker._pending),
+        "stats": dict(_worker.stats),
+    }
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+
+from app.database.mongo import db
+from app.services.product_change_tailer import ProductChangeConsumer
+from app.services.search_index import SEARCH_FIELD, build_search_terms
+
+logger = logging.getLogger(__name__)
+
+VIEW_COLLECTION = "report_items_view"
+REFRESH_BATCH_SIZE = 500
+
+RAW_PROJECTION = {
+    "ebay_posted_at": 1,
+    "raw.ItemID": 1,
+    "raw.SKU": 1,
+    "raw.Title": 1,
+    "raw.QuantityAvailable": 1,
+    "raw.Images": 1,
+    "raw.ItemSpecifics.Size": 1,
+}
+NORMALIZED_PROJECTION = {
+    "title": 1,
+    "category": 1,
+    "quantity": 1,
+    "images": 1,
+    "attributes.Size": 1,
+    "metafields.art.size": 1,
+    "package.weight.major.value": 1,
+    "package.dimensions": 1,
+}
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _number(value: Any) -> float | None:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _texts(*values: Any) -> list[str]:
+    out: list[str] = []
+    for value in values:
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            text = str(item or "").strip()
+            if text:
+                out.append(text)
+    return out
+
+
+def build_report_item_row(sku: str, raw_doc: dict[str, Any], norm_doc: dict[str, Any] | None) -> dict[str, Any]:
+    """Flatten the fields /reporting/items filters and sorts on for one SKU."""
+    raw = raw_doc.get("raw") or {}
+    norm = norm_doc or {}
+    package = norm.get("package") or {}
+    dimensions = package.get("dimensions") or {}
+
+    quantity = _number(norm.get("quantity"))
+    if quantity is None:
+        quantity = _number(raw.get("QuantityAvailable"))
+
+    images = norm.get("images") if norm.get("images") is not None else raw.get("Images")
+    first_image = images[0] if isinstance(images, list) and images else None
+
+    return {
+        "_id": sku,
+        "ebay_posted_at": raw_doc.get("ebay_posted_at"),
+        # Unknown quantity counts as sold out, as the old $ifNull/$lte filter did.
+        "quantity": quantity if quantity is not None else 0.0,
+        "weight": _number(((package.get("weight") or {}).get("major") or {}).get("value")),
+        "length": _number((dimensions.get("length") or {}).get("value")),
+        "width": _number((dimensions.get("width") or {}).get("value")),
+        "height": _number((dimensions.get("height") or {}).get("value")),
+        "size_text": " | ".join(
+            _texts(
+                (raw.get("ItemSpecifics") or {}).get("Size"),
+                (norm.get("attributes") or {}).get("Size"),
+                ((norm.get("metafields") or {}).get("art") or {}).get("size"),
+            )
+        ).lower(),
+        SEARCH_FIELD: build_search_terms(
+            keys=(sku, raw.get("ItemID"), raw.get("SKU")),
+            texts=(raw.get("Title"), norm.get("title"), norm.get("category")),
+        ),
+        "image_url": first_image,
+        "has_normalized": norm_doc is not None,
+        "view_updated_at": _utc_now(),
+    }
+
+
+async def ensure_report_items_view_indexes() -> None:
+    coll = db[VIEW_COLLECTION]
+    await coll.create_index(
+        [("ebay_posted_at", DESCENDING), ("_id", ASCENDING)],
+        name="idx_report_items_posted",
+        background=True,
+    )
+    await coll.create_index(
+        [("quantity", ASCENDING), ("ebay_posted_at", DESCENDING), ("_id", ASCENDING)],
+        name="idx_report_items_quantity_posted",
+        background=True,
+    )
+    await coll.create_index(
+        [(SEARCH_FIELD, ASCENDING)],
+        name="idx_report_items_search_terms",
+        background=True,
+    )
+    for field in ("weight", "length", "width", "height"):
+        await coll.create_index(
+            [(field, ASCENDING), ("ebay_posted_at", DESCENDING)],
+            name=f"idx_report_items_{field}_posted",
+            background=True,
+        )
+
+
+async def refresh_report_items(skus: Iterable[str]) -> dict[str, int]:
+    """Rebuild the view rows for ``skus``; rows whose product_raw doc is gone are removed."""
+    sku_list = list(dict.fromkeys(str(sku) for sku in skus))
+    upserted = 0
+    removed = 0
+    for start in range(0, len(sku_list), REFRESH_BATCH_SIZE):
+        chunk = sku_list[start:start + REFRESH_BATCH_SIZE]
+        raw_docs = {
+            str(doc["_id"]): doc
+            async for doc in db.product_raw.find({"_id": {"$in": chunk}}, RAW_PROJECTION)
+        }
+        norm_docs = {
+            str(doc["_id"]): doc
+            async for doc in db.product_normalized.find({"_id": {"$in": list(raw_docs)}}, NORMALIZED_PROJECTION)
+        }
+        ops = [
+            ReplaceOne({"_id": sku}, build_report_item_row(sku, raw_doc, norm_docs.get(sku)), upsert=True)
+            for sku, raw_doc in raw_docs.items()
+        ]
+        if ops:
+            await db[VIEW_COLLECTION].bulk_write(ops, ordered=False)
+            upserted += len(ops)
+        missing = [sku for sku in chunk if sku not in raw_docs]
+        if missing:
+            result = await db[VIEW_COLLECTION].delete_many({"_id": {"$in": missing}})
+            removed += result.deleted_count
+    return {"refreshed": upserted, "removed": removed}
+
+
+async def rebuild_report_items_view() -> dict[str, Any]:
+    """Recompute every row from product_raw/product_normalized and drop orphans."""
+    await ensure_report_items_view_indexes()
+    started_at = _utc_now()
+    refreshed = 0
+    batch: list[str] = []
+    async for doc in db.product_raw.find({}, {"_id": 1}):
+        batch.append(str(doc["_id"]))
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            refreshed += (await refresh_report_items(batch))["refreshed"]
+            batch = []
+    if batch:
+        refreshed += (await refresh_report_items(batch))["refreshed"]
+
+    # Rows not touched by this pass belong to SKUs deleted from product_raw.
+    result = await db[VIEW_COLLECTION].delete_many({"view_updated_at": {"$lt": started_at}})
+    return {"refreshed": refreshed, "removed": result.deleted_count, "started_at": started_at}
+
+
+class ReportItemsViewConsumer(ProductChangeConsumer):
+    """Keeps report_items_view current from product_raw/product_normalized changes."""
+
+    name = VIEW_COLLECTION
+    collections = ("product_raw", "product_normalized")
+
+    async def bootstrap(self) -> None:
+        await ensure_report_items_view_indexes()
+        if await db[VIEW_COLLECTION].estimated_document_count() == 0:
+            logger.info("report_items_view is empty; building it")
+            await rebuild_report_items_view()
+
+    async def refresh(self, skus: list[str]) -> int:
+        return (await refresh_report_items(skus))["refreshed"]
+
+    async def rebuild(self) -> int:
+        return (await rebuild_report_items_view())["refreshed"]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Iterable
+
+from pymongo import UpdateOne
+
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELD = "search_terms"
+MIN_TERM_LENGTH = 1
+MAX_TERM_LENGTH = 64
+MAX_TERMS = 300
+BACKFILL_BATCH_SIZE = 500
+
+_SUBWORD_RE = re.compile(r"[0-9a-z]+")
+_EDGE_PUNCTUATION = ".,;:!?\"'()[]{}<>*"
+
+
+def _chunk_terms(text: str) -> list[str]:
+    """Whitespace chunks (``mid-century``) plus their alphanumeric parts (``mid``, ``century``)."""
+    out: list[str] = []
+    for chunk in text.lower().split():
+        chunk = chunk.strip(_EDGE_PUNCTUATION)
+        parts = _SUBWORD_RE.findall(chunk)
+        if not parts:
+            continue
+        out.append(chunk)
+        if len(parts) > 1 or (parts and parts[0] != chunk):
+            out.extend(parts)
+    return out
+
+
+def build_search_terms(*, keys: Iterable[Any] = (), texts: Iterable[Any] = ()) -> list[str]:
+    """Normalized tokens for prefix lookups.
+
+    ``keys`` (SKU, eBay ItemID) are kept whole as well as split, so a typed
+    SKU prefix such as ``ab-12`` matches; ``texts`` (titles, category) are
+    split into words.
+    """
+    terms: list[str] = []
+    for key in keys:
+        text = str(key or "").strip().lower()
+        if text:
+            terms.append(text)
+            terms.extend(_chunk_terms(text))
+    for text in texts:
+        if text:
+            terms.extend(_chunk_terms(str(text)))
+    unique = {term[:MAX_TERM_LENGTH] for term in terms if len(term) >= MIN_TERM_LENGTH}
+    return sorted(unique)[:MAX_TERMS]
+
+
+def normalized_doc_search_terms(doc: dict[str, Any], *, item_id: Any = None) -> list[str]:
+    etsy = (doc.get("channels") or {}).get("etsy") or {}
+    return build_search_terms(
+        keys=(doc.get("_id"), doc.get("sku"), item_id),
+        texts=(doc.get("title"), doc.get("category"), etsy.get("title")),
+    )
+
+
+def search_filter(q: str | None, *, field: str = SEARCH_FIELD, id_prefix: bool = True) -> dict[str, Any]:
+    """Mongo filter matching every word of ``q`` as a prefix of a stored term.
+
+    Anchored, case-sensitive regexes on the lowercased multikey field are
+    index range scans. A single-word query also tries an exact ``_id``
+    prefix (the SKU fast path), which needs no backfilled terms.
+    """
+    words = [word.strip(_EDGE_PUNCTUATION) for word in str(q or "").lower().split()]
+    words = [word[:MAX_TERM_LENGTH] for word in words if word]
+    if not words:
+        return {}
+    clauses = [{field: {"$regex": f"^{re.escape(word)}"}} for word in words]
+    query = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    if id_prefix and len(words) == 1:
+        raw = str(q).strip()
+        return {"$or": [query, {"_id": {"$regex": f"^{re.escape(raw)}"}}]}
+    return query
+
+
+async def ensure_search_indexes() -> None:
+    await db.product_normalized.create_index(
+        [(SEARCH_FIELD, 1)],
+        name="idx_product_normalized_search_terms",
+        background=True,
+    )
+
+
+async def refresh_search_terms(skus: Iterable[str] | None = None) -> dict[str, int]:
+    """Recompute ``search_terms`` on product_normalized (all docs when ``skus`` is None)."""
+    query: dict[str, Any] = {}
+    if skus is not None:
+        query = {"_id": {"$in": [str(sku) for sku in skus]}}
+    projection = {"_id": 1, "sku": 1, "title": 1, "category": 1, "channels.etsy.title": 1, SEARCH_FIELD: 1}
+
+    scanned = 0
+    updated = 0
+    batch: list[dict[str, Any]] = []
+
+    async def _flush() -> int:
+        item_ids = {
+            str(doc["_id"]): (doc.get("raw") or {}).get("ItemID")
+            async for doc in db.product_raw.find({"_id": {"$in": [d["_id"] for d in batch]}}, {"raw.ItemID": 1})
+        }
+        ops = []
+        for doc in batch:
+            terms = normalized_doc_search_terms(doc, item_id=item_ids.get(str(doc["_id"])))
+            if terms != doc.get(SEARCH_FIELD):
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {SEARCH_FIELD: terms}}))
+        if ops:
+            await db.product_normalized.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async for doc in db.product_normalized.find(query, projection):
+        scanned += 1
+        batch.append(doc)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            updated += await _flush()
+            batch = []
+    if batch:
+        updated += await _flush()
+
+    return {"scanned": scanned, "updated": updated}
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from app.database.mongo import db
+from app.services.normalizer_service import (
+    DOMAIN_META_MAP,
+    IGNORE_VALUES,
+    TAG_IGNORE_VALUES,
+    TAG_KEY_RULES,
+    UNIVERSAL_META_MAP,
+    allowed_collection_keys,
+    load_collection_keys,
+    mapping_entries,
+    mapping_version,
+    match_collection_from_mapping,
+    normalize_from_raw,
+    tag_rules_version,
+)
+
+logger = logging.getLogger(__name__)
+
+RULE_STATE_COLLECTION = "normalizer_rule_state"
+RULE_STATE_DOC_ID = "current"
+
+
+def reload_rules() -> None:
+    """Drop cached mapping-file data so on-disk edits are seen without a restart."""
+    load_collection_keys.cache_clear()
+    allowed_collection_keys.cache_clear()
+    mapping_version.cache_clear()
+
+
+def current_rule_snapshot() -> dict[str, Any]:
+    """Serialize every rule input normalization depends on.
+
+    Maps are stored as rows rather than dicts because item-specifics names
+    are not guaranteed to be valid Mongo field names.
+    """
+    return {
+        "mapping": mapping_entries(),
+        "universal": [[key, *target] for key, target in UNIVERSAL_META_MAP.items()],
+        "domain": [
+            [domain, key, *target]
+            for domain, targets in DOMAIN_META_MAP.items()
+            for key, target in targets.items()
+        ],
+        "tag_keys": [[prefix, sorted(keys)] for prefix, keys in TAG_KEY_RULES],
+        "ignore_values": sorted(IGNORE_VALUES),
+        "tag_ignore_values": sorted(TAG_IGNORE_VALUES),
+        "versions": {
+            "mapping": mapping_version(),
+            "tag_rules": tag_rules_version(),
+        },
+    }
+
+
+def _rows_to_mapping(rows: list[list[str]]) -> dict[str, dict[str, str]]:
+    data: dict[str, dict[str, str]] = {}
+    for group, collection_name, sc_key in rows:
+        data.setdefault(group, {})[collection_name] = sc_key
+    return data
+
+
+def _tag_prefix_by_key(rows: list[list[Any]]) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for prefix, keys in rows:
+        for key in keys:
+            # First rule wins, mirroring build_tags_from_item_specifics.
+            out.setdefault(key, prefix)
+    return out
+
+
+def _changed_keys(old: dict[str, Any], new: dict[str, Any]) -> set[str]:
+    return {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+async def plan_rule_change_renormalization(stored: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    """Diff two rule snapshots and resolve the affected SKUs through rule_deps indexes."""
+    if (
+        stored.get("ignore_values") != current["ignore_values"]
+        or stored.get("tag_ignore_values") != current["tag_ignore_values"]
+    ):
+        # Ignore lists apply to every attribute value, so nothing narrower is safe.
+        return {"full": True, "reason": "ignore_values_changed", "changes": {}, "skus": []}
+
+    universal_keys = _changed_keys(
+        {row[0]: row[1:] for row in stored.get("universal") or []},
+        {row[0]: row[1:] for row in current["universal"]},
+    )
+    tag_keys = _changed_keys(
+        _tag_prefix_by_key(stored.get("tag_keys") or []),
+        _tag_prefix_by_key(current["tag_keys"]),
+    )
+
+    old_domain: dict[str, dict[str, Any]] = {}
+    for domain, key, *target in stored.get("domain") or []:
+        old_domain.setdefault(domain, {})[key] = target
+    new_domain: dict[str, dict[str, Any]] = {}
+    for domain, key, *target in current["domain"]:
+        new_domain.setdefault(domain, {})[key] = target
+    domain_keys = {
+        domain: sorted(keys)
+        for domain in set(old_domain) | set(new_domain)
+        if (keys := _changed_keys(old_domain.get(domain, {}), new_domain.get(domain, {})))
+    }
+
+    # Replay every known category against the old and new mapping; the
+    # category list is small compared to the catalog.
+    affected_categories: list[str] = []
+    if stored.get("mapping") != current["mapping"]:
+        old_mapping = _rows_to_mapping(stored.get("mapping") or [])
+        new_mapping = _rows_to_mapping(current["mapping"])
+        categories = await db.product_normalized.distinct("rule_deps.category")
+        for category in categories:
+            if not isinstance(category, str):
+                continue
+            if match_collection_from_mapping(category, old_mapping) != match_collection_from_mapping(category, new_mapping):
+                affected_categories.append(category)
+
+    attribute_keys = sorted(universal_keys | tag_keys)
+    clauses: list[dict[str, Any]] = [
+        # Docs normalized before rule_deps existed (null also matches missing).
+        {"rule_deps.category": None},
+    ]
+    if affected_categories:
+        clauses.append({"rule_deps.category": {"$in": affected_categories}})
+    if attribute_keys:
+        clauses.append({"rule_deps.attribute_keys": {"$in": attribute_keys}})
+    for domain, keys in domain_keys.items():
+        clauses.append({"rule_deps.domain": domain, "rule_deps.attribute_keys": {"$in": keys}})
+
+    skus = [str(doc["_id"]) async for doc in db.product_normalized.find({"$or": clauses}, {"_id": 1})]
+
+    return {
+        "full": False,
+        "reason": None,
+        "changes": {
+            "mapping_categories": affected_categories,
+            "universal_keys": sorted(universal_keys),
+            "tag_keys": sorted(tag_keys),
+            "domain_keys": domain_keys,
+        },
+        "skus": skus,
+    }
+
+
+async def renormalize_for_rule_changes(*, dry_run: bool = False, force_full: bool = False) -> dict[str, Any]:
+    """Renormalize only the SKUs whose recorded rule inputs changed.
+
+    The last applied rule snapshot lives in normalizer_rule_state. Without a
+    snapshot (first run) or when forced, the whole catalog is renormalized so
+    every doc gets its rule_deps stamp.
+    """
+    reload_rules()
+    current = current_rule_snapshot()
+    stored = await db[RULE_STATE_COLLECTION].find_one({"_id": RULE_STATE_DOC_ID})
+
+    if stored is None or force_full:
+        plan = {"full": True, "reason": "forced" if force_full else "no_rule_snapshot", "changes": {}, "skus": []}
+    else:
+        plan = await plan_rule_change_renormalization(stored, current)
+
+    summary: dict[str, Any] = {
+        "full": plan["full"],
+        "reason": plan["reason"],
+        "changes": plan["changes"],
+        "affected_skus": len(plan["skus"]),
+        "dry_run": dry_run,
+        "normalize": None,
+    }
+    if dry_run:
+        summary["sample_skus"] = plan["skus"][:50]
+        return summary
+
+    if plan["full"]:
+        logger.info("▶ Rule change renormalization: full catalog (%s)", plan["reason"])
+        summary["normalize"] = await normalize_from_raw(only_changed=False)
+    elif plan["skus"]:
+        logger.info("▶ Rule change renormalization: %s affected SKU(s)", len(plan["skus"]))
+        summary["normalize"] = await normalize_from_raw(skus=plan["skus"])
+    else:
+        logger.info("Rule change renormalization: no affected SKUs")
+
+    await db[RULE_STATE_COLLECTION].replace_one(
+        {"_id": RULE_STATE_DOC_ID},
+        {"_id": RULE_STATE_DOC_ID, **current, "applied_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+    return summary
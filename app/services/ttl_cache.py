@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from pymongo.errors import PyMongoError
+
+from app.database.mongo import db
+
+logger = logging.getLogger(__name__)
+
+PERSISTED_CACHE_COLLECTION = "ttl_cache_entries"
+DEFAULT_MAX_ENTRIES = 1000
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_aware_utc(value: Any) -> datetime | None:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class TTLCache:
+    """Process-local async cache with stale-while-revalidate and single-flight loads.
+
+    A value younger than ``ttl_seconds`` is served as is. Up to
+    ``stale_seconds`` past that it is still served while one background
+    load replaces it. Older or missing values are loaded inline. Concurrent
+    misses for a key share one load, and loader errors are raised to every
+    waiter without being cached. With ``persist``, loaded values are also
+    written to Mongo and read back after a restart before the loader runs.
+    Persisted values must be BSON-encodable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        ttl_seconds: float,
+        stale_seconds: float = 0.0,
+        persist: bool = False,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.name = name
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_seconds = float(stale_seconds)
+        self.persist = persist
+        self.max_entries = int(max_entries)
+        # key -> (monotonic time the value was loaded, value)
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._persist_indexed = False
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "persisted_hits": 0,
+            "loads": 0,
+            "load_errors": 0,
+        }
+
+    def _age(self, key: str) -> float | None:
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def _store(self, key: str, value: Any, *, age: float = 0.0) -> None:
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() - age, value)
+
+    async def get(self, key: Any, loader: Loader) -> Any:
+        key = str(key)
+        age = self._age(key)
+        if age is None and self.persist:
+            if await self._load_persisted(key):
+                self.stats["persisted_hits"] += 1
+                age = self._age(key)
+
+        if age is not None and age < self.ttl_seconds:
+            self.stats["hits"] += 1
+            return self._entries[key][1]
+        if age is not None and age < self.ttl_seconds + self.stale_seconds:
+            self.stats["stale_hits"] += 1
+            self._load(key, loader)
+            return self._entries[key][1]
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: Loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.create_task(self._run_loader(key, loader), name=f"ttl-cache-{self.name}")
+        self._inflight[key] = task
+        task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so background revalidations do not warn; waiters still get it.
+            logger.warning("%s cache load for %r failed: %s", self.name, key, task.exception())
+
+    async def _run_loader(self, key: str, loader: Loader) -> Any:
+        self.stats["loads"] += 1
+        try:
+            value = await loader()
+        except Exception:
+            self.stats["load_errors"] += 1
+            raise
+        self._store(key, value)
+        if self.persist:
+            await self._save_persisted(key, value)
+        return value
+
+    def _persisted_id(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def _load_persisted(self, key: str) -> bool:
+        try:
+            doc = await db[PERSISTED_CACHE_COLLECTION].find_one({"_id": self._persisted_id(key)})
+        except PyMongoError as exc:
+            logger.warning("%s cache could not read %r from Mongo: %s", self.name, key, exc)
+            return False
+        stored_at = _as_aware_utc((doc or {}).get("stored_at"))
+        if stored_at is None:
+            return False
+        age = max(0.0, (_utc_now() - stored_at).total_seconds())
+        if age >= self.ttl_seconds + self.stale_seconds:
+            return False
+        self._store(key, doc.get("value"), age=age)
+        return True
+
+    async def _save_persisted(self, key: str, value: Any) -> None:
+        now = _utc_now()
+        try:
+            if not self._persist_indexed:
+                await db[PERSISTED_CACHE_COLLECTION].create_index(
+                    [("expires_at", 1)],
+                    name="idx_ttl_cache_entries_expires",
+                    expireAfterSeconds=0,
+                    background=True,
+                )
+                self._persist_indexed = True
+            await db[PERSISTED_CACHE_COLLECTION].replace_one(
+                {"_id": self._persisted_id(key)},
+                {
+                    "cache": self.name,
+                    "key": key,
+                    "value": value,
+                    "stored_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds + self.stale_seconds),
+                },
+                upsert=True,
+            )
+        except PyMongoError as exc:
+            logger.warning("%s cache could not persist %r: %s", self.name, key, exc)
+
+    async def invalidate(self, key: Any = None) -> None:
+        """Drop one key (or everything), including persisted copies."""
+        if key is None:
+            self._entries.clear()
+            query: dict[str, Any] = {"cache": self.name}
+        else:
+            self._entries.pop(str(key), None)
+            query = {"_id": self._persisted_id(str(key))}
+        if self.persist:
+            await db[PERSISTED_CACHE_COLLECTION].delete_many(query)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "persist": self.persist,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "stats": dict(self.stats),
+        }
+
+
+_caches: dict[str, TTLCache] = {}
+
+
+def get_ttl_cache(name: str, **options: Any) -> TTLCache:
+    """Named process-wide cache; ``options`` apply when it is first created."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = TTLCache(name, **options)
+    return cache
+
+
+def get_ttl_cache_status() -> dict[str, Any]:
+    return {name: cache.status() for name, cache in sorted(_caches.items())}
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.database.mongo import db
+from app.services.ebay_webhook_service import handle_ebay_item_listed, handle_ebay_order_webhook
+from app.services.etsy_webhook_service import handle_etsy_event
+
+logger = logging.getLogger(__name__)
+
+# The notification audit collections double as the inbox: the webhook routes
+# insert and return, and the background runner processes documents here.
+INBOX_COLLECTIONS = {
+    "ebay": "ebay_notification_events",
+    "etsy": "etsy_notification_events",
+}
+INBOX_LEASE_SECONDS = 300
+INBOX_RETRY_BASE_SECONDS = 30
+INBOX_RETRY_MAX_SECONDS = 3600
+INBOX_MAX_ATTEMPTS = 8
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def new_inbox_fields(now: datetime | None = None) -> dict[str, Any]:
+    """Fields that make a freshly inserted notification claimable."""
+    now = now or _utc_now()
+    return {
+        "status": "received",
+        "received_at": now,
+        # Only documents carrying next_attempt_at are claimed, so events
+        # stored before the inbox existed are not replayed.
+        "next_attempt_at": now,
+        "attempts": 0,
+        "lease_until": None,
+    }
+
+
+def _inbox_claim_query(now: datetime) -> dict[str, Any]:
+    return {
+        "$or": [
+            {"status": "received", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "lease_until": {"$lt": now}},
+        ]
+    }
+
+
+async def ensure_webhook_inbox_indexes() -> None:
+    for source, collection in INBOX_COLLECTIONS.items():
+        await db[collection].create_index(
+            [("status", 1), ("next_attempt_at", 1)],
+            name=f"idx_{source}_inbox_status_next_attempt",
+            background=True,
+        )
+        await db[collection].create_index(
+            [("status", 1), ("lease_until", 1)],
+            name=f"idx_{source}_inbox_status_lease",
+            background=True,
+        )
+
+
+async def _claim(collection: str) -> dict[str, Any] | None:
+    now = _utc_now()
+    return await db[collection].find_one_and_update(
+        _inbox_claim_query(now),
+        {
+            "$set": {
+                "status": "processing",
+                "started_at": now,
+                "lease_until": now + timedelta(seconds=INBOX_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _dispatch(source: str, doc: dict[str, Any]) -> dict[str, Any]:
+    if source == "etsy":
+        payload = doc.get("payload")
+        if payload is None:
+            payload = json.loads(doc.get("raw_body") or "{}")
+        return await handle_etsy_event(
+            payload=payload,
+            raw_body=doc.get("raw_body") or "",
+            webhook_id=doc.get("webhook_id"),
+            webhook_timestamp=doc.get("webhook_timestamp"),
+        )
+
+    payload = doc.get("payload") or {}
+    if doc.get("event_type") == "ItemListed":
+        return await handle_ebay_item_listed(payload)
+    options = doc.get("options") or {}
+    return await handle_ebay_order_webhook(
+        payload,
+        None,
+        make_unavailable=bool(options.get("make_unavailable", True)),
+    )
+
+
+async def _finish(collection: str, doc: dict[str, Any], update: dict[str, Any]) -> bool:
+    """Record an outcome unless the lease expired and another worker reclaimed the doc."""
+    result = await db[collection].update_one(
+        {"_id": doc["_id"], "status": "processing", "lease_until": doc.get("lease_until")},
+        {"$set": update},
+    )
+    if not result.matched_count:
+        logger.warning("Webhook inbox event %s lost its lease before finishing; outcome not recorded", doc["_id"])
+        return False
+    return True
+
+
+async def _process(source: str, collection: str, doc: dict[str, Any]) -> str:
+    try:
+        result = await _dispatch(source, doc)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.exception("Webhook inbox %s event %s failed", source, doc.get("_id"))
+        attempts = int(doc.get("attempts") or 1)
+        update: dict[str, Any] = {"error": str(exc), "lease_until": None, "updated_at": _utc_now()}
+        if attempts >= INBOX_MAX_ATTEMPTS:
+            update.update({"status": "failed", "processed_at": _utc_now()})
+            outcome = "failed"
+        else:
+            delay = min(INBOX_RETRY_MAX_SECONDS, INBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+            update.update({"status": "received", "next_attempt_at": _utc_now() + timedelta(seconds=delay)})
+            outcome = "retry"
+        return outcome if await _finish(collection, doc, update) else "lease_lost"
+
+    finished = await _finish(
+        collection,
+        doc,
+        {
+            "status": "processed",
+            "result": result,
+            "error": None,
+            "lease_until": None,
+            "processed_at": _utc_now(),
+        },
+    )
+    return "processed" if finished else "lease_lost"
+
+
+async def process_webhook_inbox(limit: int = 50, concurrency: int | None = None) -> dict[str, Any]:
+    """Process up to ``limit`` received notifications with a fixed number of workers.
+
+    Each worker claims one document at a time under a lease, alternating
+    between the eBay and Etsy inboxes, so a burst of notifications is
+    worked through at a bounded rate instead of as one task per request.
+    A document left in ``processing`` by a crashed process is reclaimed
+    once its lease passes; failures back off through ``next_attempt_at``
+    and are marked ``failed`` after ``INBOX_MAX_ATTEMPTS``.
+    """
+    max_items = max(1, min(int(limit), 500))
+    workers = max(1, int(concurrency or settings.WEBHOOK_INBOX_CONCURRENCY))
+    sources = list(INBOX_COLLECTIONS.items())
+    counts = {"picked": 0, "processed": 0, "retry": 0, "failed": 0, "lease_lost": 0}
+    by_source = {source: 0 for source in INBOX_COLLECTIONS}
+
+    async def worker(offset: int) -> None:
+        turn = offset
+        idle_sources = 0
+        while counts["picked"] < max_items and idle_sources < len(sources):
+            source, collection = sources[turn % len(sources)]
+            turn += 1
+            # Reserve the slot before awaiting so workers never overshoot the limit.
+            counts["picked"] += 1
+            doc = await _claim(collection)
+            if not doc:
+                counts["picked"] -= 1
+                idle_sources += 1
+                continue
+            idle_sources = 0
+            by_source[source] += 1
+            counts[await _process(source, collection, doc)] += 1
+
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    return {"requested_limit": max_items, "concurrency": workers, **counts, "by_source": by_source}
+
+
+async def get_webhook_inbox_status() -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for source, collection in INBOX_COLLECTIONS.items():
+        rows = await db[collection].aggregate(
+            [
+                {"$match": {"next_attempt_at": {"$exists": True}}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}, "oldest": {"$min": "$received_at"}}},
+            ]
+        ).to_list(length=None)
+        out[source] = {
+            str(row["_id"]): {"count": row["count"], "oldest_received_at": row.get("oldest")} for row in rows
+        }
+    return out
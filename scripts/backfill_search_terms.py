@@ -0,0 +1,32 @@
+"""
+Compute search_terms on every product_normalized doc (dashboard search).
+
+Usage: python -m scripts.backfill_search_terms
+
+Normalization keeps the field current afterwards; this is only needed once,
+or after changing the tokenizer in app/services/search_index.py.
+"""
+
+import asyncio
+import logging
+
+from app.database.mongo import close_mongo_client
+from app.services.search_index import ensure_search_indexes, refresh_search_terms
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main() -> None:
+    try:
+        await ensure_search_indexes()
+        result = await refresh_search_terms()
+        print(f"search_terms backfilled | scanned={result['scanned']} updated={result['updated']}")
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
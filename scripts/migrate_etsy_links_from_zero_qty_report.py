@@ -9,12 +9,11 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import httpx
 from openpyxl import load_workbook
 
-from app.config import settings
 from app.database.mongo import close_mongo_client, db
-from app.services.etsy_auth_service import get_valid_token as get_valid_etsy_token
+from app.etsy.client import EtsyAPIError, EtsyClient, close_etsy_client, get_etsy_client
+from app.services.search_index import refresh_search_terms
 
 ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_REPORT_PATH = ROOT / "logs" / "zero_qty_exact_title_matches_20260426_024121.xlsx"
@@ -238,25 +237,15 @@ def _validate_docs(row: ReportRow, old_doc: dict[str, Any] | None, new_doc: dict
     return True, "ok"
 
 
-async def _resolve_etsy_auth_headers() -> dict[str, str]:
+async def _resolve_etsy_client() -> EtsyClient:
+    etsy = get_etsy_client()
+    if not etsy.api_key:
+        raise MigrationError("missing_etsy_api_key")
     try:
-        token = await get_valid_etsy_token()
+        await etsy.ensure_auth()
     except ValueError as exc:
         raise MigrationError("missing_etsy_token") from exc
-
-    if settings.ETSY_CLIENT_ID and settings.ETSY_CLIENT_SECRET:
-        api_key = f"{settings.ETSY_CLIENT_ID}:{settings.ETSY_CLIENT_SECRET}"
-    else:
-        api_key = settings.ETSY_CLIENT_ID
-    if not api_key:
-        raise MigrationError("missing_etsy_api_key")
-
-    return {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": api_key,
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
+    return etsy
 
 
 def _build_inventory_update_payload(inventory: dict[str, Any], new_sku: str, target_quantity: int) -> dict[str, Any]:
@@ -314,39 +303,25 @@ def _build_inventory_update_payload(inventory: dict[str, Any], new_sku: str, tar
 
 
 async def _update_etsy_listing_sku(
-    *, listing_id: str, new_sku: str, target_quantity: int, headers: dict[str, str]
+    *, etsy: EtsyClient, listing_id: str, new_sku: str, target_quantity: int
 ) -> dict[str, Any]:
-    async with httpx.AsyncClient(timeout=45.0) as client:
-        get_response = await client.get(
-            f"https://openapi.etsy.com/v3/application/listings/{listing_id}/inventory",
-            headers=headers,
-            params={"show_deleted": "true"},
-        )
-        if get_response.status_code >= 400:
-            raise MigrationError(
-                f"etsy_inventory_get_failed status={get_response.status_code} body={get_response.text}"
-            )
-
-        inventory_payload = get_response.json() if get_response.content else {}
-        update_payload = _build_inventory_update_payload(inventory_payload, new_sku, target_quantity)
+    try:
+        inventory_payload = await etsy.get_listing_inventory(listing_id)
+    except EtsyAPIError as exc:
+        raise MigrationError(f"etsy_inventory_get_failed status={exc.status_code} body={exc.detail}") from exc
 
-        put_response = await client.put(
-            f"https://openapi.etsy.com/v3/application/listings/{listing_id}/inventory",
-            headers=headers,
-            content=json.dumps(update_payload),
-        )
-        if put_response.status_code >= 400:
-            raise MigrationError(
-                f"etsy_inventory_put_failed status={put_response.status_code} body={put_response.text}"
-            )
+    update_payload = _build_inventory_update_payload(inventory_payload or {}, new_sku, target_quantity)
 
-        return put_response.json() if put_response.content else {}
+    try:
+        return await etsy.update_listing_inventory(listing_id, update_payload)
+    except EtsyAPIError as exc:
+        raise MigrationError(f"etsy_inventory_put_failed status={exc.status_code} body={exc.detail}") from exc
 
 
 async def _apply_row(
     row: ReportRow,
     *,
-    etsy_headers: dict[str, str] | None,
+    etsy: EtsyClient | None,
     apply: bool,
     report_path: Path,
     skip_etsy_update: bool,
@@ -410,13 +385,13 @@ async def _apply_row(
         return result
 
     if not skip_etsy_update:
-        if not etsy_headers:
-            raise MigrationError("etsy_headers_missing_for_apply")
+        if etsy is None:
+            raise MigrationError("etsy_client_missing_for_apply")
         await _update_etsy_listing_sku(
+            etsy=etsy,
             listing_id=listing_id,
             new_sku=row.new_sku,
             target_quantity=int(new_doc.get("quantity") or 0),
-            headers=etsy_headers,
         )
         result["etsy_updated"] = True
 
@@ -428,6 +403,8 @@ async def _apply_row(
         {"_id": old_doc["_id"], "channels.etsy.listing_id": stored_listing_id},
         {"$set": old_set_ops, "$unset": old_unset_ops},
     )
+    # The Etsy title (part of search_terms) moved between the two docs.
+    await refresh_search_terms([new_doc["_id"], old_doc["_id"]])
     return result
 
 
@@ -452,9 +429,9 @@ async def _run(args: argparse.Namespace) -> int:
     if args.limit:
         filtered_rows = filtered_rows[: args.limit]
 
-    etsy_headers = None
+    etsy = None
     if args.apply and not args.skip_etsy_update:
-        etsy_headers = await _resolve_etsy_auth_headers()
+        etsy = await _resolve_etsy_client()
 
     results: list[dict[str, Any]] = []
     errors: list[dict[str, Any]] = []
@@ -462,7 +439,7 @@ async def _run(args: argparse.Namespace) -> int:
         try:
             result = await _apply_row(
                 row,
-                etsy_headers=etsy_headers,
+                etsy=etsy,
                 apply=args.apply,
                 report_path=report_path,
                 skip_etsy_update=args.skip_etsy_update,
@@ -470,6 +447,7 @@ async def _run(args: argparse.Namespace) -> int:
             results.append(result)
         except Exception as exc:
             errors.append({"row": row.row_index, "status": "error", "reason": str(exc)})
+    await close_etsy_client()
 
     summary = {
         "report": str(report_path),
@@ -0,0 +1,31 @@
+"""
+Rebuild report_items_view (the /reporting/items read model) from scratch.
+
+Usage: python -m scripts.rebuild_report_items_view
+
+The API keeps the view current on its own (PRODUCT_CHANGE_TAILER_ENABLED); run
+this after bulk edits made with change streams unavailable, or for an audit.
+"""
+
+import asyncio
+import logging
+
+from app.database.mongo import close_mongo_client
+from app.services.report_items_view import rebuild_report_items_view
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main() -> None:
+    try:
+        result = await rebuild_report_items_view()
+        print(f"report_items_view rebuilt | refreshed={result['refreshed']} removed={result['removed']}")
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+"""
+Recompute product_normalized.drift and the kpi_counters document from scratch.
+
+Usage: python -m scripts.recompute_kpi_counters
+
+The API keeps both current on its own (PRODUCT_CHANGE_TAILER_ENABLED); run
+this for an audit, or after deleting products, which the incremental
+counters do not subtract.
+"""
+
+import asyncio
+import logging
+
+from app.database.mongo import close_mongo_client
+from app.services.drift_counters import recompute_kpi_counters
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main() -> None:
+    try:
+        result = await recompute_kpi_counters()
+        print(f"kpi_counters recomputed | drift_updated={result['drift_updated']} corrected={result['corrected']}")
+        for field, value in result["counters"].items():
+            print(f"  {field}: {value}")
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -13,21 +13,12 @@ sys.path.insert(0, ROOT)
 
 from app.config import settings
 from app.database.mongo import db, close_mongo_client
-from app.services.etsy_auth_service import get_valid_token as get_valid_etsy_token
+from app.etsy.client import EtsyAPIError, EtsyClient
+from app.services.search_index import refresh_search_terms
 
-BASE_URL = "https://openapi.etsy.com/v3/application"
 INVESTIGATION_COLLECTION = "etsy_listings_investigation"
 
 
-async def resolve_access_token(explicit_token: str | None) -> str:
-    if explicit_token:
-        return explicit_token
-    try:
-        return await get_valid_etsy_token()
-    except ValueError as exc:
-        raise RuntimeError(str(exc)) from exc
-
-
 def resolve_api_key(explicit_api_key: str | None) -> str:
     if explicit_api_key:
         return explicit_api_key
@@ -117,25 +108,19 @@ async def fetch_linked_etsy_channels(limit: int | None) -> tuple[dict[int, list[
 
 
 async def fetch_batch(
-    client: httpx.AsyncClient,
-    headers: dict[str, str],
+    etsy: EtsyClient,
     listing_ids: list[int],
     retries: int = 3,
 ) -> tuple[bool, list[dict[str, Any]]]:
-    params = {"listing_ids": ",".join(str(listing_id) for listing_id in listing_ids)}
+    # 429s are retried inside the client; 5xx and dropped reads are retried here.
     for attempt in range(retries):
         try:
-            response = await client.get(f"{BASE_URL}/listings/batch", headers=headers, params=params)
-            if response.status_code == 429:
-                await asyncio.sleep(10)
+            return True, await etsy.get_listings_batch(listing_ids)
+        except EtsyAPIError as exc:
+            if attempt < retries - 1 and exc.status_code >= 500:
+                await asyncio.sleep(2 ** attempt)
                 continue
-            if response.status_code >= 400:
-                if attempt < retries - 1 and response.status_code >= 500:
-                    await asyncio.sleep(2 ** attempt)
-                    continue
-                return False, []
-            payload = response.json()
-            return True, payload.get("results") or []
+            return False, []
         except (httpx.ReadError, httpx.ConnectError, httpx.TimeoutException):
             if attempt < retries - 1:
                 await asyncio.sleep(2 ** attempt)
@@ -202,7 +187,7 @@ def build_investigation_doc(
 async def refresh_inventory(
     *,
     api_key: str,
-    token: str,
+    token: str | None,
     limit: int | None,
     batch_size: int,
     concurrency: int,
@@ -216,23 +201,24 @@ async def refresh_inventory(
             "message": "No Etsy-linked channel records found.",
         }
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": api_key,
-        "Accept": "application/json",
-    }
+    etsy = EtsyClient(api_key=api_key, access_token=token)
+    try:
+        await etsy.ensure_auth()
+    except ValueError as exc:
+        raise RuntimeError(str(exc)) from exc
+
     fetched_at = utc_now()
     listing_ids_by_chunk = chunked(ordered_listing_ids, batch_size)
     live_by_listing_id: dict[int, dict[str, Any]] = {}
     successful_chunks: list[list[int]] = []
     failed_chunks: list[list[int]] = []
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    try:
         semaphore = asyncio.Semaphore(concurrency)
 
         async def run_chunk(chunk: list[int]) -> None:
             async with semaphore:
-                ok, rows = await fetch_batch(client, headers, chunk)
+                ok, rows = await fetch_batch(etsy, chunk)
                 if not ok:
                     failed_chunks.append(chunk)
                     return
@@ -248,6 +234,8 @@ async def refresh_inventory(
                         continue
 
         await asyncio.gather(*(run_chunk(chunk) for chunk in listing_ids_by_chunk))
+    finally:
+        await etsy.aclose()
 
     state_counts: Counter[str] = Counter()
     updated_channel_docs = 0
@@ -255,6 +243,8 @@ async def refresh_inventory(
     missing_listing_ids: list[int] = []
 
     successful_listing_ids = {listing_id for chunk in successful_chunks for listing_id in chunk}
+    # The Etsy title is part of search_terms.
+    refreshed_skus: list[str] = []
 
     for listing_id in ordered_listing_ids:
         channel_rows = linked_by_listing_id[listing_id]
@@ -307,6 +297,8 @@ async def refresh_inventory(
                 {"$set": {"channels.etsy": updated_channel}},
             )
             updated_channel_docs += result.modified_count
+            if result.modified_count:
+                refreshed_skus.append(channel_row["sku"])
 
         investigation_doc = build_investigation_doc(
             listing_id,
@@ -321,6 +313,9 @@ async def refresh_inventory(
         )
         updated_investigation_docs += 1
 
+    if refreshed_skus:
+        await refresh_search_terms(refreshed_skus)
+
     return {
         "ok": True,
         "dry_run": dry_run,
@@ -339,12 +334,11 @@ async def refresh_inventory(
 
 async def main() -> None:
     args = parse_args()
-    token = await resolve_access_token(args.token)
     api_key = resolve_api_key(args.api_key)
 
     result = await refresh_inventory(
         api_key=api_key,
-        token=token,
+        token=args.token,
         limit=args.limit,
         batch_size=args.batch_size,
         concurrency=args.concurrency,
@@ -0,0 +1,35 @@
+"""
+Long-running worker that drains channel_sync_jobs, ebay_listing_sync_queue
+and the webhook inbox, and prefetches Etsy images for the match workbook.
+
+Usage: python -m scripts.run_background_jobs
+
+Set BACKGROUND_JOB_RUNNER_ENABLED=false on the API when running this as a
+separate process. Several runners can coexist: jobs are claimed under a lease.
+"""
+
+import asyncio
+import logging
+
+from app.database.mongo import close_mongo_client
+from app.services.background_job_runner import BackgroundJobRunner
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main() -> None:
+    runner = BackgroundJobRunner()
+    try:
+        await runner.run_forever()
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,34 @@
+"""
+Long-running worker that tails product_raw and normalizes changed SKUs.
+
+Usage: python -m scripts.run_raw_change_normalizer
+
+Use this instead of RAW_CHANGE_NORMALIZER_ENABLED when the API runs with
+several instances; only one tailer should be active at a time.
+"""
+
+import asyncio
+import logging
+
+from app.database.mongo import close_mongo_client
+from app.services.raw_change_normalizer import RawChangeNormalizer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main() -> None:
+    worker = RawChangeNormalizer()
+    try:
+        await worker.run_forever()
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -4,31 +4,19 @@ import os
 import sys
 from datetime import datetime, timezone
 
-import httpx
-
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(ROOT)
 
 from app.config import settings
 from app.database.mongo import db, close_mongo_client
-from app.services.etsy_auth_service import get_valid_token as get_valid_etsy_token
+from app.etsy.client import EtsyAPIError, EtsyClient
 
-BASE_URL = "https://openapi.etsy.com/v3/application"
 TARGET_COLLECTION = "etsy_listings_investigation"
 
 # Etsy listing states commonly used by the listings endpoint.
 LISTING_STATES = ["active", "inactive", "draft", "sold_out", "expired"]
 
 
-async def resolve_access_token(explicit_token: str | None) -> str:
-    if explicit_token:
-        return explicit_token
-    try:
-        return await get_valid_etsy_token()
-    except ValueError as exc:
-        raise RuntimeError(str(exc)) from exc
-
-
 def resolve_api_key(explicit_api_key: str | None) -> str:
     if explicit_api_key:
         return explicit_api_key
@@ -52,39 +40,25 @@ def resolve_api_key(explicit_api_key: str | None) -> str:
 
 
 async def fetch_state_listings(
-    client: httpx.AsyncClient,
+    etsy: EtsyClient,
     *,
     shop_id: str,
     state: str,
-    headers: dict,
     page_size: int = 100,
 ) -> list[dict]:
     all_rows: list[dict] = []
     offset = 0
 
     while True:
-        params = {
-            "limit": page_size,
-            "offset": offset,
-            "state": state,
-        }
-
-        response = await client.get(
-            f"{BASE_URL}/shops/{shop_id}/listings",
-            headers=headers,
-            params=params,
-        )
-
-        if response.status_code == 404:
-            raise RuntimeError(f"Shop {shop_id} was not found or is not accessible.")
-
-        if response.status_code >= 400:
+        try:
+            payload = await etsy.get_shop_listings(shop_id, state=state, limit=page_size, offset=offset)
+        except EtsyAPIError as exc:
+            if exc.status_code == 404:
+                raise RuntimeError(f"Shop {shop_id} was not found or is not accessible.") from exc
             raise RuntimeError(
-                f"Etsy API error {response.status_code} for state={state}: {response.text}"
-            )
+                f"Etsy API error {exc.status_code} for state={state}: {exc.detail}"
+            ) from exc
 
-        response.raise_for_status()
-        payload = response.json()
         rows = payload.get("results") or []
         if not rows:
             break
@@ -102,26 +76,26 @@ async def sync_etsy_listings_for_investigation(
     *,
     shop_id: str,
     api_key: str,
-    token: str,
+    token: str | None = None,
 ) -> dict:
-    headers = {
-        "x-api-key": api_key,
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-    }
+    # Without --token the client uses (and refreshes) the token stored in Mongo.
+    etsy = EtsyClient(api_key=api_key, access_token=token)
+    try:
+        await etsy.ensure_auth()
+    except ValueError as exc:
+        raise RuntimeError(str(exc)) from exc
 
     fetched_at = datetime.now(timezone.utc)
     seen_listing_ids: set[int] = set()
     upserted = 0
     by_state: dict[str, int] = {}
 
-    async with httpx.AsyncClient(timeout=45.0) as client:
+    try:
         for state in LISTING_STATES:
             rows = await fetch_state_listings(
-                client,
+                etsy,
                 shop_id=shop_id,
                 state=state,
-                headers=headers,
             )
             by_state[state] = len(rows)
 
@@ -163,6 +137,8 @@ async def sync_etsy_listings_for_investigation(
 
                 await db[TARGET_COLLECTION].replace_one({"_id": doc_id}, doc, upsert=True)
                 upserted += 1
+    finally:
+        await etsy.aclose()
 
     result = await db[TARGET_COLLECTION].update_many(
         {
@@ -207,12 +183,11 @@ async def main() -> None:
     args = parse_args()
 
     api_key = resolve_api_key(args.api_key)
-    token = await resolve_access_token(args.token)
 
     result = await sync_etsy_listings_for_investigation(
         shop_id=args.shop_id,
         api_key=api_key,
-        token=token,
+        token=args.token,
     )
     print(result)
     close_mongo_client()